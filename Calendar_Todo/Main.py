@@ -1,76 +1,147 @@
-import sys, json
+import sys, time
 from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from calendar_core.profiler import startup
+
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QListWidgetItem,
-    QCalendarWidget, QListWidget, QPushButton, QLabel, QMessageBox, QCheckBox, QDialog,
-    QLineEdit, QTextEdit, QSpinBox, QTimeEdit
+    QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
+    QCalendarWidget, QListView, QPushButton, QLabel, QMessageBox, QCheckBox, QDialog,
+    QLineEdit, QTextEdit, QSpinBox, QTimeEdit, QListWidget, QListWidgetItem,
+    QComboBox, QDateEdit
 )
-from PyQt6.QtGui import QIcon, QTextCharFormat, QColor, QFont, QShortcut, QKeySequence
-from PyQt6.QtCore import QDate, QTime, QSize, QTimer
+from PyQt6.QtGui import QIcon, QShortcut, QKeySequence
+from PyQt6.QtCore import Qt, QDate, QTime, QTimer
 from datetime import datetime, timedelta
-from focus_window import FocusWindow
+from task_view import TaskListModel, TaskDelegate
+from heatmap_view import CalendarHeatmap
+
+from calendar_core.storage import open_store
+from calendar_core.writer import flush_writes
+from calendar_core.reminders import ReminderQueue
+from calendar_core.conflicts import ConflictIndex, bulk_conflicts, neighbour_dates
+from calendar_core.task_model import Task
+from calendar_core.search import SearchIndex
+from calendar_core.recurrence import Rule, split_occurrence
+from calendar_core.agenda import Agenda
+from calendar_core.metrics import metrics, timed
+from notion_link import TwoWaySyncer, notion_configured
+startup.mark('import')
 
 DATA_FILE = Path(__file__).parent / 'data.json'
 
+# Nhắc trước giờ bắt đầu bao nhiêu phút (có thể nhiều mốc, vd (10, 0))
+REMIND_LEAD_MINUTES = (0,)
+SNOOZE_MINUTES = 5
+# Dù không có sự kiện nào, timer nhắc việc vẫn thức dậy tối đa mỗi giờ một lần
+MAX_REMINDER_SLEEP_MS = 60 * 60 * 1000
+KEEP_DAYS = 7
+# Thêm/sửa cả chuỗi lặp: chỉ kiểm tra trùng giờ cho các lần lặp trong chừng này ngày
+SERIES_CONFLICT_DAYS = 28
+MAX_CONFLICT_LINES = 10
+WEEKDAY_NAMES = ('T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'CN')
+
 def load_data():
-    if not DATA_FILE.exists():
-        return {}
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        try:
-            return json.load(f)
-        except:
-            return {}
+    """Mở kho task (JSON mặc định, CALENDAR_STORE=sqlite để dùng SQLite)"""
+    return open_store(DATA_FILE)
 
-def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def focus_window_class():
+    """focus_window kéo theo QtMultimedia (nạp backend media khá lâu) nên chỉ import khi cần"""
+    from focus_window import FocusWindow
+    return FocusWindow
 
 # ============================================================
 # TaskDialog
 # ============================================================
 class TaskDialog(QDialog):
-    def __init__(self, parent=None, data=None):
+    def __init__(self, parent=None, data=None, date=None, rule=None, repeat=True):
+        """repeat=False ẩn phần lặp lại (khi sửa riêng một lần lặp); rule: rule đang sửa cả chuỗi"""
         super().__init__(parent)
         self.setWindowTitle('Task')
-        self.data = data or {}
+        self.data = data.copy() if data else Task()
         layout = QVBoxLayout(self)
 
-        self.title_inp = QLineEdit(self.data.get('title', ''))
+        self.title_inp = QLineEdit(self.data.title or '')
         layout.addWidget(QLabel('Title'))
         layout.addWidget(self.title_inp)
 
         self.time_inp = QTimeEdit()
         self.time_inp.setDisplayFormat('HH:mm')
-        if self.data.get('time'):
-            try:
-                h, m = map(int, self.data['time'].split(':'))
-                self.time_inp.setTime(QTime(h, m))
-            except:
-                pass
+        if self.data.start is not None:
+            self.time_inp.setTime(QTime(*divmod(self.data.start, 60)))
         layout.addWidget(QLabel('Start time'))
         layout.addWidget(self.time_inp)
 
         self.to_inp = QTimeEdit()
         self.to_inp.setDisplayFormat('HH:mm')
-        if self.data.get('to'):
-            try:
-                h, m = map(int, self.data['to'].split(':'))
-                self.to_inp.setTime(QTime(h, m))
-            except:
-                pass
+        if self.data.end is not None:
+            self.to_inp.setTime(QTime(*divmod(self.data.end, 60)))
         layout.addWidget(QLabel('End time'))
         layout.addWidget(self.to_inp)
 
-        self.desc_inp = QTextEdit(self.data.get('description', ''))
+        self.desc_inp = QTextEdit(self.data.description or '')
         layout.addWidget(QLabel('Description'))
         layout.addWidget(self.desc_inp)
 
         self.pri_inp = QSpinBox()
         self.pri_inp.setRange(0, 10)
-        self.pri_inp.setValue(self.data.get('priority', 0))
+        self.pri_inp.setValue(self.data.priority or 0)
         layout.addWidget(QLabel('Priority (0 low - 10 high)'))
         layout.addWidget(self.pri_inp)
 
+        # Lặp lại
+        self.date = date
+        self.rule = rule
+        self.repeat_box = QWidget()
+        rep = QVBoxLayout(self.repeat_box)
+        rep.setContentsMargins(0, 0, 0, 0)
+        row = QHBoxLayout()
+        self.freq_inp = QComboBox()
+        self.freq_inp.addItems(['Không lặp', 'Hằng ngày', 'Hằng tuần'])
+        self.interval_inp = QSpinBox()
+        self.interval_inp.setRange(1, 365)
+        self.interval_inp.setPrefix('mỗi ')
+        row.addWidget(QLabel('Repeat'))
+        row.addWidget(self.freq_inp)
+        row.addWidget(self.interval_inp)
+        rep.addLayout(row)
+        row = QHBoxLayout()
+        self.weekday_inp = [QCheckBox(name) for name in WEEKDAY_NAMES]
+        for cb in self.weekday_inp:
+            row.addWidget(cb)
+        rep.addLayout(row)
+        row = QHBoxLayout()
+        self.count_inp = QSpinBox()
+        self.count_inp.setRange(0, 9999)
+        self.count_inp.setSpecialValueText('không giới hạn')
+        self.until_chk = QCheckBox('Đến ngày')
+        self.until_inp = QDateEdit()
+        self.until_inp.setDisplayFormat('yyyy-MM-dd')
+        self.until_inp.setCalendarPopup(True)
+        row.addWidget(QLabel('Số lần'))
+        row.addWidget(self.count_inp)
+        row.addWidget(self.until_chk)
+        row.addWidget(self.until_inp)
+        rep.addLayout(row)
+        layout.addWidget(self.repeat_box)
+        self.repeat_box.setVisible(repeat)
+
+        start = QDate.fromString(date, 'yyyy-MM-dd') if date else QDate.currentDate()
+        self.until_inp.setDate(start.addMonths(1))
+        self.weekday_inp[start.dayOfWeek() - 1].setChecked(True)
+        if rule is not None:
+            self.freq_inp.setCurrentIndex(1 if rule.freq == 'daily' else 2)
+            self.interval_inp.setValue(rule.interval)
+            for i, cb in enumerate(self.weekday_inp):
+                cb.setChecked(i in rule.weekdays)
+            self.count_inp.setValue(rule.count or 0)
+            if rule.until:
+                self.until_chk.setChecked(True)
+                self.until_inp.setDate(QDate(rule.until.year, rule.until.month, rule.until.day))
+        self.freq_inp.currentIndexChanged.connect(self._update_repeat)
+        self.until_chk.toggled.connect(self._update_repeat)
+        self._update_repeat()
+
         btns = QHBoxLayout()
         ok = QPushButton('OK')
         cancel = QPushButton('Cancel')
@@ -80,17 +151,54 @@ class TaskDialog(QDialog):
         btns.addWidget(cancel)
         layout.addLayout(btns)
 
+    def _update_repeat(self):
+        freq = self.freq_inp.currentIndex()
+        self.interval_inp.setEnabled(freq > 0)
+        self.interval_inp.setSuffix(' tuần' if freq == 2 else ' ngày')
+        for cb in self.weekday_inp:
+            cb.setEnabled(freq == 2)
+        self.count_inp.setEnabled(freq > 0)
+        self.until_chk.setEnabled(freq > 0)
+        self.until_inp.setEnabled(freq > 0 and self.until_chk.isChecked())
+
+    def get_rule(self):
+        """Rule lặp lại theo lựa chọn trong dialog, None nếu không lặp"""
+        freq = self.freq_inp.currentIndex()
+        if freq == 0 or self.repeat_box.isHidden():
+            return None
+        task = self.get_data()
+        task.id = None
+        task.done = False
+        old = self.rule
+        return Rule(
+            task,
+            'daily' if freq == 1 else 'weekly',
+            old.start if old else self.date,
+            interval=self.interval_inp.value(),
+            weekdays=[i for i, cb in enumerate(self.weekday_inp) if cb.isChecked()],
+            until=self.until_inp.date().toString('yyyy-MM-dd') if self.until_chk.isChecked() else None,
+            count=self.count_inp.value() or None,
+            exceptions=old.exceptions if old else (),
+            overrides=old.overrides if old else None,
+            id=old.id if old else None,
+        )
+
     def get_data(self):
+        """Trả về Task mới, giữ nguyên done/id và các key lạ của task đang sửa"""
         t1 = self.time_inp.time()
         t2 = self.to_inp.time()
-        return {
-            'title': self.title_inp.text().strip(),
-            'time': t1.toString('HH:mm'),
-            'to': t2.toString('HH:mm'),
-            'description': self.desc_inp.toPlainText().strip(),
-            'priority': self.pri_inp.value(),
-            'done': self.data.get('done', False)
-        }
+        task = self.data.copy()
+        task.title = self.title_inp.text().strip()
+        task.start = t1.hour() * 60 + t1.minute()
+        task.end = t2.hour() * 60 + t2.minute()
+        task.description = self.desc_inp.toPlainText().strip()
+        task.priority = self.pri_inp.value()
+        task.done = bool(task.done)
+        if task.extra:
+            # giờ đã nhập lại hợp lệ, bỏ giá trị cũ không parse được
+            for key in ('time', 'to', 'priority', 'done'):
+                task.extra.pop(key, None)
+        return task
 
 # ============================================================
 # MainWindow
@@ -101,7 +209,14 @@ class MainWindow(QMainWindow):
         self.setWindowTitle('Calendar + To-Do')
         self.setWindowIcon(QIcon("icon.ico"))
         self.resize(800, 600)
-        self.data = load_data()
+        # kho task + task lặp lại + lịch sử đã lưu trữ, phần logic không dính tới Qt
+        self.agenda = Agenda(DATA_FILE, load_data())
+        # giữ file dữ liệu suốt lúc app mở để CLI (python -m calendar_core add) không ghi chen vào
+        self.agenda.claim()
+        self.store = self.agenda.store
+        self.rules = self.agenda.rules
+        self.archive = self.agenda.archive
+        startup.mark('data load')
 
         central = QWidget()
         self.setCentralWidget(central)
@@ -114,17 +229,31 @@ class MainWindow(QMainWindow):
 
         # Task list
         right = QVBoxLayout()
-        right.addWidget(QLabel('Tasks'))
-        self.list_widget = QListWidget()
-        self.list_widget.itemDoubleClicked.connect(self.edit_task)
-        right.addWidget(self.list_widget, 1)
 
-        today = QDate.currentDate()
-        fmt = QTextCharFormat()
-        fmt.setBackground(QColor("#4caf50"))
-        fmt.setForeground(QColor("white"))
-        fmt.setFontWeight(QFont.Weight.Bold)
-        self.calendar.setDateTextFormat(today, fmt)
+        # Tìm kiếm (chỉ mục dựng ở lần gõ đầu tiên)
+        self.search_index = None
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText('Tìm task (không cần dấu)...')
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.run_search)
+        right.addWidget(self.search_box)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(160)
+        self.search_results.setVisible(False)
+        self.search_results.itemActivated.connect(self.open_search_hit)
+        self.search_results.itemClicked.connect(self.open_search_hit)
+        right.addWidget(self.search_results)
+
+        right.addWidget(QLabel('Tasks'))
+        self.task_model = TaskListModel(self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.task_model)
+        self.list_view.setItemDelegate(TaskDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSpacing(2)
+        self.list_view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.list_view.doubleClicked.connect(self.edit_task)
+        right.addWidget(self.list_view, 1)
 
         # Buttons
         btn_row = QHBoxLayout()
@@ -133,8 +262,9 @@ class MainWindow(QMainWindow):
         self.btn_delete = QPushButton('Delete')
         self.btn_toggle = QPushButton('Toggle Done')
         self.btn_start = QPushButton('Open Clock')
+        self.btn_sync = QPushButton('Sync Notion')
 
-        for b in (self.btn_add, self.btn_edit, self.btn_delete, self.btn_toggle, self.btn_start):
+        for b in (self.btn_add, self.btn_edit, self.btn_delete, self.btn_toggle, self.btn_start, self.btn_sync):
             b.setStyleSheet("padding: 6px; border-radius: 6px; background-color: #444; color: white;")
 
         btn_row.addWidget(self.btn_add)
@@ -142,6 +272,7 @@ class MainWindow(QMainWindow):
         btn_row.addWidget(self.btn_delete)
         btn_row.addWidget(self.btn_toggle)
         btn_row.addWidget(self.btn_start)
+        btn_row.addWidget(self.btn_sync)
         right.addLayout(btn_row)
 
         # Checkbox
@@ -150,7 +281,7 @@ class MainWindow(QMainWindow):
         self.show_done.stateChanged.connect(self.load_tasks)
         right.addWidget(self.show_done)
 
-        self.auto_clean = QCheckBox('Automatic delete task after 7 days')
+        self.auto_clean = QCheckBox('Archive tasks older than 7 days')
         self.auto_clean.setChecked(True)
         right.addWidget(self.auto_clean)
 
@@ -163,16 +294,53 @@ class MainWindow(QMainWindow):
         self.btn_toggle.clicked.connect(self.toggle_done)
         self.btn_start.clicked.connect(self.open_focus_clock)
 
+        # Đồng bộ hai chiều với Notion (chỉ khi đã cấu hình NOTION_TOKEN/NOTION_DATABASE_ID)
+        self.notion = None
+        if notion_configured():
+            self.notion = TwoWaySyncer(self.store, DATA_FILE, KEEP_DAYS, self)
+            self.notion.synced.connect(self.on_notion_synced)
+            self.notion.failed.connect(self.on_notion_failed)
+            # bấm tay thì tải toàn bộ, để task bị xoá trên Notion cũng bị xoá ở đây
+            self.btn_sync.clicked.connect(lambda: self.notion.sync(full=True))
+            self.notion.schedule()
+        else:
+            self.btn_sync.setVisible(False)
+
         # Shortcut
         shortcut_today = QShortcut(QKeySequence("Space"), self)
         shortcut_today.activated.connect(self.go_today)
+        # bảng metrics ẩn, chỉ mở bằng phím tắt
+        self.metrics_panel = None
+        shortcut_metrics = QShortcut(QKeySequence("Ctrl+Shift+M"), self)
+        shortcut_metrics.activated.connect(self.toggle_metrics_panel)
 
-        # Auto clean
-        if self.auto_clean.isChecked():
-            self.clean_old_tasks()
+        # Heat-map, lưu trữ ngày cũ... làm sau khi cửa sổ đã vẽ xong (finish_startup)
+        self.heatmap = None
+        self._started = False
 
         self.load_tasks()
         self.start_task_watcher()
+        startup.mark('ui build')
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._started:
+            self._started = True
+            startup.mark('first paint')
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Việc không cần cho khung hình đầu tiên, chạy khi event loop rảnh"""
+        if self.auto_clean.isChecked():
+            self.archive_old_tasks()
+        # Heat-map theo tải từng ngày (cập nhật tăng dần qua store.subscribe)
+        self.heatmap = CalendarHeatmap(self.calendar, self.store, self.archive, self.rules)
+        self.load_tasks()
+        startup.mark('housekeeping')
+        # nạp sẵn FocusWindow và âm báo (QtMultimedia) để lần bấm Open Clock đầu tiên không phải chờ
+        focus_window_class().preload()
+        startup.mark('focus import')
+        startup.report()
 
     # ========== core ==========
     def go_today(self):
@@ -183,174 +351,338 @@ class MainWindow(QMainWindow):
     def get_selected_date(self):
         return self.calendar.selectedDate().toString('yyyy-MM-dd')
 
+    def tasks_on(self, date):
+        return self.agenda.tasks_on(date)
+
+    def data_revision(self):
+        return self.agenda.revision()
+
+    @timed("ui.load_tasks")
     def load_tasks(self):
         date = self.get_selected_date()
-        self.list_widget.clear()
-        tasks = self.data.get(date, [])
+        tasks = self.tasks_on(date)
         show_done = self.show_done.isChecked()
-        self._tasks = [t for t in tasks if show_done or not t.get('done')]
-
-        for t in self._tasks:
-            done = t.get('done', False)
-            title = t.get('title', 'No title')
-            desc = t.get('description', '')
-            time = t.get('time', '')
-            to = t.get('to', '')
-
-            item = QListWidgetItem()
-            item.setSizeHint(QSize(0, 60))
-            w = QWidget()
-            layout = QVBoxLayout(w)
-            layout.setContentsMargins(12, 6, 12, 6)
-            layout.setSpacing(2)
-
-            lbl_title = QLabel(title)
-            lbl_title.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
-
-            lbl_info = QLabel(f"{time} → {to}   |   {desc}")
-            lbl_info.setFont(QFont("Segoe UI", 10))
-            lbl_info.setStyleSheet("color: #DCDCDC;")
-
-            if done:
-                w.setStyleSheet("background-color: #e8f5e9; border-radius: 8px;")
-                lbl_title.setStyleSheet("color: #2e7d32; text-decoration: line-through;")
-                lbl_info.setStyleSheet("color: #81c784; text-decoration: line-through;")
-            else:
-                w.setStyleSheet("background-color: #363636; border-radius: 8px;")
-
-            layout.addWidget(lbl_title)
-            layout.addWidget(lbl_info)
-            self.list_widget.addItem(item)
-            self.list_widget.setItemWidget(item, w)
+        rows = [t for t in tasks if show_done or not t.done]
+        self.task_model.set_tasks(rows)
+        metrics.count("ui.rows", len(rows))
+
+    def toggle_metrics_panel(self):
+        if self.metrics_panel is None:
+            from metrics_panel import MetricsPanel
+            self.metrics_panel = MetricsPanel(self)
+        self.metrics_panel.setVisible(not self.metrics_panel.isVisible())
+
+    # ========== search ==========
+    def run_search(self, text):
+        if not text.strip():
+            self.search_results.clear()
+            self.search_results.setVisible(False)
+            return
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.store, self.rules, self.archive)
+        self.search_results.clear()
+        for date, task_id, title in self.search_index.search(text):
+            item = QListWidgetItem(f"{date}   {title or ''}")
+            item.setData(Qt.ItemDataRole.UserRole, (date, task_id))
+            self.search_results.addItem(item)
+        if not self.search_results.count():
+            self.search_results.addItem('Không tìm thấy')
+        self.search_results.setVisible(True)
+
+    def open_search_hit(self, item):
+        hit = item.data(Qt.ItemDataRole.UserRole)
+        if not hit:
+            return
+        date, task_id = hit
+        self.calendar.setSelectedDate(QDate.fromString(date, 'yyyy-MM-dd'))
+        self.load_tasks()
+        for row in range(self.task_model.rowCount()):
+            if self.task_model.task(row).id == task_id:
+                self.list_view.setCurrentIndex(self.task_model.index(row, 0))
+                break
 
     # ========== task actions ==========
-    def save_current(self):
-        save_data(self.data)
+    def on_data_changed(self):
+        self.load_tasks()
+        if self.heatmap is not None:
+            self.heatmap.refresh()
+        self.reschedule_reminders()
+        if self.notion is not None:
+            self.notion.schedule()
+
+    def on_notion_synced(self, pushed, pulled):
+        self.statusBar().showMessage(f'Notion: đẩy lên {pushed}, cập nhật {pulled} task', 5000)
+        self.btn_sync.setToolTip('')
+        # không gọi on_data_changed để khỏi kích thêm một lượt đồng bộ
+        if pulled:
+            self.load_tasks()
+            if self.heatmap is not None:
+                self.heatmap.refresh()
+            self.reschedule_reminders()
+
+    def on_notion_failed(self, err):
+        # giữ thông báo tới lần đồng bộ sau, lỗi đầy đủ xem ở tooltip nút Sync
+        self.statusBar().showMessage(f'Lỗi đồng bộ Notion: {err}')
+        self.btn_sync.setToolTip(err)
 
     def get_selected_task(self):
-        row = self.list_widget.currentRow()
-        if row < 0 or row >= len(self._tasks):
+        """(date, id) của task đang chọn, (None, None) nếu chưa chọn"""
+        task = self.task_model.task(self.list_view.currentIndex().row())
+        if task is None:
             return None, None
-        date = self.get_selected_date()
-        all_tasks = self.data.get(date, [])
-        task = self._tasks[row]
-        idx = all_tasks.index(task)
-        return date, idx
+        return self.get_selected_date(), task.id
+
+    def is_archived(self, task_id):
+        """Task đã lưu trữ chỉ xem được, không sửa/xoá"""
+        if split_occurrence(task_id) or self.store.locate(task_id) is not None:
+            return False
+        QMessageBox.information(self, 'Archived', 'Task đã được lưu trữ, chỉ xem được.')
+        return True
+
+    def warn_conflicts(self, date, task, exclude=None):
+        """
+        Báo mọi task trùng khoảng giờ (kể cả task kéo qua nửa đêm) và hỏi có lưu không.
+        Trả về True nếu người dùng huỷ (không lưu).
+        """
+        index = ConflictIndex.from_days({d: self.tasks_on(d) for d in neighbour_dates(date)})
+        hits = index.conflicts(date, task, exclude=exclude)
+        return self.confirm_conflicts(f"Khoảng {task.time} → {task.to} trùng với:", hits)
+
+    def warn_series_conflicts(self, rule):
+        """
+        warn_conflicts cho cả chuỗi lặp. Chuỗi không giới hạn thì không xét hết được, nên chỉ
+        xét các lần lặp trong SERIES_CONFLICT_DAYS ngày kể từ hôm nay (hoặc từ ngày chuỗi bắt đầu).
+        """
+        first = max(rule.start, datetime.now().date())
+        last = first + timedelta(days=SERIES_CONFLICT_DAYS)
+        occurrences = [(d, rule.make(d)) for d in rule.occurrences(first, last)]
+        if not occurrences:
+            return False
+        # thêm một ngày mỗi đầu để bắt task kéo qua nửa đêm; bỏ các lần lặp cũ của chính chuỗi đang sửa
+        existing = []
+        for k in range(-1, SERIES_CONFLICT_DAYS + 1):
+            d = (first + timedelta(days=k)).strftime("%Y-%m-%d")
+            existing += [(d, t) for t in self.tasks_on(d) if (split_occurrence(t.id) or (None,))[0] != rule.id]
+        hits = [(d, t) for _, _, d, t in bulk_conflicts(existing, occurrences)]
+        task = rule.task
+        return self.confirm_conflicts(
+            f"Các lần lặp {task.time} → {task.to} trong {SERIES_CONFLICT_DAYS} ngày tới trùng với:", hits)
+
+    def confirm_conflicts(self, text, hits):
+        """Hộp thoại liệt kê hits [(date, task), ...]; True nếu người dùng huỷ"""
+        if not hits:
+            return False
+        lines = [f"{d}: <b>{t.title or ''}</b> {t.time} → {t.to}" for d, t in hits[:MAX_CONFLICT_LINES]]
+        if len(hits) > MAX_CONFLICT_LINES:
+            lines.append(f"... và {len(hits) - MAX_CONFLICT_LINES} chỗ khác")
+        msg = QMessageBox(self)
+        msg.setIcon(QMessageBox.Icon.Warning)
+        msg.setWindowTitle("Trùng giờ")
+        msg.setText(text + "<br>" + "<br>".join(lines))
+        save = msg.addButton("Vẫn lưu", QMessageBox.ButtonRole.AcceptRole)
+        msg.addButton(QMessageBox.StandardButton.Cancel)
+        msg.setDefaultButton(QMessageBox.StandardButton.Cancel)
+        msg.exec()
+        return msg.clickedButton() is not save
 
     def add_task(self):
         date = self.get_selected_date()
-        dlg = TaskDialog(self)
+        dlg = TaskDialog(self, date=date)
         if dlg.exec():
             task = dlg.get_data()
-            for existing in self.data.get(date, []):
-                if existing.get("time") == task["time"]:
-                    QMessageBox.warning(self, "Trùng giờ", f"Đã có task khác bắt đầu lúc {task['time']}!")
+            rule = dlg.get_rule()
+            if rule is not None:
+                if self.warn_series_conflicts(rule):
                     return
-            self.data.setdefault(date, []).append(task)
-            self.save_current()
-            self.load_tasks()
+                self.rules.add(rule)
+            else:
+                if self.warn_conflicts(date, task):
+                    return
+                self.store.add(date, task)
+            self.on_data_changed()
+
+    def ask_occurrence_scope(self, action):
+        """Hỏi thao tác trên một lần lặp áp dụng cho lần này hay cả chuỗi: 'one', 'all' hoặc None"""
+        msg = QMessageBox(self)
+        msg.setWindowTitle('Task lặp lại')
+        msg.setText(f'{action} chỉ lần này hay cả chuỗi?')
+        one = msg.addButton('Chỉ lần này', QMessageBox.ButtonRole.AcceptRole)
+        all_ = msg.addButton('Cả chuỗi', QMessageBox.ButtonRole.AcceptRole)
+        msg.addButton(QMessageBox.StandardButton.Cancel)
+        msg.exec()
+        return {one: 'one', all_: 'all'}.get(msg.clickedButton())
 
     def edit_task(self):
-        date, idx = self.get_selected_task()
+        date, task_id = self.get_selected_task()
         if date is None:
             QMessageBox.information(self, 'No selection', 'Chọn task để sửa.')
             return
-        task = self.data[date][idx]
-        dlg = TaskDialog(self, task)
+        if self.is_archived(task_id):
+            return
+        if split_occurrence(task_id):
+            self.edit_occurrence(date, task_id)
+            return
+        task = self.store.get(task_id)
+        dlg = TaskDialog(self, task, date=date, repeat=False)
         if dlg.exec():
             new_task = dlg.get_data()
-            for i, existing in enumerate(self.data.get(date, [])):
-                if i != idx and existing.get("time") == new_task["time"]:
-                    QMessageBox.warning(self, "Trùng giờ", f"Đã có task khác bắt đầu lúc {new_task['time']}!")
+            if self.warn_conflicts(date, new_task, exclude=task_id):
+                return
+            self.store.update(task_id, new_task)
+            self.on_data_changed()
+
+    def edit_occurrence(self, date, task_id):
+        scope = self.ask_occurrence_scope('Sửa')
+        if scope is None:
+            return
+        rule = self.rules.rule_of(task_id)
+        if scope == 'one':
+            dlg = TaskDialog(self, self.rules.get(task_id), date=date, repeat=False)
+            if dlg.exec():
+                new_task = dlg.get_data()
+                if self.warn_conflicts(date, new_task, exclude=task_id):
                     return
-            self.data[date][idx] = new_task
-            self.save_current()
-            self.load_tasks()
+                self.rules.override(task_id, new_task)
+                self.on_data_changed()
+            return
+        dlg = TaskDialog(self, rule.task, date=date, rule=rule)
+        if dlg.exec():
+            new_rule = dlg.get_rule()
+            if new_rule is None:
+                # bỏ lặp: xoá chuỗi, giữ lại đúng lần đang chọn như một task thường
+                task = dlg.get_data()
+                if self.warn_conflicts(date, task, exclude=task_id):
+                    return
+                self.rules.remove(rule.id)
+                self.store.add(date, task)
+            else:
+                if self.warn_series_conflicts(new_rule):
+                    return
+                self.rules.add(new_rule)
+            self.on_data_changed()
 
     def delete_task(self):
-        date, idx = self.get_selected_task()
-        if date is None:
+        date, task_id = self.get_selected_task()
+        if date is None or self.is_archived(task_id):
+            return
+        if split_occurrence(task_id):
+            scope = self.ask_occurrence_scope('Xóa')
+            if scope == 'one':
+                self.rules.skip(task_id)
+            elif scope == 'all':
+                self.rules.remove(self.rules.rule_of(task_id).id)
+            if scope:
+                self.on_data_changed()
             return
         ans = QMessageBox.question(self, 'Confirm', 'Xóa task này?')
         if ans == QMessageBox.StandardButton.Yes:
-            del self.data[date][idx]
-            if not self.data[date]:
-                del self.data[date]
-            self.save_current()
-            self.load_tasks()
+            self.store.delete(task_id)
+            self.on_data_changed()
 
-    def clean_old_tasks(self, days_to_keep=7):
-        import datetime
-        today = datetime.date.today()
-        new_data = {}
-        for date_str, tasks in self.data.items():
-            try:
-                d = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-            except ValueError:
-                continue
-            if (today - d).days <= days_to_keep:
-                new_data[date_str] = tasks
-        self.data = new_data
-        save_data(self.data)
+    def archive_old_tasks(self, days_to_keep=KEEP_DAYS):
+        self.agenda.archive_old(days_to_keep)
 
     def toggle_done(self):
-        date, idx = self.get_selected_task()
-        if date is None:
+        date, task_id = self.get_selected_task()
+        if date is None or self.is_archived(task_id):
             return
-        task = self.data[date][idx]
-        task['done'] = not task.get('done', False)
-        self.save_current()
-        self.load_tasks()
+        if split_occurrence(task_id):
+            self.rules.set_done(task_id, not self.rules.get(task_id).done)
+        else:
+            task = self.store.get(task_id)
+            self.store.set_done(task_id, not task.done)
+        self.on_data_changed()
 
     # ========== Focus integration ==========
+    def make_focus_window(self):
+        """FocusWindow đọc task đang chạy từ self.agenda (dùng chung chỉ mục hôm nay với CLI)"""
+        return focus_window_class()(self.agenda)
+
     def open_focus_clock(self):
         """
-        Mở FocusWindow, truyền provider động (đọc self.data mỗi lần get_tasks()).
+        Mở FocusWindow trên self.agenda, dữ liệu đổi thì chỉ mục tự dựng lại.
         """
 
-        # provider động: FocusWindow sẽ gọi lambda này mỗi lần cần task hôm nay
-        provider = lambda: self.data.get(datetime.now().strftime("%Y-%m-%d"), [])
         if not hasattr(self, "focus_window") or not getattr(self.focus_window, "isVisible", lambda: False)():
-            self.focus_window = FocusWindow(provider)
+            self.focus_window = self.make_focus_window()
             self.focus_window.show()
         else:
             self.focus_window.raise_()
             self.focus_window.activateWindow()
 
     def start_task_watcher(self):
-        self.timer_check = QTimer()
+        self.reminders = ReminderQueue(REMIND_LEAD_MINUTES)
+        self._reminder_key = None
+        self._reminder_due = None
+        self.timer_check = QTimer(self)
+        self.timer_check.setSingleShot(True)
         self.timer_check.timeout.connect(self.check_upcoming_tasks)
-        self.timer_check.start(60 * 1000)
-
+        self.reschedule_reminders()
+
+    def reschedule_reminders(self):
+        """Dựng lại hàng đợi nhắc việc cho hôm nay + ngày mai và hẹn timer tới sự kiện gần nhất"""
+        now = datetime.now()
+        days = [now.strftime("%Y-%m-%d"), (now + timedelta(days=1)).strftime("%Y-%m-%d")]
+        self.reminders.rebuild({d: self.tasks_on(d) for d in days}, now.timestamp())
+        self._reminder_key = (days[0], self.data_revision())
+        self._arm_reminder_timer()
+
+    def _arm_reminder_timer(self):
+        delay = MAX_REMINDER_SLEEP_MS
+        nxt = self.reminders.next_time()
+        if nxt is not None:
+            delay = int(max(0, min(delay, (nxt - time.time()) * 1000)))
+        if metrics.enabled:
+            self._reminder_due = time.monotonic() + delay / 1000
+        self.timer_check.start(delay)
+
+    @timed("sched.check_upcoming_tasks")
     def check_upcoming_tasks(self):
-        today = datetime.now().strftime("%Y-%m-%d")
-        now_time = datetime.now().strftime("%H:%M")
-        tasks = self.data.get(today, [])
-
-        for t in tasks:
-            if not t.get("done") and t.get("time") == now_time:
-                if not self.focus_window.isVisible():
-                    self.notify_start_task(t)
-                return
+        if metrics.enabled:
+            metrics.count("sched.reminder_wakeups")
+            if self._reminder_due is not None:
+                metrics.observe("sched.reminder_latency", max(0.0, time.monotonic() - self._reminder_due) * 1000)
+        # timer có thể nổ trễ (máy ngủ) -> lấy mọi sự kiện đã tới hạn, chỉ báo cái mới nhất.
+        # Lấy trước khi dựng lại: sang ngày mới thì sự kiện cuối ngày hôm qua không còn trong hàng đợi mới
+        due = self.reminders.pop_due(time.time())
+        # sang ngày mới hoặc dữ liệu đổi ở nơi khác -> dựng lại hàng đợi
+        if self._reminder_key != (datetime.now().strftime("%Y-%m-%d"), self.data_revision()):
+            self.reschedule_reminders()
+        starts = [ev for ev in due if ev.kind == "start"]
+        focus_visible = getattr(self, "focus_window", None) is not None and self.focus_window.isVisible()
+        if focus_visible and len(starts) < len(due):
+            self.focus_window.auto_check_task()
+        if starts and not focus_visible:
+            self.notify_start_task(starts[-1].task, starts[-1])
+        self._arm_reminder_timer()
 
-    def notify_start_task(self, task):
+    def notify_start_task(self, task, reminder=None):
         msg = QMessageBox()
-        msg.setWindowTitle("⏰ Đến giờ rồi!")
-        msg.setText(f"Đã đến lúc: <b>{task['title']}</b><br>{task['time']} → {task['to']}<br>{task.get('description','')}")
+        if reminder is not None and reminder.lead:
+            msg.setWindowTitle("⏰ Sắp đến giờ!")
+            msg.setText(f"Còn {reminder.lead} phút: <b>{task.title}</b><br>{task.time} → {task.to}<br>{task.description or ''}")
+        else:
+            msg.setWindowTitle("⏰ Đến giờ rồi!")
+            msg.setText(f"Đã đến lúc: <b>{task.title}</b><br>{task.time} → {task.to}<br>{task.description or ''}")
         msg.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         msg.button(QMessageBox.StandardButton.Yes).setText("Bắt đầu ngay")
         msg.button(QMessageBox.StandardButton.No).setText("Để sau")
+        snooze = None
+        if reminder is not None:
+            snooze = msg.addButton(f"Nhắc lại sau {SNOOZE_MINUTES} phút", QMessageBox.ButtonRole.ActionRole)
         choice = msg.exec()
-        if choice == QMessageBox.StandardButton.Yes:
+        if snooze is not None and msg.clickedButton() is snooze:
+            self.reminders.snooze(reminder, SNOOZE_MINUTES, time.time())
+            self._arm_reminder_timer()
+        elif choice == QMessageBox.StandardButton.Yes:
             self.start_focus_mode(task)
 
     def start_focus_mode(self, task):
         """
         Mở FocusWindow và gọi auto_check một lần để nó bắt ngay (nếu window đã mở).
         """
-        provider = lambda: self.data.get(datetime.now().strftime("%Y-%m-%d"), [])
         if not hasattr(self, "focus_window") or not getattr(self.focus_window, "isVisible", lambda: False)():
-            self.focus_window = FocusWindow(provider)
+            self.focus_window = self.make_focus_window()
             self.focus_window.show()
         # ép FocusWindow kiểm tra ngay (nếu có task đang chạy nó sẽ start countdown)
         try:
@@ -360,6 +692,10 @@ class MainWindow(QMainWindow):
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    startup.mark('qt init')
     w = MainWindow()
+    if w.notion is not None:
+        app.aboutToQuit.connect(w.notion.wait)
+    app.aboutToQuit.connect(flush_writes)
     w.show()
     sys.exit(app.exec())
@@ -1,17 +1,25 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QProgressBar
 from PyQt6.QtCore import Qt, QTimer, QTime, QDate
 from PyQt6.QtGui import QFont
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PyQt6.QtCore import QUrl
-from datetime import datetime, date, time as dt_time
+from pathlib import Path
+from datetime import datetime
+import sys, time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from calendar_core.audio import sound_bank
+from calendar_core.metrics import metrics, timed
+
+CHECK_INTERVAL_MS = 5000
+SOUND_DIR = Path(__file__).resolve().parent / "sounds"
 
 class FocusWindow(QWidget):
-    def __init__(self, task_list_provider):
+    def __init__(self, agenda):
         super().__init__()
 
-        if not callable(task_list_provider):
-            raise ValueError("task_list_provider phải là callable")
-        self.get_tasks = task_list_provider
+        # agenda (calendar_core.agenda.Agenda) lo chỉ mục hôm nay: task hôm qua kéo qua nửa đêm,
+        # dựng lại khi sang ngày hoặc dữ liệu đổi
+        self.agenda = agenda
+        self._check_due = None      # lúc check_timer đáng lẽ nổ (chỉ dùng khi bật đo đạc)
 
         # trạng thái
         self.is_counting = False
@@ -19,9 +27,8 @@ class FocusWindow(QWidget):
         self.remaining_seconds = 0
         self.current_task = None
 
-        # sound
-        self.start_sound_path = "sounds/game-start.mp3"
-        self.end_sound_path = "sounds/success.mp3"
+        # sound: nạp/giải mã một lần cho cả tiến trình, mở lại cửa sổ không nạp lại
+        self.sounds = sound_bank(SOUND_DIR)
 
         self.countdown_timer = QTimer(self)
         self.countdown_timer.timeout.connect(self.update_countdown)
@@ -109,8 +116,8 @@ class FocusWindow(QWidget):
         self.update_datetime()
 
         self.check_timer = QTimer(self)
-        self.check_timer.timeout.connect(self.auto_check_task)
-        self.check_timer.start(5000)
+        self.check_timer.timeout.connect(self._on_check_timer)
+        self.check_timer.start(CHECK_INTERVAL_MS)
         self.auto_check_task()
 
         self.countdown_timer = QTimer(self)
@@ -131,18 +138,14 @@ class FocusWindow(QWidget):
         today = QDate.currentDate().toString("dd/MM/yyyy")
         self.datetime_label.setText(f"{today} | {now}")
 
-    def play_sound(self, file_path):
-        try:
-            audio_output = QAudioOutput()
-            player = QMediaPlayer()
-            player.setAudioOutput(audio_output)
-            player.setSource(QUrl.fromLocalFile(file_path))
-            audio_output.setVolume(1.0)
-            player.play()
-            self._player = player
-            self._audio_output = audio_output
-        except Exception as e:
-            print("Không phát được âm thanh:", e)
+    @staticmethod
+    def preload():
+        """Import QtMultimedia và giải mã âm báo trước, khi app đang rảnh"""
+        sound_bank(SOUND_DIR)
+
+    def play_sound(self, name):
+        """name: "start" hoặc "end" (xem calendar_core.audio.DEFAULT_SOUNDS)"""
+        self.sounds.play(name)
 
     # countdown control
     def start_countdown(self, seconds, title=None, total_seconds=None):
@@ -163,7 +166,7 @@ class FocusWindow(QWidget):
         self._update_progress()
         self.is_counting = True
         self.is_paused = False
-        self.play_sound(self.start_sound_path)
+        self.play_sound("start")
         self.countdown_timer.start(1000)
 
     def stop_countdown(self):
@@ -174,7 +177,7 @@ class FocusWindow(QWidget):
         self.remaining_seconds = 0
         self.current_task = None
         self.timer_label.setText("--:--")
-        self.play_sound(self.end_sound_path)
+        self.play_sound("end")
         self.progress.setValue(100)
 
     def toggle_pause(self):
@@ -219,42 +222,27 @@ class FocusWindow(QWidget):
         else:
             self.progress.setValue(100)
 
+    def _on_check_timer(self):
+        if metrics.enabled:
+            metrics.count("sched.focus_wakeups")
+            if self._check_due is not None:
+                # QTimer thô có thể nổ sớm một chút -> coi như đúng giờ
+                metrics.observe("sched.focus_latency", max(0.0, time.monotonic() - self._check_due) * 1000)
+        self.auto_check_task()
+
+    @timed("sched.auto_check_task")
     def auto_check_task(self):
-        try:
-            tasks = self.get_tasks() or []
-        except Exception as e:
-            print("Lỗi khi gọi provider:", e)
-            tasks = []
-
-        now_dt = datetime.now()
-        active = None
-
-        for task in tasks:
-            t_from = task.get("time")
-            t_to = task.get("to")
-            if not t_from or not t_to:
-                continue
-            try:
-                start_dt = datetime.combine(date.today(), dt_time(int(t_from.split(':')[0]), int(t_from.split(':')[1])))
-                end_dt = datetime.combine(date.today(), dt_time(int(t_to.split(':')[0]), int(t_to.split(':')[1])))
-            except Exception:
-                continue
-
-            if end_dt <= start_dt:
-                # xử lý task kéo sang ngày hôm sau
-                end_dt = end_dt.replace(day=end_dt.day + 1)
-
-            if start_dt <= now_dt < end_dt:
-                active = (task, start_dt, end_dt)
-                break
-
-        if active:
-            task, start_dt, end_dt = active
-            remaining = int((end_dt - now_dt).total_seconds())
-            total_seconds = int((end_dt - start_dt).total_seconds())
-            task_info = dict(task)
-            task_info["duration_seconds"] = total_seconds
-            if (not self.is_counting) or (self.current_task is None) or (self.current_task.get("title") != task_info.get("title")):
+        now = datetime.now()
+        now_sec = now.hour * 3600 + now.minute * 60 + now.second
+        active = self.agenda.active(now)
+
+        if active is not None:
+            task, start, end = active
+            if (not self.is_counting) or (self.current_task is None) or (self.current_task.get("title") != task.title):
+                remaining = end * 60 - now_sec
+                total_seconds = (end - start) * 60
+                task_info = task.to_dict()
+                task_info["duration_seconds"] = total_seconds
                 self.current_task = task_info
                 self.start_countdown(remaining, title=task_info.get("title"), total_seconds=total_seconds)
         else:
@@ -262,6 +250,17 @@ class FocusWindow(QWidget):
                 self.stop_countdown()
             self.timer_label.setText("--:--")
             self.task_label.setText("No Task")
+        self._schedule_next_check(self.agenda.day_index(now), now_sec)
+
+    def _schedule_next_check(self, index, now_sec):
+        # kiểm tra lại đúng lúc có task bắt đầu/kết thúc, nhưng không thưa hơn CHECK_INTERVAL_MS
+        interval = CHECK_INTERVAL_MS
+        boundary = index.next_boundary(now_sec // 60)
+        if boundary is not None:
+            interval = max(0, min(interval, (boundary * 60 - now_sec) * 1000))
+        if metrics.enabled:
+            self._check_due = time.monotonic() + interval / 1000
+        self.check_timer.start(interval)
 
     def closeEvent(self, event):
         try:
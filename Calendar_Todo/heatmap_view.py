@@ -0,0 +1,71 @@
+from PyQt6.QtCore import QDate
+from PyQt6.QtGui import QColor, QFont, QTextCharFormat
+
+from calendar_core.heatmap import LoadMap
+
+# Màu nền theo mức tải 1..4 (0 = để trống, dùng format mặc định)
+LEVEL_COLORS = (None, "#c8e6c9", "#81c784", "#ffb74d", "#e57373")
+
+
+class CalendarHeatmap:
+    """
+    Tô màu các ngày trên QCalendarWidget theo tải (LoadMap).
+    Mỗi tháng chỉ được tô một lần khi lần đầu mở tới; sau mỗi thay đổi chỉ
+    setDateTextFormat đúng các ngày bị ảnh hưởng, nên lật tháng vẫn tức thì.
+    """
+
+    def __init__(self, calendar, store, archive=None, rules=None):
+        self.calendar = calendar
+        self.loads = LoadMap(store, archive, rules)
+        self._painted = set()
+        self._formats = {}
+        self.today_format = QTextCharFormat()
+        self.today_format.setBackground(QColor("#4caf50"))
+        self.today_format.setForeground(QColor("white"))
+        self.today_format.setFontWeight(QFont.Weight.Bold)
+        calendar.currentPageChanged.connect(self.paint_month)
+        self.paint_month(calendar.yearShown(), calendar.monthShown())
+
+    def _format(self, level, all_done):
+        key = (level, all_done)
+        fmt = self._formats.get(key)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            if level:
+                fmt.setBackground(QColor(LEVEL_COLORS[level]))
+                fmt.setForeground(QColor("#9e9e9e" if all_done else "#212121"))
+                fmt.setFontWeight(QFont.Weight.Normal if all_done else QFont.Weight.Bold)
+            self._formats[key] = fmt
+        return fmt
+
+    def _paint_date(self, date):
+        day = self.loads.day(date)
+        qdate = QDate.fromString(date, "yyyy-MM-dd")
+        if not qdate.isValid():
+            return
+        if qdate == QDate.currentDate():
+            fmt = QTextCharFormat(self.today_format)
+        elif day is None:
+            fmt = self._format(0, False)
+        else:
+            fmt = QTextCharFormat(self._format(day.level, day.done == day.count))
+        if day is not None:
+            h, m = divmod(day.minutes, 60)
+            fmt.setToolTip(f"{day.count} task · {h}h{m:02d} · {day.done}/{day.count} xong")
+        self.calendar.setDateTextFormat(qdate, fmt)
+
+    def paint_month(self, year, month):
+        # ô lịch hiện cả vài ngày của tháng trước/sau, tô luôn cả hai tháng đó
+        for y, m in ((year, month), (year - (month == 1), month - 1 or 12), (year + (month == 12), month % 12 + 1)):
+            if (y, m) in self._painted:
+                continue
+            self._painted.add((y, m))
+            for date in self.loads.month(y, m):
+                self._paint_date(date)
+        self.loads.take_dirty()
+        self._paint_date(QDate.currentDate().toString("yyyy-MM-dd"))
+
+    def refresh(self):
+        """Vẽ lại các ngày đã đổi kể từ lần trước"""
+        for date in self.loads.take_dirty():
+            self._paint_date(date)
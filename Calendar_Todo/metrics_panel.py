@@ -0,0 +1,73 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QLabel
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont
+
+from calendar_core.metrics import METRICS_ENV, metrics
+
+REFRESH_MS = 1000
+
+
+class MetricsPanel(QWidget):
+    """
+    Bảng debug ẩn (Ctrl+Shift+M trong MainWindow): bộ đếm và thời gian đo được,
+    tự làm mới mỗi giây khi đang hiện. Dump nối một dòng JSON vào file metrics.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.Tool)
+        self.setWindowTitle('Metrics')
+        self.resize(520, 420)
+        layout = QVBoxLayout(self)
+
+        self.status = QLabel()
+        layout.addWidget(self.status)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont('Consolas', 9))
+        layout.addWidget(self.text, 1)
+
+        btns = QHBoxLayout()
+        self.btn_dump = QPushButton('Dump')
+        self.btn_reset = QPushButton('Reset')
+        self.btn_dump.clicked.connect(self.dump)
+        self.btn_reset.clicked.connect(self.reset)
+        btns.addWidget(self.btn_dump)
+        btns.addWidget(self.btn_reset)
+        layout.addLayout(btns)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        if not metrics.enabled:
+            self.status.setText(f'Đo đạc đang tắt, chạy lại với {METRICS_ENV}=1 (hoặc {METRICS_ENV}=file.jsonl)')
+            self.btn_dump.setEnabled(False)
+            self.btn_reset.setEnabled(False)
+            return
+        snap = metrics.snapshot()
+        self.status.setText(f"Uptime {snap['uptime_s']:.0f}s")
+        lines = [f"{'timer':<30}{'count':>7}{'mean ms':>10}{'max ms':>10}{'last ms':>10}"]
+        for name, t in snap['timers'].items():
+            lines.append(f"{name:<30}{t['count']:>7}{t['mean_ms']:>10.2f}{t['max_ms']:>10.2f}{t['last_ms']:>10.2f}")
+        lines.append('')
+        lines.append(f"{'counter':<30}{'value':>14}")
+        for name, value in snap['counters'].items():
+            lines.append(f"{name:<30}{value:>14}")
+        self.text.setPlainText('\n'.join(lines))
+
+    def dump(self):
+        path = metrics.dump()
+        self.status.setText(f'Đã ghi vào {path}')
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
@@ -0,0 +1,104 @@
+import os
+from datetime import datetime, timedelta
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from calendar_core.two_way_sync import LinkState, PartialSync, apply_result, exchange, plan_sync
+
+# Cấu hình qua biến môi trường, để trống thì không đồng bộ
+NOTION_TOKEN = os.environ.get("NOTION_TOKEN", "")
+NOTION_DATABASE_ID = os.environ.get("NOTION_DATABASE_ID", "")
+NOTION_API_URL = os.environ.get("NOTION_API_URL", "https://api.notion.com/v1")
+# Gom các thay đổi liên tiếp (bấm Toggle nhiều lần) thành một lượt đồng bộ
+SYNC_DEBOUNCE_MS = 3000
+
+
+def notion_configured():
+    return bool(NOTION_TOKEN and NOTION_DATABASE_ID)
+
+
+class _ExchangeThread(QThread):
+    done = pyqtSignal(object)
+    # kết quả dở dang (phải apply để giữ link trang đã tạo), thông báo lỗi
+    failed = pyqtSignal(object, str)
+
+    def __init__(self, client, plan, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.plan = plan
+
+    def run(self):
+        try:
+            result = exchange(self.client, NOTION_DATABASE_ID, self.plan)
+        except PartialSync as e:
+            self.failed.emit(e.result, str(e.error))
+            return
+        self.done.emit(result)
+
+
+class TwoWaySyncer(QObject):
+    """
+    Đồng bộ hai chiều data.json <-> Notion.
+    Dò thay đổi local và ghi kết quả vào kho trên thread giao diện, phần gọi mạng chạy ở QThread.
+    schedule() gom nhiều thay đổi liên tiếp; đang có lượt chạy thì lượt mới đợi nó xong.
+    Mỗi ngày một lượt (lượt đầu tiên sau FULL_SYNC_EVERY) tự chuyển thành full
+    để xoá ở local các task mà trang đã bị xoá trên Notion.
+    """
+    synced = pyqtSignal(int, int)   # số thay đổi đẩy lên, số task local đã đổi
+    failed = pyqtSignal(str)
+
+    def __init__(self, store, data_file, keep_days=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.state = LinkState.beside(data_file)
+        self.keep_days = keep_days
+        # requests chỉ cần khi bật đồng bộ
+        from calendar_core.notion_api import NotionClient
+        self.client = NotionClient(NOTION_TOKEN, NOTION_API_URL)
+        self._thread = None
+        self._again = False
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self.sync)
+
+    def schedule(self):
+        self._debounce.start(SYNC_DEBOUNCE_MS)
+
+    def busy(self):
+        return self._thread is not None
+
+    def sync(self, full=False):
+        if self._thread is not None:
+            self._again = True
+            return
+        full = full or self.state.needs_full()
+        cutoff = None
+        if self.keep_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.keep_days)).strftime("%Y-%m-%d")
+        plan = plan_sync(self.store, self.state, full, cutoff)
+        self._thread = _ExchangeThread(self.client, plan, self)
+        self._thread.done.connect(self._on_done)
+        self._thread.failed.connect(self._on_failed)
+        self._thread.finished.connect(self._on_finished)
+        self._thread.start()
+
+    def wait(self, msecs=5000):
+        if self._thread is not None:
+            self._thread.wait(msecs)
+
+    def _on_done(self, result):
+        changed = apply_result(self.store, self.state, result)
+        self.synced.emit(result.pushed, changed)
+
+    def _on_failed(self, result, error):
+        changed = apply_result(self.store, self.state, result)
+        if changed:
+            self.synced.emit(result.pushed, changed)
+        self.failed.emit(error)
+
+    def _on_finished(self):
+        self._thread.deleteLater()
+        self._thread = None
+        if self._again:
+            self._again = False
+            self.schedule()
@@ -0,0 +1,95 @@
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRectF, QSize
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPalette, QPen
+
+TaskRole = Qt.ItemDataRole.UserRole + 1
+
+ROW_HEIGHT = 60
+
+
+class TaskListModel(QAbstractListModel):
+    """Danh sách task của ngày đang chọn (chỉ giữ tham chiếu tới list task, không tạo widget)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tasks = []
+
+    def set_tasks(self, tasks):
+        self.beginResetModel()
+        self._tasks = tasks
+        self.endResetModel()
+
+    def task(self, row):
+        if 0 <= row < len(self._tasks):
+            return self._tasks[row]
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        t = self._tasks[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return t.title or 'No title'
+        if role == TaskRole:
+            return t
+        return None
+
+
+class TaskDelegate(QStyledItemDelegate):
+    """Vẽ trực tiếp một dòng task: tiêu đề, giờ bắt đầu → kết thúc, mô tả, gạch ngang nếu đã xong"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont("Segoe UI", 12, QFont.Weight.Bold)
+        self.info_font = QFont("Segoe UI", 10)
+        self.done_title_font = QFont(self.title_font)
+        self.done_title_font.setStrikeOut(True)
+        self.done_info_font = QFont(self.info_font)
+        self.done_info_font.setStrikeOut(True)
+        self.title_height = QFontMetrics(self.title_font).height()
+        self.info_height = QFontMetrics(self.info_font).height()
+
+        self.bg = QColor("#363636")
+        self.bg_done = QColor("#e8f5e9")
+        self.title_color_done = QColor("#2e7d32")
+        self.info_color = QColor("#DCDCDC")
+        self.info_color_done = QColor("#81c784")
+        self.selected_pen = QPen(QColor("#4caf50"), 2)
+
+    def sizeHint(self, option, index):
+        return QSize(0, ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        t = index.data(TaskRole)
+        if t is None:
+            return
+        done = bool(t.done)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = QRectF(option.rect).adjusted(1, 1, -1, -1)
+        painter.setPen(self.selected_pen if option.state & QStyle.StateFlag.State_Selected else Qt.PenStyle.NoPen)
+        painter.setBrush(self.bg_done if done else self.bg)
+        painter.drawRoundedRect(rect, 8, 8)
+
+        text_rect = option.rect.adjusted(12, 6, -12, -6)
+        width = text_rect.width()
+
+        title = t.title or 'No title'
+        painter.setFont(self.done_title_font if done else self.title_font)
+        painter.setPen(self.title_color_done if done else option.palette.color(QPalette.ColorRole.WindowText))
+        title = painter.fontMetrics().elidedText(title, Qt.TextElideMode.ElideRight, width)
+        painter.drawText(text_rect.x(), text_rect.y(), width, self.title_height,
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, title)
+
+        desc = (t.description or '').replace('\n', ' ')
+        info = f"{t.time} → {t.to}   |   {desc}"
+        painter.setFont(self.done_info_font if done else self.info_font)
+        painter.setPen(self.info_color_done if done else self.info_color)
+        info = painter.fontMetrics().elidedText(info, Qt.TextElideMode.ElideRight, width)
+        painter.drawText(text_rect.x(), text_rect.y() + self.title_height + 2, width, self.info_height,
+                         Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, info)
+        painter.restore()
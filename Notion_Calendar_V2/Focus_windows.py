@@ -2,32 +2,36 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayo
     QMainWindow
 from PyQt6.QtCore import Qt, QTimer, QTime, QDate
 from PyQt6.QtGui import QFont
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PyQt6.QtCore import QUrl
-from datetime import datetime, date, time as dt_time
 from pathlib import Path
-import sys, json
+import sys, time
 
-from notion_calendar_sync import save_tasks_to_json
+from notion_calendar_sync import DATA_FILE
+from sync_worker import NotionSyncer
 
-DATA_FILE = Path(__file__).parent / "tasks.json"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from calendar_core.storage import open_store
+from calendar_core.agenda import Agenda
+from calendar_core.writer import flush_writes
+from calendar_core.audio import sound_bank
+from calendar_core.metrics import metrics, timed
+
+SOUND_DIR = Path(__file__).resolve().parent / "sounds"
 
 def load_data():
-    save_tasks_to_json()
+    """Mở kho task đã lưu (tasks.json), việc đồng bộ Notion chạy nền sau đó"""
+    return open_store(DATA_FILE)
 
-    if not DATA_FILE.exists():
-        return {}
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        try:
-            return json.load(f)
-        except:
-            return {}
+CHECK_INTERVAL_MS = 5000
 
 class FocusWindow(QWidget):
     def __init__(self):
         super().__init__()
 
-        self.data = load_data()
+        # chung logic với Calendar_Todo: task đang chạy lấy từ chỉ mục hôm nay của Agenda
+        self.agenda = Agenda(DATA_FILE, load_data())
+        self.agenda.claim()
+        self.store = self.agenda.store
+        self._check_due = None      # lúc check_timer đáng lẽ nổ (chỉ dùng khi bật đo đạc)
 
         # trạng thái
         self.is_counting = False
@@ -35,9 +39,8 @@ class FocusWindow(QWidget):
         self.remaining_seconds = 0
         self.current_task = None
 
-        # sound
-        # self.start_sound_path = "sounds/game-start.mp3"
-        # self.end_sound_path = "sounds/success.mp3"
+        # sound (dùng chung, nạp một lần)
+        self.sounds = sound_bank(SOUND_DIR)
 
         self.countdown_timer = QTimer(self)
         self.countdown_timer.timeout.connect(self._on_countdown_tick)
@@ -72,6 +75,13 @@ class FocusWindow(QWidget):
         self.datetime_label.setFont(QFont("Arial", 10))
         inner.addWidget(self.datetime_label, alignment=Qt.AlignmentFlag.AlignCenter)
 
+        # hiện khi không tải được từ Notion (đang dùng dữ liệu cũ)
+        self.offline_label = QLabel("● offline")
+        self.offline_label.setFont(QFont("Arial", 9))
+        self.offline_label.setStyleSheet("QLabel { color: #ffb74d; }")
+        self.offline_label.setVisible(False)
+        inner.addWidget(self.offline_label, alignment=Qt.AlignmentFlag.AlignCenter)
+
         self.task_label = QLabel("No Task")
         self.task_label.setFont(QFont("Arial", 13, QFont.Weight.Bold))
         inner.addWidget(self.task_label, alignment=Qt.AlignmentFlag.AlignCenter)
@@ -125,10 +135,17 @@ class FocusWindow(QWidget):
         self.update_datetime()
 
         self.check_timer = QTimer(self)
-        self.check_timer.timeout.connect(self.auto_check_task)
-        self.check_timer.start(5000)
+        self.check_timer.timeout.connect(self._on_check_timer)
+        self.check_timer.start(CHECK_INTERVAL_MS)
         self.auto_check_task()
 
+        # đồng bộ Notion chạy nền, cửa sổ hiện ngay với dữ liệu đã lưu
+        self.syncer = NotionSyncer(self.store, self)
+        self.syncer.synced.connect(self._on_synced)
+        self.syncer.failed.connect(self._on_sync_failed)
+        self.syncer.offline_changed.connect(self.offline_label.setVisible)
+        self.syncer.refresh()
+
         # events
         self.refresh.clicked.connect(self.reload)
         self.close_btn.clicked.connect(QApplication.quit)
@@ -141,29 +158,25 @@ class FocusWindow(QWidget):
             child.setMouseTracking(True)
 
     def reload(self):
-        self.data = load_data()
+        self.syncer.refresh()
 
-        print(self.data)
+    def _on_synced(self, changed):
+        self.offline_label.setToolTip("")
+        if changed:
+            self.auto_check_task()
 
-        self.auto_check_task()
+    def _on_sync_failed(self, err):
+        print("Lỗi đồng bộ Notion:", err)
+        self.offline_label.setToolTip(f"Không kết nối được Notion, đang dùng dữ liệu đã lưu\n{err}")
 
     def update_datetime(self):
         now = QTime.currentTime().toString("HH:mm:ss")
         today = QDate.currentDate().toString("dd/MM/yyyy")
         self.datetime_label.setText(f"{today} | {now}")
 
-    def play_sound(self, file_path):
-        try:
-            audio_output = QAudioOutput()
-            player = QMediaPlayer()
-            player.setAudioOutput(audio_output)
-            player.setSource(QUrl.fromLocalFile(file_path))
-            audio_output.setVolume(1.0)
-            player.play()
-            self._player = player
-            self._audio_output = audio_output
-        except Exception as e:
-            print("Không phát được âm thanh:", e)
+    def play_sound(self, name):
+        """name: "start" hoặc "end" (xem calendar_core.audio.DEFAULT_SOUNDS)"""
+        self.sounds.play(name)
 
     # countdown control
     def start_countdown(self, seconds, title=None, total_seconds=None):
@@ -229,41 +242,33 @@ class FocusWindow(QWidget):
         else:
             self.progress.setValue(100)
 
-    def auto_check_task(self):
-        today = datetime.now().strftime("%Y-%m-%d")
-        tasks = self.data.get(today, [])
-        now_dt = datetime.now()
-        active = None
-
-        for task in tasks:
-            t_from = task.get("time")
-            t_to = task.get("to")
-            if not t_from or not t_to:
-                continue
-            try:
-                start_dt = datetime.combine(date.today(), dt_time(int(t_from.split(':')[0]), int(t_from.split(':')[1])))
-                end_dt = datetime.combine(date.today(), dt_time(int(t_to.split(':')[0]), int(t_to.split(':')[1])))
-            except Exception:
-                continue
-
-            if end_dt <= start_dt:
-                end_dt = end_dt.replace(day=end_dt.day + 1)
+    def _on_check_timer(self):
+        if metrics.enabled:
+            metrics.count("sched.focus_wakeups")
+            if self._check_due is not None:
+                # QTimer thô có thể nổ sớm một chút -> coi như đúng giờ
+                metrics.observe("sched.focus_latency", max(0.0, time.monotonic() - self._check_due) * 1000)
+        self.auto_check_task()
 
-            if start_dt <= now_dt < end_dt:
-                active = (task, start_dt, end_dt)
-                break
+    @timed("sched.auto_check_task")
+    def auto_check_task(self):
+        now = time.localtime()
+        now_sec = now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
+        # chỉ mục hôm nay kèm task hôm qua kéo qua nửa đêm, chỉ dựng lại khi sang ngày/dữ liệu đổi
+        index = self.agenda.day_index()
+        i = index.active_index(now_sec // 60)
 
-        if active:
-            task, start_dt, end_dt = active
-            remaining = int((end_dt - now_dt).total_seconds())
-            total_seconds = int((end_dt - start_dt).total_seconds())
-            task_info = dict(task)
-            task_info["duration_seconds"] = total_seconds
+        if i >= 0:
+            task = index.tasks[i]
+            remaining = index.ends[i] * 60 - now_sec
 
             # luôn reset countdown nếu remaining hoặc task info khác
             if (not self.is_counting) or (self.current_task is None) \
-                    or (self.current_task.get("title") != task_info.get("title")) \
+                    or (self.current_task.get("title") != task.title) \
                     or (self.remaining_seconds != remaining):
+                total_seconds = (index.ends[i] - index.starts[i]) * 60
+                task_info = task.to_dict()
+                task_info["duration_seconds"] = total_seconds
                 self.current_task = task_info
                 self.start_countdown(remaining, title=task_info.get("title"), total_seconds=total_seconds)
         else:
@@ -271,6 +276,17 @@ class FocusWindow(QWidget):
                 self.stop_countdown()
             self.timer_label.setText("--:--")
             self.task_label.setText("No Task")
+        self._schedule_next_check(index, now_sec)
+
+    def _schedule_next_check(self, index, now_sec):
+        # kiểm tra lại đúng lúc có task bắt đầu/kết thúc, nhưng không thưa hơn CHECK_INTERVAL_MS
+        interval = CHECK_INTERVAL_MS
+        boundary = index.next_boundary(now_sec // 60)
+        if boundary is not None:
+            interval = max(0, min(interval, (boundary * 60 - now_sec) * 1000))
+        if metrics.enabled:
+            self._check_due = time.monotonic() + interval / 1000
+        self.check_timer.start(interval)
 
     # kéo thả
     def mousePressEvent(self, e):
@@ -334,5 +350,7 @@ class FocusWindow(QWidget):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = FocusWindow()
+    app.aboutToQuit.connect(window.syncer.wait)
+    app.aboutToQuit.connect(flush_writes)
     window.show()
     sys.exit(app.exec())
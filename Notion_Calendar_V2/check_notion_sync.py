@@ -0,0 +1,147 @@
+"""
+Kiểm tra đồng bộ Notion trên server giả (mock_notion.py), không cần token/mạng.
+
+    python check_notion_sync.py
+
+- tải toàn bộ: đi hết các lượt has_more/next_cursor, đủ số task trong cửa sổ
+- tải delta: gửi đúng mốc last_edited_time lần trước, áp dụng trang sửa, dời mốc lên
+- trang sửa cùng phút với mốc vẫn được tải lại (on_or_after), trang dời ra ngoài cửa sổ bị xoá ở local
+- hai chiều: lỗi giữa lượt sau khi đã tạo trang thì lần sau không tạo trùng trang/task
+- hai chiều: trang bị xoá trên Notion chỉ lộ ra ở lượt full, lượt đó xoá task ở local
+"""
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import requests
+
+import notion_calendar_sync as sync
+from calendar_core.notion_api import NotionClient
+from calendar_core.notion_sync import SyncState
+from calendar_core.storage import open_store
+from calendar_core.task_model import Task
+from calendar_core.two_way_sync import LinkState, sync_two_way
+from mock_notion import MockNotion, seed, serve, write_props
+
+PAGES = 250
+
+
+def queries(mock):
+    return [body for method, path, body in mock.log if method == "POST" and path.endswith("/query")]
+
+
+def check(name, ok):
+    print(("OK   " if ok else "FAIL ") + name)
+    if not ok:
+        raise SystemExit(1)
+
+
+def titles(mock):
+    return sorted(p["properties"]["Name"]["title"][0]["plain_text"]
+                  for p in mock.pages.values() if not p["archived"])
+
+
+def check_two_way(tmp):
+    mock = MockNotion()
+    server, url = serve(mock)
+    client = NotionClient("test", url, sleep=lambda s: None)
+    data = tmp / "two_way" / "data.json"
+    data.parent.mkdir()
+    store = open_store(data)
+    state = LinkState.beside(data)
+    day = datetime.now().strftime("%Y-%m-%d")
+    # thay đổi được xét theo ngày: A (hôm nay) được tạo trước khi tới lượt PATCH B (ngày mai)
+    later = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    try:
+        b = store.add(later, Task("B", 600, 660, "", 0, False))
+        sync_two_way(store, state, client, "db")
+        # A mới (tạo trang), B đã liên kết và vừa sửa (PATCH) -> PATCH lỗi sau khi A đã được tạo
+        store.add(day, Task("A", 540, 570, "", 0, False))
+        t = store.get(b).copy()
+        t.title = "B2"
+        store.update(b, t)
+        mock.fail("PATCH", "/v1/pages", 400)
+        try:
+            sync_two_way(store, state, client, "db")
+            check("lỗi PATCH được báo ra", False)
+        except requests.HTTPError:
+            pass
+        sync_two_way(store, state, client, "db")
+        local = sorted(t.title for d in store.dates() for t in store.day(d))
+        check("lỗi giữa lượt: không tạo trùng trang", titles(mock) == ["A", "B2"])
+        check("lỗi giữa lượt: không kéo trùng task về", local == ["A", "B2"])
+
+        # xoá trang B trên Notion: query không trả về trang đã xoá nên lượt delta không thấy
+        mock.edit_page(state.links[b]["page"], archived=True)
+        sync_two_way(store, state, client, "db")
+        check("lượt delta chưa biết trang đã bị xoá", store.locate(b) is not None)
+        check("chưa tới hạn lượt full", not state.needs_full())
+        check("sau một ngày thì tới hạn lượt full",
+              state.needs_full(datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=1, minutes=1)))
+        sync_two_way(store, state, client, "db", full=True)
+        check("lượt full xoá task có trang đã bị xoá", store.locate(b) is None and b not in state.links)
+        check("lượt full ghi lại mốc last_full", not state.needs_full())
+    finally:
+        server.shutdown()
+        store.close()
+
+
+def main():
+    mock = MockNotion()
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    seed(mock, PAGES, today)
+    server, url = serve(mock)
+    tmp = Path(tempfile.mkdtemp(prefix="notion_check_"))
+    sync.NOTION_API_URL, sync.NOTION_TOKEN, sync.DATABASE_ID = url, "test", "db"
+    sync.DATA_FILE = tmp / "tasks.json"
+    sync.SYNC_TTL_SECONDS = 0
+    sync._client = None
+    try:
+        # ---------- lần đầu: tải toàn bộ cửa sổ qua nhiều lượt ----------
+        sync.save_tasks_to_json(full=True)
+        sent = queries(mock)
+        check(f"tải toàn bộ {PAGES} trang trong {len(sent)} lượt query",
+              len(sent) == -(-PAGES // 100) and "start_cursor" not in sent[0]
+              and all(b.get("start_cursor") for b in sent[1:]))
+        store = open_store(sync.DATA_FILE)
+        check("kho có đủ task", sum(len(store.day(d)) for d in store.dates()) == PAGES)
+        store.close()
+        state = SyncState.beside(sync.DATA_FILE)
+        high = max(p["last_edited_time"] for p in mock.pages.values())
+        check("mốc last_edited = last_edited_time lớn nhất", state.last_edited == high)
+
+        # ---------- delta: chỉ trang sửa sau mốc ----------
+        ids = sorted(mock.pages)
+        mock.edit_page(ids[0], write_props(title="Đã đổi tên"))
+        later = (today + timedelta(days=30)).isoformat(timespec="minutes")
+        mock.edit_page(ids[1], write_props(start=later))
+        del mock.log[:]
+        sync.save_tasks_to_json()
+        sent = queries(mock)
+        check("delta gửi filter last_edited_time on_or_after mốc cũ",
+              len(sent) == 1 and sent[0]["filter"]["last_edited_time"] == {"on_or_after": high})
+        store = open_store(sync.DATA_FILE)
+        check("trang sửa tên được cập nhật", store.get(ids[0]).title == "Đã đổi tên")
+        check("trang dời ra ngoài cửa sổ bị xoá", store.locate(ids[1]) is None)
+        store.close()
+        state = SyncState.beside(sync.DATA_FILE)
+        check("mốc dời lên lần sửa mới nhất", state.last_edited == mock.pages[ids[1]]["last_edited_time"])
+
+        # ---------- sửa cùng phút với mốc vẫn không bị mất ----------
+        mock.now -= timedelta(minutes=1)
+        mock.edit_page(ids[2], write_props(title="Cùng phút"))
+        sync.save_tasks_to_json()
+        store = open_store(sync.DATA_FILE)
+        check("trang sửa trùng phút với mốc vẫn được tải", store.get(ids[2]).title == "Cùng phút")
+        store.close()
+
+        check_two_way(tmp)
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("Tất cả kiểm tra đều qua")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Server Notion giả lập (chỉ dùng thư viện chuẩn) để chạy đồng bộ mà không cần token/mạng.
+Hỗ trợ đúng phần API app dùng: query database (filter Date / last_edited_time, sort,
+phân trang has_more/next_cursor), GET schema database, tạo và sửa trang.
+
+    python mock_notion.py --port 8765 --pages 250
+    NOTION_API_URL=http://127.0.0.1:8765/v1 NOTION_TOKEN=x NOTION_DATABASE_ID=db python Main.py
+
+Xem check_notion_sync.py để chạy các kiểm tra đồng bộ trên server này.
+"""
+import argparse
+import itertools
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_PAGE_SIZE = 100
+# last_edited_time của Notion được làm tròn theo phút
+EPOCH = datetime(2026, 1, 1)
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+
+def _read_props(props):
+    """Property dạng ghi (như app gửi lên) -> dạng đọc (như Notion trả về)"""
+    out = {}
+    for name, value in props.items():
+        if "title" in value:
+            text = "".join(part.get("text", {}).get("content", part.get("plain_text", ""))
+                           for part in value["title"])
+            out[name] = {"type": "title", "title": [{"type": "text", "plain_text": text,
+                                                      "text": {"content": text}}]}
+        elif "date" in value:
+            out[name] = {"type": "date", "date": value["date"]}
+        elif "checkbox" in value:
+            out[name] = {"type": "checkbox", "checkbox": bool(value["checkbox"])}
+    return out
+
+
+def write_props(title=None, start=None, end=None, done=None):
+    """Property dạng ghi cho một trang; start/end là chuỗi ISO đầy đủ"""
+    props = {}
+    if title is not None:
+        props["Name"] = {"title": [{"text": {"content": title}}]}
+    if start is not None:
+        props["Date"] = {"date": {"start": start, "end": end}}
+    if done is not None:
+        props["Done"] = {"checkbox": done}
+    return props
+
+
+class MockNotion:
+    """
+    Dữ liệu và hành vi của server giả: self.pages (id -> trang), self.log các request đã nhận.
+    Mỗi lần sửa trang đồng hồ tiến một phút (tick() để tự dời), fail() để cài lỗi cho request tới.
+    """
+
+    def __init__(self, has_done=True):
+        self.pages = {}
+        self.log = []
+        self.has_done = has_done
+        self.now = EPOCH
+        self._faults = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # ---------- dữ liệu ----------
+    def tick(self, minutes=1):
+        self.now += timedelta(minutes=minutes)
+        return _iso(self.now)
+
+    def add_page(self, title, start, end=None, done=None, page_id=None):
+        page_id = page_id or f"page-{next(self._ids):06d}"
+        self.pages[page_id] = {
+            "object": "page", "id": page_id, "archived": False, "in_trash": False,
+            "last_edited_time": self.tick(),
+            "properties": _read_props(write_props(title, start, end, False if done is None and self.has_done else done)),
+        }
+        return self.pages[page_id]
+
+    def edit_page(self, page_id, properties=None, archived=None):
+        page = self.pages[page_id]
+        page["properties"].update(_read_props(properties or {}))
+        if archived is not None:
+            page["archived"] = archived
+        page["last_edited_time"] = self.tick()
+        return page
+
+    def fail(self, method, path, status, after=False, times=1):
+        """
+        times request tới khớp method + đầu path (vd "POST", "/v1/pages") nhận status.
+        after=True: vẫn thực hiện request rồi mới trả lỗi (như server đã ghi nhưng response bị mất).
+        """
+        self._faults.append([method, path, status, after, times])
+
+    def _fault(self, method, path):
+        with self._lock:
+            for f in self._faults:
+                if f[0] == method and path.startswith(f[1]) and f[4] > 0:
+                    f[4] -= 1
+                    return f[2], f[3]
+        return None, False
+
+    # ---------- query ----------
+    def _matches(self, page, flt):
+        if not flt:
+            return True
+        if "and" in flt:
+            return all(self._matches(page, f) for f in flt["and"])
+        if "or" in flt:
+            return any(self._matches(page, f) for f in flt["or"])
+        if flt.get("timestamp") == "last_edited_time":
+            cond = flt["last_edited_time"]
+            edited = page["last_edited_time"]
+            return all({"on_or_after": edited >= v, "after": edited > v,
+                        "on_or_before": edited <= v, "before": edited < v}[k] for k, v in cond.items())
+        prop = page["properties"].get(flt.get("property"), {})
+        if "date" in flt:
+            start = (prop.get("date") or {}).get("start")
+            if not start:
+                return False
+            day = start[:10]
+            return all({"equals": day == v, "on_or_after": day >= v, "on_or_before": day <= v,
+                        "after": day > v, "before": day < v}[k] for k, v in flt["date"].items())
+        return True
+
+    def query(self, body):
+        pages = [p for p in self.pages.values() if not p["archived"] and self._matches(p, body.get("filter"))]
+        for s in reversed(body.get("sorts", [])):
+            key = s.get("timestamp") or s.get("property")
+            pages.sort(key=lambda p: (p.get(key) or "", p["id"]), reverse=s.get("direction") == "descending")
+        size = min(int(body.get("page_size", MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        start = 0
+        cursor = body.get("start_cursor")
+        if cursor:
+            # cursor là id của trang đầu tiên ở lượt sau, như Notion
+            start = next((i for i, p in enumerate(pages) if p["id"] == cursor), len(pages))
+        chunk = pages[start:start + size]
+        more = start + size < len(pages)
+        return {"object": "list", "results": chunk, "has_more": more,
+                "next_cursor": pages[start + size]["id"] if more else None}
+
+    def schema(self):
+        props = {"Name": {"type": "title"}, "Date": {"type": "date"}}
+        if self.has_done:
+            props["Done"] = {"type": "checkbox"}
+        return {"object": "database", "properties": props}
+
+    # ---------- HTTP ----------
+    def handle(self, method, path, body):
+        """(status, JSON trả về) cho một request"""
+        self.log.append((method, path, body))
+        status, after = self._fault(method, path)
+        if status and not after:
+            return status, {"object": "error", "status": status}
+        parts = path.strip("/").split("/")[1:]     # bỏ "v1"
+        if parts[:1] == ["databases"] and parts[2:] == ["query"] and method == "POST":
+            out = 200, self.query(body)
+        elif parts[:1] == ["databases"] and len(parts) == 2 and method == "GET":
+            out = 200, self.schema()
+        elif parts == ["pages"] and method == "POST":
+            page = self.add_page(None, None)
+            page["properties"] = _read_props(body.get("properties", {}))
+            out = 200, page
+        elif parts[:1] == ["pages"] and len(parts) == 2 and method == "PATCH":
+            if parts[1] not in self.pages:
+                out = 404, {"object": "error", "status": 404}
+            else:
+                out = 200, self.edit_page(parts[1], body.get("properties"), body.get("archived"))
+        else:
+            out = 404, {"object": "error", "status": 404}
+        if status:
+            return status, {"object": "error", "status": status}
+        return out
+
+
+def _handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _serve(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            status, obj = mock.handle(method, self.path, body)
+            out = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def do_PATCH(self):
+            self._serve("PATCH")
+
+    return Handler
+
+
+def serve(mock, port=0):
+    """Chạy server nền cho mock, trả về (server, base_url dạng http://127.0.0.1:<port>/v1)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(mock))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def seed(mock, pages, today=None, days=7):
+    """Thêm pages trang rải đều trong days ngày tính từ hôm nay"""
+    today = today or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(pages):
+        start = today + timedelta(days=i % days, hours=6 + i % 16)
+        mock.add_page(f"Task {i}", start.isoformat(timespec="minutes"),
+                      (start + timedelta(minutes=45)).isoformat(timespec="minutes"))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Server Notion giả lập")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--pages", type=int, default=250, help="số trang có sẵn (rải trong 7 ngày tới)")
+    ap.add_argument("--no-done", action="store_true", help="database không có checkbox Done")
+    args = ap.parse_args()
+    mock = MockNotion(has_done=not args.no_done)
+    seed(mock, args.pages)
+    server, url = serve(mock, args.port)
+    print(f"Mock Notion: NOTION_API_URL={url} ({args.pages} trang), Ctrl+C để dừng")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
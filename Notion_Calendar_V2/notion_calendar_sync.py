@@ -1,75 +1,78 @@
-import json
+import os
+import sys
 import requests
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from calendar_core.storage import open_store
+from calendar_core.notion_api import NotionClient
+from calendar_core.notion_sync import SyncState, date_window, iter_pages, page_to_task, slim_page, sync_database
+
 # --- Cấu hình ---
 NOTION_TOKEN = ""  # Thay bằng token của bạn
 DATABASE_ID = ""  # Thay bằng database ID của bạn
 DATA_FILE = Path(__file__).parent / "tasks.json"
+# đổi sang server giả lập khi test, vd NOTION_API_URL=http://127.0.0.1:8765/v1
+NOTION_API_URL = os.environ.get("NOTION_API_URL", "https://api.notion.com/v1")
+# Số ngày giữ ở local: từ hôm qua tới 7 ngày tới
+SYNC_PAST_DAYS = 1
+SYNC_FUTURE_DAYS = 7
+# Trong khoảng này (giây) sau lần tải gần nhất thì dùng luôn tasks.json, không gọi Notion
+SYNC_TTL_SECONDS = 120
+
+_client = None
+
+def get_client():
+    """Client Notion dùng chung cho cả tiến trình (một session, giữ kết nối)"""
+    global _client
+    if _client is None:
+        _client = NotionClient(NOTION_TOKEN, NOTION_API_URL)
+    return _client
+
+def query_database(body):
+    """Một lần POST /databases/{id}/query, parse dần từng trang (chỉ giữ các property cần dùng)"""
+    return get_client().query_database_stream(DATABASE_ID, body, slim_page)
+
+def sync_window():
+    return date_window(past_days=SYNC_PAST_DAYS, future_days=SYNC_FUTURE_DAYS)
 
 def fetch_notion_tasks():
-    """Lấy danh sách task từ Notion Calendar"""
-    url = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-
-    res = requests.post(url, headers=headers)
-    res.raise_for_status()
-    data = res.json()
-
+    """Lấy danh sách task hôm nay từ Notion Calendar (đọc hết mọi trang kết quả)"""
     today_str = datetime.now().strftime("%Y-%m-%d")
     tasks_today = []
 
-    for page in data.get("results", []):
-        props = page.get("properties", {})
-
-        title = ""
-        if "Name" in props and props["Name"]["title"]:
-            title = props["Name"]["title"][0]["plain_text"]
-
-        # property Date (kiểu Date) trong Notion
-        date_info = props.get("Date", {}).get("date")
-        if not date_info:
-            continue
-
-        start = date_info.get("start")
-        end = date_info.get("end")
-
+    body = {"filter": {"property": "Date", "date": {"equals": today_str}}}
+    for page in iter_pages(query_database, body):
+        item = page_to_task(page)
         # lọc task hôm nay
-        if start and start.startswith(today_str):
-            start_time = datetime.fromisoformat(start).strftime("%H:%M")
-            end_time = datetime.fromisoformat(end).strftime("%H:%M") if end else "00:00"
-
-            tasks_today.append({
-                "id": page.get("id"),
-                "title": title or "Untitled",
-                "time": start_time,
-                "to": end_time
-            })
+        if item and item[0] == today_str:
+            tasks_today.append(item[1])
 
     return today_str, tasks_today
 
 
-def save_tasks_to_json():
-    """Ghi dữ liệu vào data.json"""
-    today, tasks = fetch_notion_tasks()
-
-    # load file cũ (nếu có)
-    if DATA_FILE.exists():
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            all_data = json.load(f)
-    else:
-        all_data = {}
- 
-    all_data[today] = tasks
-
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ Đã lưu {len(tasks)} task vào {DATA_FILE.name}")
-
+def save_tasks_to_json(store=None, full=False):
+    """
+    Đồng bộ Notion vào kho (tasks.json hoặc SQLite), chia task theo từng ngày trong sync_window().
+    Chỉ tải các trang sửa sau lần đồng bộ trước (mốc lưu ở tasks.sync.json),
+    full=True (hoặc khi sang ngày mới) để tải lại cả cửa sổ và dọn các task đã bị xoá trên Notion.
+    Mất mạng thì giữ nguyên dữ liệu cũ, trả về None.
+    """
+    own = store is None
+    store = store or open_store(DATA_FILE)
+    state = SyncState.beside(DATA_FILE)
+    try:
+        changed = sync_database(store, query_database, state, full=full, window=sync_window(),
+                                ttl=SYNC_TTL_SECONDS)
+    except requests.RequestException as e:
+        print(f"⚠️ Offline, dùng dữ liệu cũ trong {DATA_FILE.name}: {e}")
+        return None
+    finally:
+        if own:
+            # tự mở kho thì phải tự đóng, không thì journal còn nằm trong writer nền
+            store.close()
+
+    print(f"✅ Đã cập nhật {changed} task vào {DATA_FILE.name}")
+    return changed
@@ -0,0 +1,85 @@
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from notion_calendar_sync import DATA_FILE, SYNC_TTL_SECONDS, query_database, sync_window
+
+from calendar_core.notion_sync import SyncState, fetch_changes, apply_changes
+
+
+class _FetchThread(QThread):
+    """Chỉ gọi Notion ở thread riêng; kết quả gửi về thread giao diện qua signal"""
+    fetched = pyqtSignal(object, object, object)    # pages, since, window
+    failed = pyqtSignal(str)
+
+    def __init__(self, since, window, parent=None):
+        super().__init__(parent)
+        self.since = since
+        self.window = window
+
+    def run(self):
+        try:
+            pages = fetch_changes(query_database, self.since, self.window)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.fetched.emit(pages, self.since, self.window)
+
+
+class NotionSyncer(QObject):
+    """
+    Đồng bộ Notion chạy nền cho FocusWindow.
+    refresh() trả về ngay; khi đang có một lượt đồng bộ thì các lần bấm thêm bị gộp vào lượt đó,
+    dữ liệu còn mới (chưa quá SYNC_TTL_SECONDS) thì không gọi mạng.
+    Trang tải về được gộp vào kho trên thread giao diện (kho không dùng chung giữa các thread).
+    Tải lỗi thì giữ dữ liệu cũ và báo offline qua offline_changed.
+    """
+    synced = pyqtSignal(int)    # số task đã thay đổi
+    failed = pyqtSignal(str)
+    offline_changed = pyqtSignal(bool)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.state = SyncState.beside(DATA_FILE)
+        self._thread = None
+        self.offline = False
+
+    def busy(self):
+        return self._thread is not None
+
+    def refresh(self, full=False):
+        """Bắt đầu một lượt đồng bộ, trả về False nếu đã có lượt đang chạy hoặc dữ liệu còn mới"""
+        if self._thread is not None:
+            return False
+        window = sync_window()
+        since = self.state.since(window, full)
+        if since is not None and not self.offline and self.state.is_fresh(SYNC_TTL_SECONDS):
+            return False
+        self._thread = _FetchThread(since, window, self)
+        self._thread.fetched.connect(self._on_fetched)
+        self._thread.failed.connect(self._on_failed)
+        self._thread.finished.connect(self._on_finished)
+        self._thread.start()
+        return True
+
+    def wait(self, msecs=5000):
+        if self._thread is not None:
+            self._thread.wait(msecs)
+
+    def _on_fetched(self, pages, since, window):
+        changed = apply_changes(self.store, pages, self.state, since, window)
+        print(f"✅ Đã cập nhật {changed} task vào {DATA_FILE.name}")
+        self._set_offline(False)
+        self.synced.emit(changed)
+
+    def _on_failed(self, err):
+        self._set_offline(True)
+        self.failed.emit(err)
+
+    def _set_offline(self, offline):
+        if offline != self.offline:
+            self.offline = offline
+            self.offline_changed.emit(offline)
+
+    def _on_finished(self):
+        self._thread.deleteLater()
+        self._thread = None
@@ -0,0 +1,121 @@
+"""
+So sánh parse response query của Notion: json.loads cả body (cách cũ)
+với ResultStream đọc dần từng trang (calendar_core.notion_stream).
+
+    python benchmarks/bench_notion_parse.py                 # tự sinh 10k trang
+    python benchmarks/bench_notion_parse.py --pages 50000
+    python benchmarks/bench_notion_parse.py --fixture response.json   # response đã ghi lại
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from calendar_core.notion_stream import ResultStream
+from calendar_core.notion_sync import page_to_task, slim_page
+
+CHUNK = 64 * 1024
+
+
+def fake_page(i, rnd):
+    """Một trang giống trang thật: ngoài Name/Date còn nhiều property và metadata không dùng tới"""
+    start = datetime(2025, 1, 1, 6) + timedelta(days=rnd.randrange(365), minutes=15 * rnd.randrange(60))
+    user = {"object": "user", "id": f"u-{rnd.randrange(10)}"}
+    text = lambda s: [{"type": "text", "text": {"content": s, "link": None}, "plain_text": s, "href": None,
+                       "annotations": {"bold": False, "italic": False, "strikethrough": False,
+                                       "underline": False, "code": False, "color": "default"}}]
+    return {
+        "object": "page", "id": f"page-{i:08d}", "created_time": "2025-01-01T00:00:00.000Z",
+        "last_edited_time": "2025-06-01T00:00:00.000Z", "created_by": user, "last_edited_by": user,
+        "cover": None, "icon": None, "parent": {"type": "database_id", "database_id": "db"},
+        "archived": False, "in_trash": False, "url": f"https://www.notion.so/page-{i:08d}",
+        "public_url": None,
+        "properties": {
+            "Name": {"id": "title", "type": "title", "title": text(f"Task số {i}")},
+            "Date": {"id": "d", "type": "date", "date": {
+                "start": start.isoformat(), "end": (start + timedelta(minutes=45)).isoformat(), "time_zone": None}},
+            "Status": {"id": "s", "type": "status", "status": {"id": "x", "name": "In progress", "color": "blue"}},
+            "Tags": {"id": "t", "type": "multi_select", "multi_select": [
+                {"id": str(k), "name": f"tag{k}", "color": "gray"} for k in range(rnd.randrange(4))]},
+            "Notes": {"id": "n", "type": "rich_text", "rich_text": text("ghi chú " * rnd.randrange(5, 40))},
+            "Assignee": {"id": "a", "type": "people", "people": [user]},
+        },
+    }
+
+
+def write_fixture(path, pages, seed=1):
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"object": "list", "results": [')
+        for i in range(pages):
+            if i:
+                f.write(",")
+            json.dump(fake_page(i, rnd), f, ensure_ascii=False)
+        f.write('], "next_cursor": null, "has_more": false, "type": "page_or_database"}')
+
+
+def read_chunks(path):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def parse_full(path):
+    # như res.json(): đọc cả body rồi mới duyệt
+    data = json.loads(Path(path).read_bytes())
+    return [page_to_task(p) for p in data.get("results", [])]
+
+
+def parse_stream(path):
+    return [page_to_task(p) for p in ResultStream(read_chunks(path), slim_page)]
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    t = time.perf_counter()
+    out = fn(path)
+    elapsed = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--pages", type=int, default=10000)
+    ap.add_argument("--fixture", help="file JSON response query đã ghi lại (bỏ qua --pages)")
+    args = ap.parse_args()
+
+    tmp = None
+    path = args.fixture
+    if not path:
+        tmp = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        tmp.close()
+        path = tmp.name
+        write_fixture(path, args.pages)
+    size = Path(path).stat().st_size
+
+    try:
+        full, t_full, m_full = measure(parse_full, path)
+        stream, t_stream, m_stream = measure(parse_stream, path)
+    finally:
+        if tmp:
+            Path(path).unlink()
+    assert full == stream, "hai cách parse cho kết quả khác nhau"
+
+    print(f"{len(full)} trang, {size / 1e6:.1f} MB")
+    print(f"{'json.loads':<12} {t_full * 1000:8.0f} ms   peak {m_full / 1e6:7.1f} MB")
+    print(f"{'stream':<12} {t_stream * 1000:8.0f} ms   peak {m_stream / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
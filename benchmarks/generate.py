@@ -0,0 +1,84 @@
+"""
+Sinh dữ liệu giả cho benchmark, cùng schema data.json (Calendar_Todo) / tasks.json (Notion_Calendar_V2).
+
+    python -m benchmarks.generate out/data.json --days 3650 --per-day 50
+    python -m benchmarks.generate out/tasks.json --size month --notion
+"""
+import argparse
+import json
+import random
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+# Tên -> (số ngày, số task mỗi ngày), từ 1 ngày x 5 task tới 10 năm x 50 task
+SIZES = {
+    "tiny": (1, 5),
+    "month": (30, 10),
+    "year": (365, 20),
+    "decade": (3650, 50),
+}
+
+_WORDS = ("học", "toán", "lý", "hoá", "tiếng Anh", "gym", "chạy bộ", "họp", "nhóm", "đọc sách",
+          "code", "review", "báo cáo", "dọn nhà", "nấu ăn", "gọi điện", "mua sắm", "thiết kế")
+
+
+def dataset_dates(days, today=None, future_days=None):
+    """
+    Các ngày "YYYY-MM-DD" của bộ dữ liệu: phần lớn trong quá khứ (để có việc cho
+    archive), hôm nay luôn có mặt, cộng thêm vài ngày tới.
+    """
+    today = today or date.today()
+    if future_days is None:
+        future_days = min(days // 10, 30)
+    first = today - timedelta(days=days - 1 - future_days)
+    return [(first + timedelta(days=i)).isoformat() for i in range(days)]
+
+
+def make_task(rnd, notion=False):
+    start = rnd.randrange(6 * 60, 23 * 60, 5)
+    end = (start + rnd.choice((15, 30, 45, 60, 90, 120))) % (24 * 60)
+    t = {
+        "title": " ".join(rnd.sample(_WORDS, rnd.randint(1, 3))).capitalize(),
+        "time": f"{start // 60:02d}:{start % 60:02d}",
+        "to": f"{end // 60:02d}:{end % 60:02d}",
+        "id": str(uuid.UUID(int=rnd.getrandbits(128))),
+    }
+    if not notion:
+        t["description"] = " ".join(rnd.choice(_WORDS) for _ in range(rnd.randrange(0, 12)))
+        t["priority"] = rnd.randrange(11)
+        t["done"] = rnd.random() < 0.4
+    return t
+
+
+def make_calendar(days, per_day, today=None, seed=1, notion=False):
+    """{date: [task, ...]} với per_day task mỗi ngày (cố định theo seed)"""
+    rnd = random.Random(seed)
+    return {d: [make_task(rnd, notion) for _ in range(per_day)] for d in dataset_dates(days, today)}
+
+
+def write_dataset(path, days, per_day, today=None, seed=1, notion=False):
+    """Ghi bộ dữ liệu ra path, trả về số task"""
+    data = make_calendar(days, per_day, today, seed, notion)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return days * per_day
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sinh data.json / tasks.json giả")
+    ap.add_argument("out")
+    ap.add_argument("--size", choices=SIZES, help="cỡ có sẵn (ghi đè --days/--per-day)")
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--per-day", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--notion", action="store_true", help="task kiểu tasks.json (chỉ title/time/to/id)")
+    args = ap.parse_args()
+    days, per_day = SIZES[args.size] if args.size else (args.days, args.per_day)
+    n = write_dataset(args.out, days, per_day, seed=args.seed, notion=args.notion)
+    print(f"✅ {n} task ({days} ngày x {per_day}) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
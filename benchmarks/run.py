@@ -0,0 +1,249 @@
+"""
+Benchmark headless (QT_QPA_PLATFORM=offscreen) các đường nóng của Calendar_Todo / Notion_Calendar_V2
+trên dữ liệu giả (benchmarks.generate), in kết quả dạng JSON để so sánh giữa các lần chạy.
+
+    python -m benchmarks.run                                  # tiny, month, year
+    python -m benchmarks.run --sizes decade --repeat 3 --out bench.json
+    python -m benchmarks.run --fixture response.json          # response query Notion đã ghi lại
+    python -m benchmarks.run --compare old.json new.json      # so sánh hai lần chạy
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# không đồng bộ Notion, không in profiler khởi động / không đo đạc trong lúc đo
+for _key in ("NOTION_TOKEN", "NOTION_DATABASE_ID", "CALENDAR_PROFILE", "CALENDAR_METRICS"):
+    os.environ.pop(_key, None)
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "Calendar_Todo")]
+
+from benchmarks.bench_notion_parse import measure, parse_full, parse_stream, write_fixture
+from benchmarks.generate import SIZES, write_dataset
+from calendar_core.archive import Archive
+from calendar_core.storage import open_store
+from calendar_core.task_model import Task
+from calendar_core.writer import flush_writes
+
+DEFAULT_SIZES = ("tiny", "month", "year")
+NOTION_PAGES = 2000
+
+
+def timed(fn, repeat, setup=None):
+    """Thời gian (ms) của repeat lần gọi fn; có setup thì fn(setup()) và setup không bị tính giờ"""
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t = time.perf_counter()
+        fn(arg) if setup else fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return samples
+
+
+class Results:
+    def __init__(self):
+        self.items = []
+
+    def add(self, name, dataset, samples, **extra):
+        item = {"name": name, "dataset": dataset, "repeat": len(samples),
+                "min_ms": round(min(samples), 3), "median_ms": round(statistics.median(samples), 3),
+                "mean_ms": round(statistics.fmean(samples), 3), "max_ms": round(max(samples), 3)}
+        item.update(extra)
+        self.items.append(item)
+        print(f"  {name:<38} {item['median_ms']:10.2f} ms", file=sys.stderr)
+
+
+# ============================================================
+# Các bài đo
+# ============================================================
+def bench_store(results, label, fresh, repeat):
+    today = datetime.now().strftime("%Y-%m-%d")
+    results.add("load_data", label, timed(open_store, repeat, fresh))
+
+    store = open_store(fresh())
+    task = Task("bench", 8 * 60, 9 * 60)
+    results.add("save_data.add", label, timed(lambda: store.add(today, task.copy()), repeat))
+    flush_writes()
+    results.add("save_data.add+flush", label,
+                timed(lambda: (store.add(today, task.copy()), flush_writes()), repeat))
+    results.add("save_data.compact+flush", label,
+                timed(lambda: (store.journal.compact(store.data), flush_writes()), repeat))
+
+    # clean_old_tasks() cũ giờ là MainWindow.archive_old_tasks() -> Archive.roll
+    cutoff = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    def fresh_archive():
+        path = fresh()
+        return open_store(path), Archive.beside(path)
+
+    results.add("clean_old_tasks", label,
+                timed(lambda sa: (sa[1].roll(sa[0], cutoff), flush_writes()), repeat, fresh_archive))
+
+
+def bench_main_window(results, label, fresh, repeat):
+    import Main
+    from PyQt6.QtCore import QDate
+
+    def make_window(path):
+        Main.DATA_FILE = path
+        return Main.MainWindow()
+
+    windows = []
+    results.add("MainWindow.__init__", label, timed(lambda p: windows.append(make_window(p)), repeat, fresh))
+    w = windows.pop()
+    for other in windows:
+        other.deleteLater()
+    # không mở hộp thoại nhắc việc (exec() chặn) trong lúc đo
+    w.notify_start_task = lambda *a, **k: None
+    w.calendar.setSelectedDate(QDate.currentDate())
+
+    results.add("MainWindow.load_tasks", label, timed(w.load_tasks, repeat))
+    results.add("MainWindow.check_upcoming_tasks", label, timed(w.check_upcoming_tasks, repeat))
+    results.add("MainWindow.reschedule_reminders", label, timed(w.reschedule_reminders, repeat))
+
+    # FocusWindow: lần đầu sau khi dữ liệu đổi (dựng chỉ mục) và các lần sau (chỉ bisect)
+    fw = Main.focus_window_class()(w.agenda)
+    results.add("FocusWindow.auto_check_task", label, timed(fw.auto_check_task, repeat))
+
+    def bump():
+        # như vừa có thay đổi trong kho: agenda dựng lại chỉ mục ở lần kiểm tra kế tiếp
+        w.store.revision += 1
+    results.add("FocusWindow.auto_check_task.rebuild", label,
+                timed(lambda _: fw.auto_check_task(), repeat, bump))
+    fw.close()
+    fw.deleteLater()
+    w.deleteLater()
+
+
+def bench_cli(results, label, fresh, repeat):
+    """Thời gian chạy trọn một lệnh agenda (python -m calendar_core), gồm cả khởi động interpreter"""
+    path = fresh()
+    for command in ("now", "today"):
+        cmd = [sys.executable, "-m", "calendar_core", "--data", str(path), command]
+        results.add(f"cli.{command}", label,
+                    timed(lambda: subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, check=True), repeat))
+
+
+def bench_dataset(results, size, repeat, workdir, with_ui):
+    days, per_day = SIZES[size]
+    label = f"{size} ({days}x{per_day})"
+    print(f"{label}", file=sys.stderr)
+    src = workdir / f"{size}.json"
+    write_dataset(src, days, per_day)
+
+    def fresh():
+        d = Path(tempfile.mkdtemp(dir=workdir))
+        path = d / "data.json"
+        shutil.copy(src, path)
+        return path
+
+    bench_store(results, label, fresh, repeat)
+    bench_cli(results, label, fresh, repeat)
+    if with_ui:
+        bench_main_window(results, label, fresh, repeat)
+
+
+def bench_python(results, repeat):
+    """Mốc so sánh cho cli.*: interpreter trống"""
+    results.add("python.startup", "-", timed(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), repeat))
+
+
+def bench_notion(results, fixtures, repeat, workdir):
+    """Parser của fetch_notion_tasks(): json.loads cả body so với ResultStream"""
+    if not fixtures:
+        path = workdir / "notion.json"
+        write_fixture(path, NOTION_PAGES)
+        fixtures = [path]
+    for path in fixtures:
+        label = Path(path).name
+        print(f"notion: {label}", file=sys.stderr)
+        for name, fn in (("fetch_notion_tasks.parse_full", parse_full),
+                         ("fetch_notion_tasks.parse_stream", parse_stream)):
+            pages, _, peak = measure(fn, path)
+            results.add(name, label, timed(lambda: fn(path), repeat),
+                        pages=len(pages), peak_mb=round(peak / 1e6, 2))
+
+
+# ============================================================
+def environment():
+    try:
+        from PyQt6.QtCore import QT_VERSION_STR
+    except ImportError:
+        QT_VERSION_STR = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"at": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "qt": QT_VERSION_STR,
+            "platform": platform.platform(), "qpa": os.environ.get("QT_QPA_PLATFORM")}
+
+
+def compare(old_path, new_path):
+    """In tỉ lệ median mới/cũ của các bài đo có ở cả hai file"""
+    old = {(r["name"], r["dataset"]): r for r in json.loads(Path(old_path).read_text())["results"]}
+    new = json.loads(Path(new_path).read_text())["results"]
+    for r in new:
+        before = old.get((r["name"], r["dataset"]))
+        if before is None or not before["median_ms"]:
+            continue
+        ratio = r["median_ms"] / before["median_ms"]
+        flag = "  <-- chậm hơn" if ratio > 1.2 else ""
+        print(f"{r['name']:<38} {r['dataset']:<22} {before['median_ms']:10.2f} -> {r['median_ms']:10.2f} ms"
+              f"  x{ratio:.2f}{flag}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark headless các đường nóng")
+    ap.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                    help=f"các cỡ dữ liệu, cách nhau dấu phẩy ({', '.join(SIZES)})")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--fixture", action="append", default=[],
+                    help="response query Notion đã ghi lại (dùng nhiều lần được)")
+    ap.add_argument("--no-ui", action="store_true", help="bỏ các bài đo cần Qt (MainWindow/FocusWindow)")
+    ap.add_argument("--out", help="ghi JSON ra file thay vì stdout")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="so sánh hai file kết quả rồi thoát")
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    app = None
+    if not args.no_ui:
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication([])
+
+    results = Results()
+    workdir = Path(tempfile.mkdtemp(prefix="calendar-bench-"))
+    try:
+        bench_python(results, args.repeat)
+        for size in filter(None, args.sizes.split(",")):
+            bench_dataset(results, size.strip(), args.repeat, workdir, app is not None)
+        bench_notion(results, args.fixture, args.repeat, workdir)
+    finally:
+        flush_writes()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"env": environment(), "repeat": args.repeat, "results": results.items}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
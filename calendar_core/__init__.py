@@ -0,0 +1 @@
+"""Phần lõi dùng chung (không phụ thuộc Qt) cho Calendar_Todo và Notion_Calendar_V2."""
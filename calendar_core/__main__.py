@@ -0,0 +1,229 @@
+"""
+Agenda trên dòng lệnh, không cần Qt (khởi động nhanh, dùng được trong status bar/script).
+
+    python -m calendar_core today [--date 2026-10-20] [--json]
+    python -m calendar_core now [--json]
+    python -m calendar_core add "Họp nhóm" 14:00 15:30 [--date tomorrow] [--desc ...] [--priority 3]
+
+Tuỳ chọn chung: --data FILE (mặc định Calendar_Todo/data.json, hoặc biến môi trường CALENDAR_DATA).
+add từ chối khi trùng giờ hoặc khi app lịch đang mở cùng file, --force để vẫn thêm.
+"""
+import json
+import os
+import sys
+from types import SimpleNamespace
+from datetime import date as Date, datetime, timedelta
+from pathlib import Path
+
+from calendar_core.agenda import Agenda
+from calendar_core.task_model import MINUTES_PER_DAY, Task, format_hhmm, parse_hhmm
+
+DATA_ENV = "CALENDAR_DATA"
+DEFAULT_DATA = Path(__file__).resolve().parent.parent / "Calendar_Todo" / "data.json"
+# add không ghi giờ kết thúc thì task dài chừng này
+DEFAULT_MINUTES = 60
+WEEKDAY_NAMES = ("T2", "T3", "T4", "T5", "T6", "T7", "CN")
+
+
+class UsageError(Exception):
+    pass
+
+
+def parse_date(value):
+    """"YYYY-MM-DD", "today" hoặc "tomorrow" -> "YYYY-MM-DD" """
+    today = datetime.now()
+    if value in (None, "today"):
+        return today.strftime("%Y-%m-%d")
+    if value == "tomorrow":
+        return (today + timedelta(days=1)).strftime("%Y-%m-%d")
+    try:
+        # fromisoformat thay cho strptime: strptime kéo theo locale/calendar, chậm lúc khởi động
+        return Date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"ngày không hợp lệ: {value}") from None
+
+
+def parse_time(value):
+    minutes = parse_hhmm(value)
+    if minutes is None:
+        raise ValueError(f"giờ không hợp lệ (HH:mm): {value}")
+    return minutes
+
+
+def clock(minutes):
+    # task hôm qua kéo qua nửa đêm có start âm, task kéo sang mai có end > 24h
+    return format_hhmm(minutes % MINUTES_PER_DAY)
+
+
+def same_task(a, b):
+    # task lặp lại/đã lưu trữ/SQLite được dựng lại mỗi lần hỏi -> so theo id;
+    # task cũ chưa có id (kho mở chỉ đọc không gán) thì chỉ còn so được theo object
+    return a is b or (a is not None and a.id is not None and a.id == b.id)
+
+
+def task_json(task, date=None, **extra):
+    d = task.to_dict()
+    if date:
+        d["date"] = date
+    d.update(extra)
+    return d
+
+
+# ============================================================
+# Lệnh
+# ============================================================
+def cmd_today(agenda, args):
+    date = args.date or parse_date(None)
+    tasks = sorted(agenda.tasks_on(date), key=lambda t: (t.start is None, t.start or 0))
+    if args.json:
+        print(json.dumps([task_json(t, date) for t in tasks], ensure_ascii=False, indent=2))
+        return 0
+    active = None
+    if date == datetime.now().strftime("%Y-%m-%d"):
+        hit = agenda.active()
+        active = hit[0] if hit else None
+    weekday = WEEKDAY_NAMES[Date.fromisoformat(date).weekday()]
+    print(f"{date} ({weekday}) · {len(tasks)} task")
+    for t in tasks:
+        mark = ">" if same_task(active, t) else " "
+        done = "[x]" if t.done else "[ ]"
+        print(f"{mark} {t.time or '--:--'}-{t.to or '--:--'} {done} {t.title or ''}")
+    return 0
+
+
+def cmd_now(agenda, args):
+    now = datetime.now()
+    minute = now.hour * 60 + now.minute
+    hit = agenda.active(now)
+    upcoming = agenda.upcoming(now, limit=1)
+    nxt = upcoming[0] if upcoming else None
+    if args.json:
+        out = {"at": now.isoformat(timespec="minutes"), "active": None, "next": None}
+        if hit:
+            task, start, end = hit
+            out["active"] = task_json(task, remaining_minutes=end - minute)
+        if nxt:
+            out["next"] = task_json(nxt[1], in_minutes=nxt[0] - minute)
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+        return 0
+    if hit:
+        task, start, end = hit
+        print(f"> {task.title or ''}  {clock(start)}-{clock(end)} (còn {end - minute} phút)")
+    else:
+        print("Rảnh")
+    if nxt:
+        print(f"  tiếp: {clock(nxt[0])} {nxt[1].title or ''} (sau {nxt[0] - minute} phút)")
+    elif not hit:
+        print("  hết task hôm nay")
+    return 0
+
+
+def cmd_add(agenda, args):
+    date = args.date or parse_date(None)
+    if agenda.in_use() and not args.force:
+        print("App lịch đang mở file dữ liệu này, thêm task trong app (hoặc --force).", file=sys.stderr)
+        return 1
+    end = args.end if args.end is not None else (args.start + DEFAULT_MINUTES) % MINUTES_PER_DAY
+    task = Task(args.title.strip(), args.start, end, args.desc, args.priority, False)
+    if not args.force:
+        from calendar_core.conflicts import ConflictIndex, neighbour_dates
+        index = ConflictIndex.from_days({d: agenda.tasks_on(d) for d in neighbour_dates(date)})
+        hits = index.conflicts(date, task)
+        if hits:
+            print(f"Khoảng {task.time} → {task.to} trùng với:", file=sys.stderr)
+            for d, t in hits:
+                print(f"  {d}: {t.title or ''} {t.time} → {t.to}", file=sys.stderr)
+            print("Không thêm (dùng --force để vẫn thêm).", file=sys.stderr)
+            return 1
+    task_id = agenda.add(date, task)
+    print(f"{date} {task.time}-{task.to} {task.title}  ({task_id})")
+    return 0
+
+
+# ============================================================
+# Tham số dòng lệnh: tự parse vì argparse (kéo theo gettext/locale/shutil) chiếm ~1/4 thời gian khởi động
+# ============================================================
+GLOBAL_OPTIONS = {"--data": str}
+# lệnh -> (hàm, tham số vị trí [(tên, kiểu, bắt buộc)], tuỳ chọn {tên: kiểu, None là cờ bật/tắt})
+COMMANDS = {
+    "today": (cmd_today, (), {"--date": parse_date, "--json": None}),
+    "now": (cmd_now, (), {"--json": None}),
+    "add": (cmd_add, (("title", str, True), ("start", parse_time, True), ("end", parse_time, False)),
+            {"--date": parse_date, "--desc": str, "--priority": int, "--force": None}),
+}
+DEFAULTS = {"date": None, "json": False, "force": False, "desc": "", "priority": 0}
+# lệnh chỉ xem: mở kho chỉ đọc, không đụng tới file dữ liệu mà GUI đang giữ
+READ_ONLY = (cmd_today, cmd_now)
+
+
+def _convert(kind, value, name):
+    try:
+        return kind(value)
+    except ValueError as e:
+        raise UsageError(f"{name}: {e}") from None
+
+
+def parse_args(argv):
+    """argv -> SimpleNamespace(run=hàm lệnh, data=..., các tham số của lệnh)"""
+    values = dict(DEFAULTS, data=os.environ.get(DATA_ENV) or str(DEFAULT_DATA))
+    run, positional, options, given = None, (), GLOBAL_OPTIONS, []
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-h", "--help"):
+            raise UsageError(None)
+        if arg.startswith("--"):
+            name, has_value, value = arg.partition("=")
+            if name not in options:
+                raise UsageError(f"tuỳ chọn không hợp lệ: {name}")
+            kind = options[name]
+            if kind is None:
+                values[name[2:]] = True
+                continue
+            if not has_value:
+                value = next(args, None)
+                if value is None:
+                    raise UsageError(f"{name} cần một giá trị")
+            values[name[2:]] = _convert(kind, value, name)
+        elif run is None:
+            if arg not in COMMANDS:
+                raise UsageError(f"lệnh không hợp lệ: {arg}")
+            run, positional, extra = COMMANDS[arg]
+            options = {**GLOBAL_OPTIONS, **extra}
+        else:
+            given.append(arg)
+    if run is None:
+        raise UsageError("thiếu lệnh (today, now, add)")
+    if len(given) > len(positional):
+        raise UsageError(f"thừa tham số: {' '.join(given[len(positional):])}")
+    for i, (name, kind, required) in enumerate(positional):
+        if i < len(given):
+            values[name] = _convert(kind, given[i], name)
+        elif required:
+            raise UsageError(f"thiếu {name}")
+        else:
+            values[name] = None
+    return SimpleNamespace(run=run, **values)
+
+
+def main(argv=None):
+    # console Windows có thể không in được tiếng Việt -> thay ký tự lỗi thay vì crash
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(errors="replace")
+    try:
+        args = parse_args(sys.argv[1:] if argv is None else argv)
+    except UsageError as e:
+        if e.args[0] is None:
+            print(__doc__.strip())
+            return 0
+        print(f"lỗi: {e}\n\n{__doc__.strip()}", file=sys.stderr)
+        return 2
+    agenda = Agenda(args.data, readonly=args.run in READ_ONLY)
+    try:
+        return args.run(agenda, args)
+    finally:
+        agenda.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from calendar_core.archive import Archive
+from calendar_core.recurrence import RuleSet
+from calendar_core.storage import open_store
+from calendar_core.task_index import DayIndex
+
+
+def _minute(now):
+    return now.hour * 60 + now.minute
+
+
+def _try_lock(f):
+    """Khoá độc quyền (không chờ) cả file f; hệ điều hành tự nhả khi tiến trình chết"""
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class Agenda:
+    """
+    Toàn bộ logic task không cần Qt: kho task + task lặp lại + lịch sử đã lưu trữ,
+    cùng các truy vấn "hôm nay có gì", "đang làm gì", "tiếp theo là gì".
+    Cả hai GUI lẫn CLI (python -m calendar_core) đều chạy trên lớp này.
+    readonly=True (lệnh chỉ xem của CLI): không ghi gì vào file dữ liệu, kể cả khi GUI đang mở nó.
+    """
+
+    def __init__(self, data_file, store=None, readonly=False):
+        self.data_file = Path(data_file)
+        self.store = store if store is not None else open_store(self.data_file, readonly=readonly)
+        # task lặp lại: lưu rule riêng, lần lặp chỉ được sinh khi xem/kiểm tra tới ngày đó
+        self.rules = RuleSet.beside(self.data_file)
+        # lịch sử cũ: segment gzip theo tháng, chỉ giải nén khi xem tới tháng đó
+        self.archive = Archive.beside(self.data_file)
+        self._index = None
+        self._index_key = None
+        self._lock_file = None
+
+    # ---------- đọc ----------
+    def tasks_on(self, date):
+        """Task của ngày date: task đã lưu trữ + task thường trong kho + các lần lặp rơi vào ngày đó"""
+        tasks = self.store.day(date)
+        if self.archive.has_month(date[:7]):
+            # roll() ghi archive trước rồi mới bỏ khỏi kho: tiến trình khác (hoặc lần mở sau khi
+            # roll bị ngắt) có thể thấy task ở cả hai nơi -> bản trong kho thắng
+            archived = [t for t in self.archive.day(date) if self.store.locate(t.id) is None]
+            tasks = archived + tasks
+        if self.rules.rules:
+            tasks = tasks + self.rules.day(date)
+        return tasks
+
+    def revision(self):
+        """Đổi mỗi khi kho hoặc rule đổi, để các chỉ mục biết khi nào cần dựng lại"""
+        return (self.store.revision, self.rules.revision)
+
+    def day_index(self, now=None):
+        """DayIndex của hôm nay (kèm task hôm qua kéo qua nửa đêm), dựng lại khi sang ngày hoặc dữ liệu đổi"""
+        now = now or datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        key = (today, self.revision())
+        if self._index is None or key != self._index_key:
+            yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+            self._index = DayIndex(self.tasks_on(today), self.tasks_on(yesterday))
+            self._index_key = key
+        return self._index
+
+    def active(self, now=None):
+        """(task, start, end) của task đang chạy lúc now (phút tính từ 0h hôm nay), None nếu rảnh"""
+        index = self.day_index(now)
+        i = index.active_index(_minute(now or datetime.now()))
+        if i < 0:
+            return None
+        return index.tasks[i], index.starts[i], index.ends[i]
+
+    def upcoming(self, now=None, limit=None):
+        """Các task chưa xong của hôm nay bắt đầu sau now, theo giờ bắt đầu: [(start, task), ...]"""
+        index = self.day_index(now)
+        minute = _minute(now or datetime.now())
+        found = []
+        for start, task in zip(index.starts, index.tasks):
+            if start > minute and not task.done:
+                found.append((start, task))
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    # ---------- ghi ----------
+    def add(self, date, task):
+        return self.store.add(date, task)
+
+    def archive_old(self, days_to_keep, now=None):
+        """Chuyển các ngày cũ hơn days_to_keep vào archive (không xoá), kho chỉ còn vài ngày gần đây"""
+        cutoff = ((now or datetime.now()) - timedelta(days=days_to_keep)).strftime("%Y-%m-%d")
+        self.archive.roll(self.store, cutoff)
+
+    # ---------- dùng chung file dữ liệu ----------
+    @property
+    def lock_path(self):
+        return self.data_file.with_name(self.data_file.name + ".lock")
+
+    def claim(self):
+        """
+        GUI giữ khoá này suốt lúc chạy: kho của nó nằm trong RAM và sẽ ghi đè
+        thay đổi mà tiến trình khác ghi thẳng vào file. Trả về False nếu đã có nơi khác giữ.
+        """
+        if self._lock_file is not None:
+            return True
+        try:
+            f = open(self.lock_path, "a+")
+        except OSError:
+            return False
+        if not _try_lock(f):
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def in_use(self):
+        """True nếu một GUI đang mở cùng file dữ liệu này"""
+        if self._lock_file is not None or not self.lock_path.exists():
+            return False
+        try:
+            with open(self.lock_path, "a+") as f:
+                return not _try_lock(f)
+        except OSError:
+            return False
+
+    def close(self):
+        self.store.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,123 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from calendar_core.task_model import Task, task_to_json
+from calendar_core.writer import atomic_write_bytes
+
+MANIFEST = "manifest.json"
+# Số tháng đã giải nén được giữ trong RAM (tháng đang xem + hai tháng kề)
+CACHE_MONTHS = 3
+
+
+def _is_date(value):
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+class Archive:
+    """
+    Lịch sử task cũ, tách khỏi kho đang dùng: mỗi tháng là một hoặc vài segment
+    gzip bất biến (YYYY-MM.<n>.json.gz, cùng định dạng data.json) trong thư mục
+    data.archive/, manifest.json ghi tháng nào có những segment nào.
+    Chỉ manifest được đọc lúc mở; một tháng chỉ được giải nén khi có người hỏi tới.
+    """
+
+    def __init__(self, directory):
+        self.dir = Path(directory)
+        self._cache = {}
+        try:
+            meta = json.loads((self.dir / MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        self.months = meta.get("months", {})     # "YYYY-MM" -> [thông tin segment, ...]
+
+    @classmethod
+    def beside(cls, data_file):
+        data_file = Path(data_file)
+        return cls(data_file.with_name(data_file.stem + ".archive"))
+
+    def _save_manifest(self):
+        meta = {"version": 1, "months": dict(sorted(self.months.items()))}
+        atomic_write_bytes(self.dir / MANIFEST, json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def _write_segment(self, key, days, n):
+        name = f"{key}.{n}.json.gz"
+        raw = json.dumps(dict(sorted(days.items())), ensure_ascii=False, default=task_to_json).encode("utf-8")
+        import gzip
+        atomic_write_bytes(self.dir / name, gzip.compress(raw, mtime=0))
+        return {"file": name, "days": len(days), "tasks": sum(len(t) for t in days.values()),
+                "first": min(days), "last": max(days)}
+
+    # ---------- đọc ----------
+    def has_month(self, key):
+        return key in self.months
+
+    def month(self, key):
+        """{date: [Task, ...]} của tháng "YYYY-MM" (giải nén lần đầu rồi giữ trong cache)"""
+        days = self._cache.pop(key, None)
+        if days is None:
+            import gzip
+            found = {}
+            # cùng id ở nhiều segment (roll bị ngắt giữa chừng) thì lấy bản ở segment sau
+            for seg in self.months.get(key, []):
+                data = json.loads(gzip.decompress((self.dir / seg["file"]).read_bytes()).decode("utf-8"))
+                for date, tasks in data.items():
+                    for t in tasks:
+                        found[t.get("id") or object()] = (date, t)
+            days = {}
+            for date, t in found.values():
+                days.setdefault(date, []).append(Task.from_dict(t))
+            days = dict(sorted(days.items()))
+            if len(self._cache) >= CACHE_MONTHS:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = days
+        return days
+
+    def day(self, date):
+        if date[:7] not in self.months:
+            return []
+        return self.month(date[:7]).get(date, [])
+
+    # ---------- ghi ----------
+    def roll(self, store, cutoff):
+        """
+        Chuyển mọi ngày < cutoff từ store vào archive rồi xoá khỏi store.
+        Thứ tự: segment -> manifest -> drop_before, nên chết giữa chừng cũng không mất dữ liệu.
+        Tháng đã trôi hẳn qua cutoff mà có nhiều segment thì được gộp lại thành một.
+        Trả về số ngày đã chuyển.
+        """
+        old = {d: t for d, t in store.range("", cutoff).items() if _is_date(d)}
+        by_month = {}
+        for date, tasks in old.items():
+            if tasks:
+                by_month.setdefault(date[:7], {})[date] = tasks
+        if by_month:
+            self.dir.mkdir(parents=True, exist_ok=True)
+        stale = []
+        for key, days in sorted(by_month.items()):
+            parts = self.months.setdefault(key, [])
+            parts.append(self._write_segment(key, days, _next_part(parts)))
+            self._cache.pop(key, None)
+        for key, parts in self.months.items():
+            if len(parts) > 1 and key < cutoff[:7]:
+                merged = {d: list(t) for d, t in self.month(key).items()}
+                stale.extend(p["file"] for p in parts)
+                self.months[key] = [self._write_segment(key, merged, _next_part(parts))]
+        if by_month or stale:
+            self._save_manifest()
+        for name in stale:
+            try:
+                os.remove(self.dir / name)
+            except OSError:
+                pass
+        store.drop_before(cutoff)
+        return len(old)
+
+
+def _next_part(parts):
+    return max((int(p["file"].split(".")[1]) for p in parts), default=0) + 1
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import wave
+from pathlib import Path
+
+# Âm báo mặc định của FocusWindow (tên -> file trong thư mục sounds/)
+DEFAULT_SOUNDS = {"start": "game-start.mp3", "end": "success.mp3"}
+# Số QMediaPlayer dự phòng dùng chung, chỉ cần khi chưa có/không có bản WAV
+POOL_SIZE = 2
+# WAV đã giải mã, đặt tên theo mtime/size của file gốc nên đổi file là tự giải mã lại
+CACHE_DIR = Path(tempfile.gettempdir()) / "calendar-sounds"
+
+
+def _write_wav(path, rate, channels, width, chunks):
+    tmp = path.with_name(path.name + ".tmp")
+    with wave.open(str(tmp), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(width)
+        f.setframerate(rate)
+        for chunk in chunks:
+            f.writeframes(chunk)
+    os.replace(tmp, path)
+
+
+class SoundBank:
+    """
+    Âm báo nạp một lần cho cả tiến trình (PyQt6.QtMultimedia chỉ được import ở đây).
+    Mỗi file mp3 được QAudioDecoder giải mã một lần ra WAV trong CACHE_DIR rồi phát bằng
+    QSoundEffect của riêng âm đó: độ trễ thấp, không tạo object mới mỗi lần phát.
+    Trong lúc đang giải mã (hoặc giải mã lỗi) thì phát qua POOL_SIZE QMediaPlayer dùng chung.
+    Không có QtMultimedia (thiếu backend âm thanh) thì play() không làm gì.
+    """
+
+    def __init__(self, files):
+        self.files = {name: Path(p) for name, p in files.items()}
+        self._effects = {}
+        self._decoders = {}
+        self._players = []
+        self._next = 0
+        try:
+            from PyQt6 import QtMultimedia
+            from PyQt6.QtCore import QUrl
+        except ImportError as e:
+            print("Không có QtMultimedia, tắt âm thanh:", e)
+            self._mm = None
+            return
+        self._mm = QtMultimedia
+        self._url = QUrl.fromLocalFile
+        for name, path in self.files.items():
+            if path.exists():
+                self._load(name, path)
+
+    # ---------- nạp ----------
+    def _load(self, name, path):
+        if path.suffix.lower() == ".wav":
+            self._use_wav(name, path)
+            return
+        st = path.stat()
+        wav = CACHE_DIR / f"{path.stem}-{int(st.st_mtime)}-{st.st_size}.wav"
+        if wav.exists():
+            self._use_wav(name, wav)
+        else:
+            self._decode(name, path, wav)
+
+    def _decode(self, name, path, wav):
+        mm = self._mm
+        fmt = mm.QAudioFormat()
+        fmt.setSampleFormat(mm.QAudioFormat.SampleFormat.Int16)
+        fmt.setSampleRate(44100)
+        fmt.setChannelCount(2)
+        decoder = mm.QAudioDecoder()
+        decoder.setAudioFormat(fmt)
+        decoder.setSource(self._url(str(path)))
+        chunks, info = [], {}
+
+        def on_buffer():
+            buf = decoder.read()
+            if buf.isValid() and buf.byteCount():
+                f = buf.format()
+                info.update(rate=f.sampleRate(), channels=f.channelCount(), width=f.bytesPerSample())
+                chunks.append(buf.constData().asstring(buf.byteCount()))
+
+        def on_finished():
+            self._decoders.pop(name, None)
+            if not chunks:
+                return
+            try:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                _write_wav(wav, info["rate"], info["channels"], info["width"], chunks)
+            except OSError as e:
+                print("Không ghi được WAV:", e)
+                return
+            self._use_wav(name, wav)
+
+        decoder.bufferReady.connect(on_buffer)
+        decoder.finished.connect(on_finished)
+        self._decoders[name] = decoder
+        decoder.start()
+
+    def _use_wav(self, name, wav):
+        effect = self._mm.QSoundEffect()
+        effect.setSource(self._url(str(wav)))
+        effect.setVolume(1.0)
+        self._effects[name] = effect
+
+    # ---------- phát ----------
+    def play(self, name):
+        if self._mm is None or name not in self.files:
+            return
+        effect = self._effects.get(name)
+        if effect is not None and effect.status() == self._mm.QSoundEffect.Status.Ready:
+            effect.play()
+            return
+        self._play_fallback(self.files[name])
+
+    def _play_fallback(self, path):
+        mm = self._mm
+        if not self._players:
+            for _ in range(POOL_SIZE):
+                output = mm.QAudioOutput()
+                output.setVolume(1.0)
+                player = mm.QMediaPlayer()
+                player.setAudioOutput(output)
+                self._players.append((player, output))
+        player, _ = self._players[self._next]
+        self._next = (self._next + 1) % len(self._players)
+        url = self._url(str(path))
+        if player.source() != url:
+            player.setSource(url)
+        else:
+            player.setPosition(0)
+        player.play()
+
+
+_banks = {}
+
+
+def sound_bank(sound_dir, sounds=DEFAULT_SOUNDS):
+    """SoundBank dùng chung cho thư mục sound_dir (cần QApplication đã được tạo)"""
+    key = str(Path(sound_dir).resolve())
+    bank = _banks.get(key)
+    if bank is None:
+        bank = _banks[key] = SoundBank({name: Path(sound_dir) / f for name, f in sounds.items()})
+    return bank
@@ -0,0 +1,112 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from calendar_core.task_model import MINUTES_PER_DAY
+
+# task kéo qua nửa đêm dài hơn mức này (vd 17:30 → 10:00) gần như chắc là nhập ngược giờ
+MAX_OVERNIGHT_MINUTES = 12 * 60
+
+
+def absolute_span(date, task):
+    """
+    (start, end) tính bằng phút tuyệt đối (ordinal ngày * 1440 + phút), None nếu thiếu giờ.
+    Giờ kết thúc trùng giờ bắt đầu (vd cả hai để mặc định 00:00) tính là dài 0 phút, không phải cả ngày.
+    Khoảng ngược dài hơn MAX_OVERNIGHT_MINUTES bị cắt ở nửa đêm, để không một task nhập sai
+    nào kéo max_len của ConflictIndex lên gần một ngày.
+    """
+    span = task.span()
+    if span is None:
+        return None
+    if task.start == task.end:
+        span = (span[0], span[0])
+    elif span[1] > MINUTES_PER_DAY and span[1] - span[0] > MAX_OVERNIGHT_MINUTES:
+        span = (span[0], MINUTES_PER_DAY)
+    try:
+        base = datetime.strptime(date, "%Y-%m-%d").toordinal() * MINUTES_PER_DAY
+    except ValueError:
+        return None
+    return base + span[0], base + span[1]
+
+
+def overlaps(a_start, a_end, b_start, b_end):
+    # cùng giờ bắt đầu luôn tính là trùng (giữ đúng kiểm tra cũ)
+    return a_start == b_start or (a_start < b_end and b_start < a_end)
+
+
+def neighbour_dates(date):
+    """Hôm trước, hôm đó, hôm sau: đủ để bắt các task kéo qua nửa đêm"""
+    d = datetime.strptime(date, "%Y-%m-%d")
+    return [(d + timedelta(days=k)).strftime("%Y-%m-%d") for k in (-1, 0, 1)]
+
+
+class ConflictIndex:
+    """
+    Các khoảng thời gian đã sort theo giờ bắt đầu tuyệt đối.
+    Một truy vấn chỉ xét các khoảng có start trong (q_start - max_len, q_end),
+    tìm bằng bisect, nên chi phí là O(log n + k).
+    Nhập hàng loạt: xem bulk_conflicts.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._items = []    # (start, end, date, task)
+        self.max_len = 0
+
+    @classmethod
+    def from_days(cls, days):
+        """days: {date: [task, ...]}"""
+        return cls.from_items((date, t) for date, tasks in days.items() for t in tasks)
+
+    @classmethod
+    def from_items(cls, pairs):
+        """pairs: các cặp (date, task)"""
+        idx = cls()
+        items = []
+        for date, t in pairs:
+            span = absolute_span(date, t)
+            if span:
+                items.append((span[0], span[1], date, t))
+        items.sort(key=lambda it: it[0])
+        idx._items = items
+        idx._starts = [it[0] for it in items]
+        idx.max_len = max((it[1] - it[0] for it in items), default=0)
+        return idx
+
+    def conflicts(self, date, task, exclude=None):
+        """
+        Mọi task trùng giờ với task (đặt vào ngày date), trừ chính object task nếu nó đã nằm trong chỉ mục.
+        exclude=id của task cần bỏ qua (bản cũ của nó khi sửa).
+        """
+        span = absolute_span(date, task)
+        if span is None:
+            return []
+        start, end = span
+        lo = bisect_left(self._starts, start - self.max_len)
+        hi = bisect_left(self._starts, max(end, start + 1))
+        out = []
+        for it in self._items[lo:hi]:
+            if it[3] is task or (exclude is not None and it[3].id == exclude):
+                continue
+            if overlaps(start, end, it[0], it[1]):
+                out.append((it[2], it[3]))
+        return out
+
+
+def bulk_conflicts(existing, new_items):
+    """
+    Kiểm tra trùng giờ cho cả một lô task nhập vào, không bị O(n^2).
+    existing / new_items: list (date, task); task mới không cần có id.
+    Trả về list (new_date, new_task, other_date, other_task), gồm cả trùng với dữ liệu cũ
+    lẫn trùng lẫn nhau trong lô (mỗi cặp trong lô báo một lần, ở task đứng sau).
+    Dựng chỉ mục một lần O((n + m) log(n + m)), mỗi task mới một truy vấn O(log(n + m) + k).
+    """
+    new_items = list(new_items)
+    index = ConflictIndex.from_items(list(existing) + new_items)
+    order = {id(t): i for i, (_, t) in enumerate(new_items)}
+    out = []
+    for i, (date, task) in enumerate(new_items):
+        for other_date, other in index.conflicts(date, task):
+            if order.get(id(other), -1) > i:
+                continue
+            out.append((date, task, other_date, other))
+    return out
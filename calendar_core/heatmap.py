@@ -0,0 +1,125 @@
+# Mức tải theo tổng số phút đã lên lịch trong ngày: <1h, <3h, <6h, còn lại
+LEVEL_MINUTES = (60, 180, 360)
+
+
+class DayLoad:
+    __slots__ = ("count", "minutes", "done")
+
+    def __init__(self):
+        self.count = 0
+        self.minutes = 0
+        self.done = 0
+
+    def add(self, task, sign=1):
+        span = task.span()
+        self.count += sign
+        self.minutes += sign * (span[1] - span[0] if span else 0)
+        self.done += sign * bool(task.done)
+
+    @property
+    def level(self):
+        """0 (trống) .. 4 (rất bận)"""
+        if self.count <= 0:
+            return 0
+        for i, limit in enumerate(LEVEL_MINUTES):
+            if self.minutes < limit:
+                return i + 1
+        return len(LEVEL_MINUTES) + 1
+
+    @property
+    def done_ratio(self):
+        return self.done / self.count if self.count else 0.0
+
+
+class LoadMap:
+    """
+    Tải từng ngày (số task, tổng phút, số task xong), gom theo tháng.
+    Một tháng chỉ được tính (quét store.range của tháng đó) lần đầu khi được xem,
+    sau đó cập nhật tăng dần qua store.subscribe; ngày nào đổi thì nằm trong dirty
+    để giao diện chỉ vẽ lại đúng các ngày đó. Tháng đã lưu trữ thì cộng thêm phần trong archive.
+    Lần lặp của task lặp lại (rules) được tính theo từng rule, để khi một rule đổi
+    (qua rules.subscribe) chỉ phải trừ các lần lặp cũ của nó rồi cộng lại bản mới.
+    """
+
+    def __init__(self, store, archive=None, rules=None):
+        self.store = store
+        self.archive = archive
+        self.rules = rules
+        self._months = {}   # "YYYY-MM" -> {date: DayLoad}
+        self._occurrences = {}  # "YYYY-MM" -> {id rule: [(date, task), ...]}
+        self.dirty = set()
+        store.subscribe(self._on_change)
+        if rules is not None:
+            rules.subscribe(self._on_rule_change)
+
+    @staticmethod
+    def _bounds(key):
+        year, month = int(key[:4]), int(key[5:])
+        end = f"{year + 1:04d}-01-01" if month == 12 else f"{year:04d}-{month + 1:02d}-01"
+        return f"{key}-01", end
+
+    def month(self, year, month):
+        key = f"{year:04d}-{month:02d}"
+        loads = self._months.get(key)
+        if loads is None:
+            start, end = self._bounds(key)
+            loads = {}
+            days = [self.store.range(start, end)]
+            if self.archive is not None and self.archive.has_month(key):
+                days.append(self.archive.month(key))
+            for part in days:
+                for date, tasks in part.items():
+                    day = loads.get(date) or loads.setdefault(date, DayLoad())
+                    for t in tasks:
+                        day.add(t)
+            self._months[key] = loads
+            self._occurrences[key] = {}
+            if self.rules is not None:
+                for rule_id in self.rules.rules:
+                    self._add_rule(key, rule_id)
+        return loads
+
+    def day(self, date):
+        """DayLoad của date nếu tháng đó đã được tính, None nếu chưa hoặc ngày trống"""
+        return self._months.get(date[:7], {}).get(date)
+
+    def take_dirty(self):
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def _on_change(self, date, old, new):
+        loads = self._months.get(date[:7])
+        if loads is None:
+            return
+        day = loads.get(date)
+        if day is None:
+            day = loads[date] = DayLoad()
+        if old is not None:
+            day.add(old, -1)
+        if new is not None:
+            day.add(new)
+        if day.count <= 0:
+            del loads[date]
+        self.dirty.add(date)
+
+    def _add_rule(self, key, rule_id):
+        rule = self.rules.rules.get(rule_id)
+        if rule is None:
+            return
+        found = [(date, rule.make(date)) for date in rule.occurrences(*self._bounds(key))]
+        if found:
+            self._occurrences[key][rule_id] = found
+            for date, task in found:
+                self._on_change(date, None, task)
+
+    def _on_rule_change(self, rule_id):
+        # chỉ các tháng đã tính mới cần cập nhật, tháng khác sẽ tính đủ khi được xem
+        for key, by_rule in self._occurrences.items():
+            for date, task in by_rule.pop(rule_id, ()):
+                self._on_change(date, task, None)
+            self._add_rule(key, rule_id)
+
+    def close(self):
+        self.store.unsubscribe(self._on_change)
+        if self.rules is not None:
+            self.rules.unsubscribe(self._on_rule_change)
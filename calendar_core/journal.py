@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+
+from calendar_core.metrics import metrics
+from calendar_core.task_model import task_to_json
+from calendar_core.writer import atomic_write_bytes, writer as default_writer
+
+# Sau bao nhiêu bản ghi thì gộp journal vào snapshot
+COMPACT_EVERY = 500
+
+
+def apply_record(data, rec, make=None):
+    """
+    Áp một bản ghi thay đổi lên dict {date: [task, ...]}.
+    make: hàm đổi dict task trong bản ghi sang kiểu đang giữ trong data (vd as_task),
+    None nghĩa là data giữ dict thô.
+    """
+    op = rec.get("op")
+    date = rec.get("date")
+    conv = make or (lambda t: t)
+    if op == "add":
+        data.setdefault(date, []).append(conv(rec["task"]))
+    elif op == "set":
+        data[date][rec["idx"]] = conv(rec["task"])
+    elif op == "done":
+        t = data[date][rec["idx"]]
+        if make is None:
+            t["done"] = rec["value"]
+            if "at" in rec:
+                t["updated_at"] = rec["at"]
+        else:
+            t.done = rec["value"]
+            if "at" in rec:
+                t.touch(rec["at"])
+    elif op == "del":
+        del data[date][rec["idx"]]
+        if not data[date]:
+            del data[date]
+    elif op == "day":
+        if rec["tasks"]:
+            data[date] = [conv(t) for t in rec["tasks"]]
+        else:
+            data.pop(date, None)
+    else:
+        raise ValueError(f"op không hợp lệ: {op}")
+
+
+class TaskJournal:
+    """
+    Snapshot (data.json, định dạng cũ) + journal append-only (mỗi dòng một thay đổi).
+    Dòng đầu của journal ghi checksum của snapshot mà nó nối tiếp, nên nếu
+    chương trình chết giữa lúc compact thì journal cũ sẽ không bị replay hai lần.
+    Việc ghi đĩa do BackgroundWriter làm, append() chỉ xếp dòng vào hàng đợi.
+    readonly=True: load() không tạo/làm mới journal, append()/compact() báo lỗi.
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, compact_every=COMPACT_EVERY, writer=None,
+                 readonly=False):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path) if journal_path else self.snapshot_path.with_suffix(".journal")
+        self.compact_every = compact_every
+        self.writer = writer or default_writer
+        self.readonly = readonly
+        self._base = None
+        self._count = 0
+        self._lock = threading.Lock()
+        self._lines = []
+        self._snapshot = None
+
+    def load(self, make=None):
+        """Đọc snapshot rồi replay journal, trả về dict {date: [task, ...]} (task đổi qua make nếu có)"""
+        raw = b""
+        if self.snapshot_path.exists():
+            raw = self.snapshot_path.read_bytes()
+        self._base = zlib.crc32(raw)
+        try:
+            data = json.loads(raw.decode("utf-8")) if raw else {}
+        except ValueError:
+            data = {}
+        if make is not None:
+            data = {d: [make(t) for t in tasks] for d, tasks in data.items()}
+
+        self._count = 0
+        valid = False
+        if self.journal_path.exists():
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            header = _parse_line(lines[0]) if lines else None
+            valid = bool(header) and header.get("base") == self._base
+            if valid:
+                for line in lines[1:]:
+                    rec = _parse_line(line)
+                    if rec is None:
+                        # dòng cuối bị cắt dở khi crash -> bỏ
+                        break
+                    try:
+                        apply_record(data, rec, make)
+                    except (KeyError, IndexError, ValueError):
+                        continue
+                    self._count += 1
+        if not valid and not self.readonly:
+            self._reset_journal()
+        return data
+
+    def check_writable(self):
+        if self.readonly:
+            raise PermissionError(f"{self.snapshot_path.name} đang mở chỉ đọc")
+
+    def append(self, rec, data):
+        """Xếp một bản ghi vào hàng đợi ghi (data đã được áp rec), tự compact khi journal dài"""
+        self.check_writable()
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":"), default=task_to_json)
+        with self._lock:
+            self._lines.append(line)
+        self._count += 1
+        if self._count >= self.compact_every:
+            self.compact(data)
+        else:
+            self.writer.submit(self.journal_path, self._write)
+
+    def compact(self, data):
+        """Serialize toàn bộ data thành snapshot mới, luồng nền sẽ ghi và làm rỗng journal"""
+        self.check_writable()
+        raw = json.dumps(data, ensure_ascii=False, indent=2, default=task_to_json).encode("utf-8")
+        with self._lock:
+            self._snapshot = raw
+            self._lines = []
+        self._count = 0
+        self.writer.submit(self.journal_path, self._write)
+
+    def _write(self):
+        # chạy trên luồng của writer
+        with self._lock:
+            snapshot, lines = self._snapshot, self._lines
+            self._snapshot, self._lines = None, []
+        try:
+            if snapshot is not None:
+                atomic_write_bytes(self.snapshot_path, snapshot)
+                self._base = zlib.crc32(snapshot)
+                self._reset_journal()
+                snapshot = None
+            elif self._base is None:
+                base = self._checksum()
+                self._reset_journal(base)
+                self._base = base
+            if lines:
+                self._append(lines)
+        except Exception:
+            # ghi lỗi (đầy đĩa, không có quyền...): giữ lại để lần ghi sau thử tiếp
+            self._restore(snapshot, lines)
+            raise
+
+    def _restore(self, snapshot, lines):
+        """Trả phần chưa ghi được về hàng đợi, đứng trước các thay đổi mới hơn"""
+        with self._lock:
+            if self._snapshot is not None:
+                # đã có snapshot mới hơn, nó gồm luôn những thay đổi này
+                return
+            self._snapshot = snapshot
+            self._lines = lines + self._lines
+
+    def _append(self, lines):
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        if metrics.enabled:
+            metrics.count("persist.journal_lines", len(lines))
+            metrics.count("persist.bytes", len(data))
+        with metrics.timer("persist.journal_append"), open(self.journal_path, "ab", buffering=0) as f:
+            start = f.seek(0, os.SEEK_END)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[f.write(view):]
+                os.fsync(f.fileno())
+            except OSError:
+                # load() dừng ở dòng hỏng đầu tiên -> không để lại dòng cắt dở trước lần ghi lại
+                try:
+                    os.ftruncate(f.fileno(), start)
+                except OSError:
+                    pass
+                raise
+
+    def _checksum(self):
+        if not self.snapshot_path.exists():
+            return zlib.crc32(b"")
+        return zlib.crc32(self.snapshot_path.read_bytes())
+
+    def _reset_journal(self, base=None):
+        header = json.dumps({"base": self._base if base is None else base}) + "\n"
+        atomic_write_bytes(self.journal_path, header.encode("utf-8"))
+
+
+def _parse_line(line):
+    try:
+        rec = json.loads(line)
+    except ValueError:
+        return None
+    return rec if isinstance(rec, dict) else None
@@ -0,0 +1,134 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+# CALENDAR_METRICS=1 bật đo đạc; đặt là đường dẫn file thì bật và nối một dòng JSON vào đó khi thoát.
+# Không đặt thì mọi hàm ở đây gần như không tốn gì (timed() trả về nguyên hàm gốc).
+METRICS_ENV = "CALENDAR_METRICS"
+DEFAULT_DUMP = "metrics.jsonl"
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, (time.perf_counter() - self.t0) * 1000)
+        return False
+
+
+class Metrics:
+    """
+    Bộ đếm và bộ đo thời gian dùng chung cho cả app (an toàn giữa các thread).
+    count("persist.bytes", n) cộng dồn; observe("ui.load_tasks", ms) ghi số lần, tổng, max.
+    Khi tắt (enabled=False) mọi hàm trả về ngay.
+    """
+
+    def __init__(self, enabled=False, dump_path=None):
+        self.enabled = enabled
+        self.dump_path = dump_path
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}    # tên -> [số lần, tổng ms, max ms, lần cuối ms]
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                self.timers[name] = [1, ms, ms, ms]
+            else:
+                t[0] += 1
+                t[1] += ms
+                t[3] = ms
+                if ms > t[2]:
+                    t[2] = ms
+
+    def timer(self, name):
+        """with metrics.timer("x"): ... đo khối lệnh"""
+        return _Timer(self, name) if self.enabled else _NULL
+
+    def snapshot(self):
+        with self._lock:
+            timers = {name: {"count": c, "total_ms": round(total, 3), "mean_ms": round(total / c, 3),
+                             "max_ms": round(mx, 3), "last_ms": round(last, 3)}
+                      for name, (c, total, mx, last) in sorted(self.timers.items())}
+            counters = dict(sorted(self.counters.items()))
+        return {"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "uptime_s": round(time.time() - self.started, 1),
+                "counters": counters, "timers": timers}
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+    def dump(self, path=None):
+        """Nối snapshot hiện tại (một dòng JSON) vào path, trả về đường dẫn đã ghi"""
+        path = path or self.dump_path or DEFAULT_DUMP
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot(), ensure_ascii=False) + "\n")
+        return path
+
+
+def _from_env():
+    value = os.environ.get(METRICS_ENV, "")
+    if value in ("", "0"):
+        return Metrics()
+    m = Metrics(True, None if value == "1" else value)
+    if m.dump_path:
+        atexit.register(m.dump)
+    return m
+
+
+metrics = _from_env()
+
+
+def timed(name):
+    """
+    Decorator đo thời gian một hàm/method dưới tên name.
+    Quyết định lúc định nghĩa hàm: khi tắt đo đạc thì trả về nguyên hàm, không bọc gì cả.
+    """
+    def wrap(fn):
+        if not metrics.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(name, (time.perf_counter() - t0) * 1000)
+        return inner
+    return wrap
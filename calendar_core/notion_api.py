@@ -0,0 +1,171 @@
+import json as jsonlib
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+from calendar_core.metrics import metrics
+from calendar_core.notion_stream import ResultStream
+
+
+NOTION_VERSION = "2022-06-28"
+# (connect, read) giây; không có timeout thì một socket treo làm treo cả app
+TIMEOUT = (3.05, 30)
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# Notion giới hạn trung bình khoảng 3 request/giây cho mỗi integration
+RATE_PER_SEC = 3.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# request không idempotent (tạo trang) chỉ được thử lại khi chắc chắn server chưa làm gì
+UNSENT_STATUS = {429}
+STREAM_CHUNK = 64 * 1024
+
+
+class TokenBucket:
+    """Giới hạn tốc độ: mỗi request lấy một token, token hồi lại rate cái/giây, tối đa capacity"""
+
+    def __init__(self, rate=RATE_PER_SEC, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Chờ tới khi có token rồi lấy nó"""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+
+
+def retry_delay(attempt, retry_after=None):
+    """Backoff mũ với full jitter; Retry-After (giây) của server là mức tối thiểu"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+def _not_sent(exc):
+    """True nếu lỗi mạng xảy ra lúc mở kết nối, tức request chưa hề tới server"""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = exc.args[0] if exc.args else None
+    # requests bọc lỗi urllib3 trong MaxRetryError(reason=...); NewConnectionError là lớp con của ConnectTimeoutError
+    return isinstance(getattr(reason, "reason", reason), ConnectTimeoutError)
+
+
+def _counted(chunks):
+    for chunk in chunks:
+        metrics.count("sync.bytes_in", len(chunk))
+        yield chunk
+
+
+class NotionClient:
+    """
+    Client Notion dùng chung một requests.Session (giữ kết nối keep-alive),
+    có timeout, tự thử lại khi gặp 429/5xx hoặc lỗi mạng và giới hạn tốc độ gửi.
+    """
+
+    def __init__(self, token, base_url="https://api.notion.com/v1", timeout=TIMEOUT,
+                 max_retries=MAX_RETRIES, bucket=None, sleep=time.sleep):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = bucket or TokenBucket()
+        self._sleep = sleep
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json"
+        })
+
+    def _send(self, method, path, json=None, stream=False, idempotent=True):
+        """
+        Gửi một request (có thử lại), trả về Response đã kiểm tra status.
+        idempotent=False (vd POST /pages): read timeout hay 5xx có thể là server đã tạo trang
+        nhưng response bị mất, thử lại sẽ tạo trùng -> chỉ thử lại khi chưa kết nối được hoặc 429.
+        """
+        retry_status = RETRY_STATUS if idempotent else UNSENT_STATUS
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if metrics.enabled and json is not None:
+            metrics.count("sync.bytes_out", len(jsonlib.dumps(json)))
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            metrics.count("sync.requests")
+            if attempt:
+                metrics.count("sync.retries")
+            try:
+                with metrics.timer("sync.request"):
+                    res = self.session.request(method, url, json=json, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or not (idempotent or _not_sent(e)):
+                    raise
+                self._sleep(retry_delay(attempt))
+                attempt += 1
+                continue
+            if res.status_code in retry_status and attempt < self.max_retries:
+                res.close()
+                self._sleep(retry_delay(attempt, res.headers.get("Retry-After")))
+                attempt += 1
+                continue
+            if not res.ok:
+                res.close()
+            res.raise_for_status()
+            return res
+
+    def request(self, method, path, json=None, idempotent=True):
+        """Gửi một request, trả về JSON; lỗi cuối cùng (HTTPError/ConnectionError/Timeout) được ném ra"""
+        res = self._send(method, path, json, idempotent=idempotent)
+        metrics.count("sync.bytes_in", len(res.content))
+        return res.json()
+
+    def query_database(self, database_id, body=None):
+        return self.request("POST", f"databases/{database_id}/query", body or {})
+
+    def query_database_stream(self, database_id, body=None, slim=None):
+        """
+        Như query_database nhưng parse dần từ socket: trả về ResultStream,
+        duyệt nó để lấy từng trang (qua slim nếu có), has_more/next_cursor đọc sau khi duyệt xong.
+        """
+        res = self._send("POST", f"databases/{database_id}/query", body or {}, stream=True)
+        chunks = res.iter_content(STREAM_CHUNK)
+        if metrics.enabled:
+            chunks = _counted(chunks)
+        return ResultStream(chunks, slim, res.close)
+
+    def create_page(self, database_id, properties):
+        return self.request("POST", "pages", {"parent": {"database_id": database_id}, "properties": properties},
+                            idempotent=False)
+
+    def update_page(self, page_id, properties=None, archived=None):
+        """PATCH /pages/{id}, chỉ gửi các property truyền vào"""
+        body = {}
+        if properties:
+            body["properties"] = properties
+        if archived is not None:
+            body["archived"] = archived
+        return self.request("PATCH", f"pages/{page_id}", body)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,111 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+
+
+class ResultStream:
+    """
+    Đọc dần một response list của Notion ({"results": [...], "has_more": ..., "next_cursor": ...})
+    từ các chunk bytes, trả về từng trang ngay khi đã đủ dữ liệu của trang đó.
+    Mỗi lần chỉ giữ một trang trong bộ nhớ (sau khi qua slim), thay vì cả body đã parse.
+    Các key khác ngoài results có trong self.meta sau khi duyệt xong.
+    """
+
+    def __init__(self, chunks, slim=None, close=None):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._slim = slim
+        self._close = close
+        self.meta = {}
+
+    def get(self, key, default=None):
+        return self.meta.get(key, default)
+
+    # ---------- đọc buffer ----------
+    def _fill(self):
+        """Nạp thêm một chunk, bỏ phần đã đọc; False nếu hết dữ liệu"""
+        if self._eof:
+            return False
+        self._buf = self._buf[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._utf8.decode(chunk)
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return True
+
+    def _peek(self):
+        """Ký tự kế tiếp (bỏ khoảng trắng), "" nếu hết"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, ch):
+        if self._peek() != ch:
+            raise ValueError(f"JSON không hợp lệ: cần {ch!r} ở vị trí {self._pos}")
+        self._pos += 1
+
+    def _value(self):
+        """Đọc một giá trị JSON hoàn chỉnh, nạp thêm chunk cho tới khi raw_decode được"""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # số ở cuối buffer có thể bị cắt đôi (vd 12|34), chỉ tin khi còn ký tự phía sau
+            if end == len(self._buf) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    # ---------- duyệt ----------
+    def __iter__(self):
+        try:
+            self._expect("{")
+            if self._peek() == "}":
+                return
+            while True:
+                key = self._value()
+                self._expect(":")
+                if key == "results":
+                    yield from self._results()
+                else:
+                    self.meta[key] = self._value()
+                if self._peek() == ",":
+                    self._pos += 1
+                    continue
+                self._expect("}")
+                return
+        finally:
+            if self._close:
+                self._close()
+
+    def _results(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            page = self._value()
+            yield self._slim(page) if self._slim else page
+            ch = self._peek()
+            self._pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"JSON không hợp lệ ở vị trí {self._pos - 1}")
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from calendar_core.writer import atomic_write_bytes
+
+
+PAGE_SIZE = 100     # tối đa Notion cho phép mỗi lần query
+# Cửa sổ ngày giữ ở local: hôm qua (task kéo qua nửa đêm) tới 7 ngày tới
+PAST_DAYS = 1
+FUTURE_DAYS = 7
+# Tên các property trong database Notion
+TITLE_PROPERTY = "Name"
+DATE_PROPERTY = "Date"
+DONE_PROPERTY = "Done"      # checkbox, không bắt buộc
+# Dữ liệu tải trong vòng chừng này giây thì coi là còn mới, không gọi Notion
+TTL_SECONDS = 120
+
+
+def page_to_task(page):
+    """
+    Trang Notion -> (date, dict task) theo schema tasks.json,
+    None nếu trang đã bị xoá/lưu trữ hoặc không có property Date.
+    """
+    if page.get("archived") or page.get("in_trash"):
+        return None
+    props = page.get("properties", {})
+
+    title = ""
+    if TITLE_PROPERTY in props and props[TITLE_PROPERTY]["title"]:
+        title = props[TITLE_PROPERTY]["title"][0]["plain_text"]
+
+    date_info = props.get(DATE_PROPERTY, {}).get("date")
+    if not date_info or not date_info.get("start"):
+        return None
+
+    start = date_info["start"]
+    end = date_info.get("end")
+    start_time = datetime.fromisoformat(start).strftime("%H:%M")
+    end_time = datetime.fromisoformat(end).strftime("%H:%M") if end else "00:00"
+    task = {
+        "id": page.get("id"),
+        "title": title or "Untitled",
+        "time": start_time,
+        "to": end_time
+    }
+    if props.get(DONE_PROPERTY, {}).get("type") == "checkbox":
+        task["done"] = bool(props[DONE_PROPERTY]["checkbox"])
+    return start[:10], task
+
+
+def slim_page(page):
+    """Chỉ giữ những gì page_to_task và việc đồng bộ cần, bỏ phần còn lại của trang"""
+    props = page.get("properties", {})
+    return {
+        "id": page.get("id"),
+        "last_edited_time": page.get("last_edited_time"),
+        "archived": page.get("archived", False),
+        "in_trash": page.get("in_trash", False),
+        "properties": {k: props[k] for k in (TITLE_PROPERTY, DATE_PROPERTY, DONE_PROPERTY) if k in props},
+    }
+
+
+def date_window(today=None, past_days=PAST_DAYS, future_days=FUTURE_DAYS):
+    """(ngày đầu, ngày cuối) dạng "YYYY-MM-DD" của cửa sổ đồng bộ, tính cả hai đầu"""
+    today = today or datetime.now()
+    return ((today - timedelta(days=past_days)).strftime("%Y-%m-%d"),
+            (today + timedelta(days=future_days)).strftime("%Y-%m-%d"))
+
+
+def date_filter(window):
+    """
+    Filter property Date cho database query.
+    Nới thêm một ngày mỗi đầu vì Notion so ngày theo UTC,
+    còn việc chia theo ngày local do page_to_task làm.
+    """
+    lo = datetime.strptime(window[0], "%Y-%m-%d") - timedelta(days=1)
+    hi = datetime.strptime(window[1], "%Y-%m-%d") + timedelta(days=1)
+    return {"and": [
+        {"property": DATE_PROPERTY, "date": {"on_or_after": lo.strftime("%Y-%m-%d")}},
+        {"property": DATE_PROPERTY, "date": {"on_or_before": hi.strftime("%Y-%m-%d")}},
+    ]}
+
+
+def iter_pages(query, body=None):
+    """
+    Lần lượt trả về mọi trang của một database query, đi theo has_more/next_cursor.
+    query(body) -> dict JSON của một lần POST /databases/{id}/query,
+    hoặc một ResultStream (duyệt hết trang rồi mới đọc has_more/next_cursor).
+    """
+    body = dict(body or {})
+    body.setdefault("page_size", PAGE_SIZE)
+    while True:
+        data = query(body)
+        if isinstance(data, dict):
+            yield from data.get("results", [])
+        else:
+            yield from data
+        if not data.get("has_more") or not data.get("next_cursor"):
+            return
+        body["start_cursor"] = data.get("next_cursor")
+
+
+class SyncState:
+    """
+    Metadata đồng bộ lưu cạnh tasks.json (tasks.sync.json):
+    - last_edited: con trỏ delta, last_edited_time lớn nhất đã áp dụng vào kho
+    - window: cửa sổ ngày của lần tải toàn bộ gần nhất
+    - fetched_at: epoch giây của lần tải thành công gần nhất
+    - hash: băm nội dung lần tải đó, trùng thì khỏi gộp lại vào kho
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = {}
+        try:
+            self.meta = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def beside(cls, data_file):
+        data_file = Path(data_file)
+        return cls(data_file.with_name(data_file.stem + ".sync.json"))
+
+    @property
+    def last_edited(self):
+        return self.meta.get("last_edited")
+
+    def is_fresh(self, ttl=TTL_SECONDS, now=None):
+        """True nếu lần tải thành công gần nhất chưa quá ttl giây"""
+        fetched_at = self.meta.get("fetched_at")
+        if fetched_at is None:
+            return False
+        now = time.time() if now is None else now
+        return 0 <= now - fetched_at < ttl
+
+    def since(self, window, full=False):
+        """Mốc để tải delta, None nếu cần tải lại toàn bộ cửa sổ (lần đầu, full, hoặc đã sang ngày mới)"""
+        if full or self.meta.get("window") != list(window):
+            return None
+        return self.last_edited
+
+    def save(self):
+        data = json.dumps(self.meta, ensure_ascii=False, indent=2).encode("utf-8")
+        atomic_write_bytes(self.path, data)
+
+
+def apply_page(store, page, window=None):
+    """
+    Gộp một trang vào kho theo id trang; trả về True nếu kho thay đổi.
+    Trang đã dời ra ngoài cửa sổ window được coi như bị xoá khỏi local.
+    """
+    page_id = page.get("id")
+    loc = store.locate(page_id)
+    item = page_to_task(page)
+    if item and window and not (window[0] <= item[0] <= window[1]):
+        item = None
+    if item is None:
+        if loc:
+            store.delete(page_id)
+            return True
+        return False
+    date, task = item
+    if loc and loc[0] == date:
+        old = store.get(page_id)
+        # giữ các field chỉ có ở local (vd done)
+        merged = dict(old.to_dict(), **task)
+        if merged == old.to_dict():
+            return False
+        store.update(page_id, merged)
+        return True
+    if loc:
+        store.delete(page_id)
+    store.add(date, task)
+    return True
+
+
+def pages_hash(pages, window=None):
+    """Băm phần nội dung mà kho dùng tới (id, ngày, task), bỏ qua các field khác của trang"""
+    h = hashlib.sha1(json.dumps(window).encode())
+    for page in pages:
+        item = page_to_task(page)
+        h.update(json.dumps([page.get("id"), item], sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def fetch_changes(query, since=None, window=None):
+    """
+    Tải các trang cần đồng bộ (chỉ gọi mạng, không đụng tới kho nên chạy được ở thread khác).
+    since=None: toàn bộ trang có Date trong cửa sổ window (lọc phía server).
+    Ngược lại chỉ lấy delta: trang có last_edited_time >= since, kể cả trang
+    vừa bị dời ra ngoài cửa sổ để local xoá đi.
+    Notion làm tròn last_edited_time theo phút nên dùng on_or_after,
+    trang trùng mốc được áp dụng lại (apply_page idempotent).
+    """
+    body = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}]}
+    if since:
+        body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+    elif window:
+        body["filter"] = date_filter(window)
+    return list(iter_pages(query, body))
+
+
+def apply_changes(store, pages, state, since=None, window=None):
+    """
+    Gộp các trang từ fetch_changes(query, since, window) vào kho và dời mốc đồng bộ.
+    Nếu là lần tải toàn bộ (since=None) thì xoá các task không còn trên Notion
+    và mọi task nằm ngoài cửa sổ.
+    Nội dung trùng với lần tải trước (cùng hash) thì bỏ qua, kho không bị ghi lại.
+    Trả về số task đã thay đổi.
+    """
+    digest = pages_hash(pages, window)
+    state.meta["fetched_at"] = time.time()
+    if digest == state.meta.get("hash"):
+        state.save()
+        return 0
+
+    seen = set()
+    changed = 0
+    high = since
+    for page in pages:
+        seen.add(page.get("id"))
+        if apply_page(store, page, window):
+            changed += 1
+        edited = page.get("last_edited_time")
+        if edited and (high is None or edited > high):
+            high = edited
+
+    if since is None:
+        if window:
+            store.drop_before(window[0])
+        for date in list(store.dates()):
+            outside = window and not (window[0] <= date <= window[1])
+            for t in list(store.day(date)):
+                if outside or t.id not in seen:
+                    store.delete(t.id)
+                    changed += 1
+        state.meta["window"] = list(window) if window else None
+
+    state.meta["last_edited"] = high
+    state.meta["hash"] = digest
+    state.save()
+    return changed
+
+
+def sync_database(store, query, state, full=False, window=None, ttl=TTL_SECONDS):
+    """
+    Đồng bộ database Notion vào kho (chỉ các ngày trong window, mặc định date_window()).
+    - Dữ liệu còn mới (tải chưa quá ttl giây): không gọi mạng, trả về 0.
+    - Lần đầu, sang ngày mới hoặc full=True: tải toàn bộ cửa sổ, dọn task đã xoá.
+    - Các lần sau: chỉ tải trang sửa sau mốc đã lưu.
+    Trả về số task đã thay đổi.
+    """
+    window = window or date_window()
+    since = state.since(window, full)
+    if since is not None and state.is_fresh(ttl):
+        return 0
+    return apply_changes(store, fetch_changes(query, since, window), state, since, window)
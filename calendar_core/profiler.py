@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import time
+
+# CALENDAR_PROFILE=1 in bảng thời gian khởi động ra stderr,
+# đặt là đường dẫn file thì nối thêm một dòng JSON mỗi lần chạy (so sánh giữa các phiên bản)
+PROFILE_ENV = "CALENDAR_PROFILE"
+
+
+class StartupProfiler:
+    """
+    Đo thời gian từng giai đoạn khởi động: mark(tên) ghi lại thời gian
+    kể từ mark trước đó (hoặc từ lúc tạo profiler, tức lúc import module này).
+    """
+
+    def __init__(self, target=None):
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self.phases = []
+        self.target = os.environ.get(PROFILE_ENV, "") if target is None else target
+        self.reported = False
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    def elapsed_ms(self):
+        return (self._last - self.t0) * 1000
+
+    def as_dict(self):
+        return {"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "total_ms": round(self.elapsed_ms(), 1),
+                "phases": {name: round(ms, 1) for name, ms in self.phases}}
+
+    def report(self):
+        """In/ghi kết quả một lần (chỉ khi bật bằng biến môi trường)"""
+        if self.reported or self.target in ("", "0"):
+            return
+        self.reported = True
+        if self.target == "1":
+            width = max(len(name) for name, _ in self.phases)
+            for name, ms in self.phases:
+                print(f"[startup] {name:<{width}} {ms:8.1f} ms", file=sys.stderr)
+            print(f"[startup] {'total':<{width}} {self.elapsed_ms():8.1f} ms", file=sys.stderr)
+            return
+        with open(self.target, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.as_dict()) + "\n")
+
+
+# profiler dùng chung của tiến trình, mốc 0 là lúc module này được import lần đầu
+startup = StartupProfiler()
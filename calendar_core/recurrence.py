@@ -0,0 +1,234 @@
+import json
+from datetime import date as Date, datetime, timedelta
+from pathlib import Path
+
+from calendar_core.task_model import Task
+from calendar_core.writer import atomic_write_bytes, writer as default_writer
+
+
+# Các field của task mẫu mà một lần lặp được phép ghi đè riêng
+OVERRIDE_FIELDS = ("title", "start", "end", "description", "priority", "done")
+# id của một lần lặp: "<id rule>@<YYYY-MM-DD>"
+OCCURRENCE_SEP = "@"
+
+
+def _day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if isinstance(value, str) else value
+
+
+def occurrence_id(rule_id, date):
+    return f"{rule_id}{OCCURRENCE_SEP}{date}"
+
+
+def split_occurrence(task_id):
+    """(id rule, date) nếu task_id là id của một lần lặp, ngược lại None"""
+    if not task_id or OCCURRENCE_SEP not in task_id:
+        return None
+    rule_id, _, date = task_id.rpartition(OCCURRENCE_SEP)
+    return rule_id, date
+
+
+class Rule:
+    """
+    Một task lặp lại, lưu một lần duy nhất:
+    - freq "daily": mỗi interval ngày; "weekly": các thứ trong weekdays (0 = thứ 2), mỗi interval tuần
+    - start: ngày đầu tiên; until (tính cả ngày đó) và/hoặc count giới hạn số lần
+    - exceptions: các ngày bị bỏ; overrides: {date: {field: giá trị}} chỉ chứa field khác mẫu
+    """
+    __slots__ = ("id", "task", "freq", "interval", "weekdays", "start", "until", "count",
+                 "exceptions", "overrides")
+
+    def __init__(self, task, freq="daily", start=None, interval=1, weekdays=(), until=None,
+                 count=None, exceptions=(), overrides=None, id=None):
+        if freq not in ("daily", "weekly"):
+            raise ValueError(f"freq không hợp lệ: {freq}")
+        if not id:
+            import uuid
+            id = str(uuid.uuid4())
+        self.id = id
+        self.task = task
+        self.freq = freq
+        self.interval = max(1, int(interval))
+        self.start = _day(start or Date.today())
+        self.weekdays = sorted(set(weekdays)) or [self.start.weekday()]
+        self.until = _day(until) if until else None
+        self.count = count or None
+        self.exceptions = set(exceptions)
+        self.overrides = overrides or {}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(Task.from_dict(d.get("task", {})), d.get("freq", "daily"), d.get("start"),
+                   d.get("interval", 1), d.get("weekdays", ()), d.get("until"), d.get("count"),
+                   d.get("exceptions", ()), d.get("overrides"), d.get("id"))
+
+    def to_dict(self):
+        d = {"id": self.id, "task": self.task.to_dict(), "freq": self.freq, "interval": self.interval,
+             "start": self.start.isoformat()}
+        if self.freq == "weekly":
+            d["weekdays"] = self.weekdays
+        if self.until:
+            d["until"] = self.until.isoformat()
+        if self.count:
+            d["count"] = self.count
+        if self.exceptions:
+            d["exceptions"] = sorted(self.exceptions)
+        if self.overrides:
+            d["overrides"] = self.overrides
+        return d
+
+    # ---------- sinh ngày ----------
+    def _dates(self, first):
+        """Sinh lần lượt các ngày lặp (date) từ ngày first trở đi, chưa xét until/exceptions"""
+        if self.freq == "daily":
+            n = 0
+            if not self.count and first > self.start:
+                # không giới hạn số lần -> nhảy thẳng tới lần đầu >= first
+                n = -(-(first - self.start).days // self.interval)
+            while self.count is None or n < self.count:
+                yield self.start + timedelta(days=n * self.interval)
+                n += 1
+            return
+        week = self.start - timedelta(days=self.start.weekday())
+        if not self.count and first > week:
+            skip = (first - week).days // 7 // self.interval
+            week += timedelta(weeks=skip * self.interval)
+        n = 0
+        while True:
+            for wd in self.weekdays:
+                d = week + timedelta(days=wd)
+                if d < self.start:
+                    continue
+                if self.count is not None and n >= self.count:
+                    return
+                n += 1
+                yield d
+            week += timedelta(weeks=self.interval)
+
+    def occurrences(self, start, end):
+        """Generator các ngày "YYYY-MM-DD" có lần lặp trong [start, end)"""
+        start, end = _day(start), _day(end)
+        if self.until and self.until < end:
+            end = self.until + timedelta(days=1)
+        for d in self._dates(start):
+            if d >= end:
+                return
+            if d < start:
+                continue
+            key = d.isoformat()
+            if key not in self.exceptions:
+                yield key
+
+    def make(self, date):
+        """Task của lần lặp vào ngày date (mẫu + override của riêng ngày đó)"""
+        t = self.task.copy()
+        t.id = occurrence_id(self.id, date)
+        for field, value in self.overrides.get(date, {}).items():
+            setattr(t, field, value)
+        t.done = bool(t.done)
+        return t
+
+
+class RuleSet:
+    """
+    Các rule lặp lại, lưu cạnh data.json (data.rules.json), tách khỏi kho task:
+    lần lặp không bao giờ được ghi ra file mà chỉ sinh ra khi hỏi tới ngày đó.
+    Sửa/đánh dấu xong một lần lặp chỉ lưu phần khác biệt vào overrides.
+    subscribe(fn): fn(rule_id) được gọi sau mỗi thay đổi của rule đó (thêm/sửa/xoá/override/bỏ một lần),
+    rule_id không còn trong rules nghĩa là rule đã bị xoá.
+    """
+    _listeners = ()
+
+    def __init__(self, path, writer=None):
+        self.path = Path(path)
+        self.writer = writer or default_writer
+        self.revision = 0
+        self.rules = {}
+        try:
+            meta = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = {}
+        for d in meta.get("rules", []):
+            rule = Rule.from_dict(d)
+            self.rules[rule.id] = rule
+
+    @classmethod
+    def beside(cls, data_file, writer=None):
+        data_file = Path(data_file)
+        return cls(data_file.with_name(data_file.stem + ".rules.json"), writer)
+
+    def subscribe(self, fn):
+        self._listeners = self._listeners + (fn,)
+
+    def unsubscribe(self, fn):
+        self._listeners = tuple(f for f in self._listeners if f is not fn)
+
+    def _changed(self, rule_id):
+        self.revision += 1
+        data = json.dumps({"rules": [r.to_dict() for r in self.rules.values()]},
+                          ensure_ascii=False, indent=2).encode("utf-8")
+        self.writer.submit(("rules", str(self.path)), lambda: atomic_write_bytes(self.path, data))
+        for fn in self._listeners:
+            fn(rule_id)
+
+    # ---------- đọc ----------
+    def day(self, date):
+        """Các lần lặp rơi vào ngày date"""
+        nxt = _day(date) + timedelta(days=1)
+        return [r.make(date) for r in self.rules.values() for _ in r.occurrences(date, nxt)]
+
+    def range(self, start, end):
+        """Các ngày trong [start, end) -> {date: [task, ...]}, như store.range"""
+        days = {}
+        for rule in self.rules.values():
+            for date in rule.occurrences(start, end):
+                days.setdefault(date, []).append(rule.make(date))
+        return days
+
+    def get(self, task_id):
+        occ = split_occurrence(task_id)
+        rule = self.rules.get(occ[0]) if occ else None
+        return rule.make(occ[1]) if rule else None
+
+    def rule_of(self, task_id):
+        occ = split_occurrence(task_id)
+        return self.rules.get(occ[0]) if occ else None
+
+    # ---------- ghi ----------
+    def add(self, rule):
+        self.rules[rule.id] = rule
+        self._changed(rule.id)
+        return rule.id
+
+    def remove(self, rule_id):
+        if self.rules.pop(rule_id, None) is not None:
+            self._changed(rule_id)
+
+    def override(self, task_id, task):
+        """Ghi đè một lần lặp bằng task; chỉ giữ các field khác với mẫu"""
+        rule_id, date = split_occurrence(task_id)
+        rule = self.rules[rule_id]
+        diff = {}
+        for field in OVERRIDE_FIELDS:
+            value = getattr(task, field)
+            base = bool(rule.task.done) if field == "done" else getattr(rule.task, field)
+            if value != base:
+                diff[field] = value
+        if diff:
+            rule.overrides[date] = diff
+        else:
+            rule.overrides.pop(date, None)
+        self._changed(rule_id)
+
+    def set_done(self, task_id, done):
+        task = self.get(task_id)
+        task.done = bool(done)
+        self.override(task_id, task)
+
+    def skip(self, task_id):
+        """Bỏ riêng một lần lặp (thêm vào exceptions)"""
+        rule_id, date = split_occurrence(task_id)
+        rule = self.rules[rule_id]
+        rule.exceptions.add(date)
+        rule.overrides.pop(date, None)
+        self._changed(rule_id)
@@ -0,0 +1,97 @@
+import heapq
+from datetime import datetime, timedelta
+
+
+# Sự kiện bị lỡ (máy ngủ, timer trễ) quá lâu thì bỏ qua thay vì báo muộn
+CATCH_UP_MINUTES = 30
+
+
+class Reminder:
+    __slots__ = ("when", "kind", "date", "task", "lead")
+
+    def __init__(self, when, kind, date, task, lead=0):
+        self.when = when      # epoch seconds
+        self.kind = kind      # "start" hoặc "end"
+        self.date = date
+        self.task = task
+        self.lead = lead      # báo trước bao nhiêu phút (chỉ với "start")
+
+    def key(self):
+        return (self.date, self.kind, self.lead, self.task.id, self.task.start)
+
+
+class ReminderQueue:
+    """
+    Hàng đợi ưu tiên các mốc bắt đầu/kết thúc sắp tới.
+    Chỉ cần hẹn một timer tới next_time(), khi timer nổ thì pop_due() trả về
+    mọi sự kiện đã tới hạn (kể cả những cái bị lỡ trong lúc máy ngủ).
+    """
+
+    def __init__(self, lead_minutes=(0,), catch_up_minutes=CATCH_UP_MINUTES):
+        self.lead_minutes = tuple(lead_minutes)
+        self.catch_up = catch_up_minutes * 60
+        self._heap = []
+        self._seq = 0
+        self._fired = set()
+        self._snoozed = []
+        self._checked = None    # lúc gọi pop_due gần nhất
+
+    def _push(self, ev):
+        self._seq += 1
+        heapq.heappush(self._heap, (ev.when, self._seq, ev))
+
+    def rebuild(self, days, now):
+        """
+        days: {date: [task, ...]}; bỏ các sự kiện đã báo.
+        Lần đầu chỉ giữ từ phút hiện tại; về sau giữ cả sự kiện tới hạn từ lần pop_due trước
+        mà chưa kịp báo (dữ liệu đổi ngay trước khi timer nổ), trong giới hạn CATCH_UP_MINUTES.
+        """
+        self._heap = []
+        if self._checked is None:
+            floor = now - now % 60
+        else:
+            floor = max(self._checked, now - self.catch_up)
+        for date, tasks in days.items():
+            try:
+                base = datetime.strptime(date, "%Y-%m-%d")
+            except ValueError:
+                continue
+            for t in tasks:
+                if t.done:
+                    continue
+                span = t.span()
+                if span is None:
+                    continue
+                start, end = span
+                events = [Reminder((base + timedelta(minutes=start - lead)).timestamp(), "start", date, t, lead)
+                          for lead in self.lead_minutes]
+                events.append(Reminder((base + timedelta(minutes=end)).timestamp(), "end", date, t))
+                for ev in events:
+                    if ev.when >= floor and ev.key() not in self._fired:
+                        self._push(ev)
+        for ev in self._snoozed:
+            self._push(ev)
+        # những key đã báo của các ngày không còn theo dõi thì bỏ đi
+        self._fired = {k for k in self._fired if k[0] in days}
+
+    def next_time(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Lấy mọi sự kiện có when <= now, bỏ những cái trễ quá CATCH_UP_MINUTES"""
+        due = []
+        self._checked = now
+        while self._heap and self._heap[0][0] <= now:
+            _, _, ev = heapq.heappop(self._heap)
+            self._fired.add(ev.key())
+            if ev in self._snoozed:
+                self._snoozed.remove(ev)
+            if now - ev.when <= self.catch_up:
+                due.append(ev)
+        return due
+
+    def snooze(self, ev, minutes, now):
+        """Báo lại sự kiện ev sau minutes phút"""
+        again = Reminder(now + minutes * 60, ev.kind, ev.date, ev.task, ev.lead)
+        self._snoozed.append(again)
+        self._push(again)
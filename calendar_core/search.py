@@ -0,0 +1,181 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import date as Date, timedelta
+
+from calendar_core.recurrence import occurrence_id
+
+# Trọng số: khớp ở tiêu đề quan trọng hơn mô tả, khớp trọn từ hơn khớp tiền tố
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+EXACT_BONUS = 2
+
+_WORD = re.compile(r"\w+")
+# kết quả là task lặp lại thì trỏ tới lần lặp gần nhất trong khoảng này tính từ hôm nay
+NEXT_OCCURRENCE_DAYS = 366
+
+
+def fold(text):
+    """Bỏ dấu tiếng Việt và viết thường: "Đi học Toán" -> "di hoc toan" """
+    text = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _WORD.findall(fold(text or ""))
+
+
+class SearchIndex:
+    """
+    Chỉ mục ngược trên title/description của mọi task.
+    postings: từ -> {id task: điểm}; vocab là list các từ đã sort nên
+    tìm theo tiền tố chỉ là một đoạn bisect. Cập nhật tăng dần qua store.subscribe.
+    Task lặp lại (rules) được đánh chỉ mục một lần theo rule (date None, lúc trả kết quả
+    mới tính ra lần lặp gần nhất), cộng các lần lặp có override đổi title/description.
+    Lịch sử trong archive được đọc (chỉ đọc) qua archive.month ở lần tìm đầu tiên; sau đó
+    tháng nào có segment mới (roll vừa chuyển thêm ngày vào) thì lần tìm kế tiếp đọc lại tháng đó.
+    """
+
+    def __init__(self, store, rules=None, archive=None):
+        self.store = store
+        self.rules = rules
+        self.archive = archive
+        self.postings = {}
+        self.vocab = []
+        self._docs = {}     # id -> (date, title, {từ: điểm})
+        self._rule_docs = {}    # id rule -> [id doc, ...]
+        self._archived = {}     # "YYYY-MM" -> (danh sách segment đã đọc, [id doc, ...])
+        for date in store.dates():
+            for t in store.day(date):
+                self._add(date, t)
+        if rules is not None:
+            for rule_id in rules.rules:
+                self._add_rule(rule_id)
+        self.vocab.sort()
+        store.subscribe(self._on_change)
+        if rules is not None:
+            rules.subscribe(self._on_rule_change)
+
+    def _add(self, date, task, keep_sorted=False, doc_id=None):
+        doc_id = doc_id or task.id
+        weights = {}
+        for word in tokenize(task.title):
+            weights[word] = weights.get(word, 0) + TITLE_WEIGHT
+        for word in tokenize(task.description):
+            weights[word] = weights.get(word, 0) + DESCRIPTION_WEIGHT
+        self._docs[doc_id] = (date, task.title, weights)
+        for word, w in weights.items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = {}
+                if keep_sorted:
+                    insort(self.vocab, word)
+                else:
+                    self.vocab.append(word)
+            posting[doc_id] = w
+
+    def _remove(self, task_id):
+        doc = self._docs.pop(task_id, None)
+        if doc is None:
+            return
+        for word in doc[2]:
+            posting = self.postings[word]
+            posting.pop(task_id, None)
+            if not posting:
+                del self.postings[word]
+                del self.vocab[bisect_left(self.vocab, word)]
+
+    def _on_change(self, date, old, new):
+        if old is not None:
+            self._remove(old.id)
+        if new is not None:
+            self._add(date, new, keep_sorted=True)
+
+    def _add_rule(self, rule_id, keep_sorted=False):
+        rule = self.rules.rules.get(rule_id)
+        if rule is None:
+            return
+        docs = self._rule_docs[rule_id] = [rule_id]
+        self._add(None, rule.task, keep_sorted, doc_id=rule_id)
+        for date, diff in rule.overrides.items():
+            if ("title" in diff or "description" in diff) and date not in rule.exceptions:
+                doc_id = occurrence_id(rule_id, date)
+                docs.append(doc_id)
+                self._add(date, rule.make(date), keep_sorted, doc_id=doc_id)
+
+    def _on_rule_change(self, rule_id):
+        for doc_id in self._rule_docs.pop(rule_id, ()):
+            self._remove(doc_id)
+        self._add_rule(rule_id, keep_sorted=True)
+
+    def _sync_archive(self):
+        months = self.archive.months
+        stale = [k for k in self._archived if k not in months]
+        fresh = [k for k, parts in months.items() if self._archived.get(k, (None,))[0] != parts]
+        for key in stale + fresh:
+            for doc_id in self._archived.pop(key, (None, ()))[1]:
+                # task còn trong kho (roll bị ngắt giữa chừng) thì doc là của kho, không đụng tới
+                if self.store.locate(doc_id) is None:
+                    self._remove(doc_id)
+        for key in fresh:
+            ids = []
+            for date, tasks in self.archive.month(key).items():
+                for t in tasks:
+                    if t.id and self.store.locate(t.id) is None:
+                        self._add(date, t)
+                        ids.append(t.id)
+            self._archived[key] = (list(months[key]), ids)
+        if fresh:
+            self.vocab.sort()
+
+    def _resolve(self, rule_id):
+        """(date, id lần lặp) mà kết quả của một rule trỏ tới: lần lặp tới, hoặc lần cuối nếu chuỗi đã hết"""
+        rule = self.rules.rules[rule_id]
+        today = Date.today()
+        date = next(rule.occurrences(today, today + timedelta(days=NEXT_OCCURRENCE_DAYS)), None)
+        if date is None:
+            date = max(rule.occurrences(rule.start, today), default=rule.start.isoformat())
+        return date, occurrence_id(rule_id, date)
+
+    def _prefix_scores(self, prefix):
+        scores = {}
+        i = bisect_left(self.vocab, prefix)
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            word = self.vocab[i]
+            bonus = EXACT_BONUS if word == prefix else 0
+            for task_id, w in self.postings[word].items():
+                scores[task_id] = max(scores.get(task_id, 0), w + bonus)
+            i += 1
+        return scores
+
+    def search(self, query, limit=50):
+        """
+        Mọi từ trong query đều phải khớp (theo tiền tố) với một từ của task.
+        Trả về list (date, id, title) theo điểm giảm dần, cùng điểm thì ngày mới hơn trước.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        if self.archive is not None:
+            self._sync_archive()
+        total = None
+        # xét từ hiếm trước để tập ứng viên nhỏ nhanh
+        for scores in sorted((self._prefix_scores(w) for w in words), key=len):
+            if total is None:
+                total = scores
+            else:
+                total = {k: v + scores[k] for k, v in total.items() if k in scores}
+            if not total:
+                return []
+        docs = self._docs
+        # chỉ doc của rule (date None) mới phải tính ra lần lặp trước khi xếp hạng
+        resolved = {k: self._resolve(k) for k in self._rule_docs if k in total}
+        ranked = heapq.nlargest(limit, total.items(),
+                                key=lambda kv: (kv[1], docs[kv[0]][0] or resolved[kv[0]][0]))
+        return [resolved.get(k, (docs[k][0], k)) + (docs[k][1],) for k, _ in ranked]
+
+    def close(self):
+        self.store.unsubscribe(self._on_change)
+        if self.rules is not None:
+            self.rules.unsubscribe(self._on_rule_change)
@@ -0,0 +1,451 @@
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from calendar_core.journal import TaskJournal, apply_record
+from calendar_core.metrics import metrics
+from calendar_core.task_model import Task, as_task, format_hhmm, utc_stamp
+from calendar_core.writer import writer as default_writer
+
+
+
+def open_store(path, backend=None, readonly=False):
+    """
+    Mở kho task cho file dữ liệu path (data.json / tasks.json).
+    backend: "json" (mặc định) hoặc "sqlite", có thể đặt bằng biến môi trường CALENDAR_STORE.
+    Lần đầu mở sqlite mà chưa có file .db thì tự migrate từ file JSON cũ.
+    readonly=True: không ghi gì xuống đĩa (không gán id, không compact, không migrate), mọi thao tác ghi báo lỗi.
+    """
+    backend = backend or os.environ.get("CALENDAR_STORE", "json")
+    path = Path(path)
+    if backend == "json":
+        return JsonStore(path, readonly=readonly)
+    if backend == "sqlite":
+        db_path = path.with_suffix(".db")
+        if readonly and not db_path.exists():
+            # chưa migrate thì đọc thẳng file JSON
+            return JsonStore(path, readonly=True)
+        if not db_path.exists() and path.exists():
+            migrate_json_to_sqlite(path, db_path)
+        return SqliteStore(db_path, readonly=readonly)
+    raise ValueError(f"backend không hợp lệ: {backend}")
+
+
+def new_task_id():
+    # uuid/sqlite3 import khá lâu, chỉ nạp khi thật sự cần (CLI agenda chỉ đọc thì không)
+    import uuid
+    return str(uuid.uuid4())
+
+
+def ensure_ids(data):
+    """Gán id cho mọi Task chưa có (task Notion đã có sẵn id), trả về True nếu có gán mới"""
+    changed = False
+    for tasks in data.values():
+        for t in tasks:
+            if not t.id:
+                t.id = new_task_id()
+                changed = True
+    return changed
+
+
+def _keep_date(date_str, cutoff):
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return date_str >= cutoff
+
+
+# ============================================================
+# JSON (snapshot + journal)
+class _Listeners:
+    """
+    Cho phép đăng ký hàm fn(date, old, new) được gọi sau mỗi thay đổi:
+    thêm (old=None), sửa/đánh dấu xong (cả hai là Task), xoá (new=None).
+    Các chỉ mục phụ (heat-map, tìm kiếm...) dùng nó để cập nhật tăng dần.
+    """
+    _listeners = ()
+
+    def subscribe(self, fn):
+        self._listeners = self._listeners + (fn,)
+
+    def unsubscribe(self, fn):
+        self._listeners = tuple(f for f in self._listeners if f is not fn)
+
+    def _notify(self, date, old, new):
+        for fn in self._listeners:
+            fn(date, old, new)
+
+
+# ============================================================
+class JsonStore(_Listeners):
+    """
+    Giữ toàn bộ dict {date: [task, ...]} trong RAM, ghi thay đổi qua journal.
+    Mỗi task có "id" cố định, _by_id cho biết nó nằm ở (date, vị trí) nào.
+    """
+
+    def __init__(self, path, journal_path=None, readonly=False):
+        self.journal = TaskJournal(path, journal_path, readonly=readonly)
+        self.data = self.journal.load(make=as_task)
+        # tăng sau mỗi thay đổi, để các chỉ mục biết khi nào cần dựng lại
+        self.revision = 0
+        self._by_id = {}
+        # chỉ đọc: task cũ chưa có id cứ để vậy, id sinh ra sẽ không được lưu lại
+        if not readonly and ensure_ids(self.data):
+            # dữ liệu cũ chưa có id -> gán một lần rồi gộp vào snapshot
+            self.journal.compact(self.data)
+        for date in self.data:
+            self._reindex(date)
+
+    def _apply(self, rec):
+        # kiểm tra trước khi đổi data trong RAM
+        self.journal.check_writable()
+        metrics.count("persist.saves")
+        apply_record(self.data, rec, as_task)
+        self.revision += 1
+        self.journal.append(rec, self.data)
+
+    def _reindex(self, date):
+        for pos, t in enumerate(self.data.get(date, [])):
+            self._by_id[t.id] = (date, pos)
+
+    def day(self, date):
+        return self.data.get(date, [])
+
+    def range(self, start, end):
+        """Các ngày trong [start, end) -> {date: [task, ...]}"""
+        return {d: t for d, t in self.data.items() if start <= d < end}
+
+    def dates(self):
+        return sorted(self.data)
+
+    def locate(self, task_id):
+        """(date, vị trí) của task, None nếu không có"""
+        return self._by_id.get(task_id)
+
+    def get(self, task_id):
+        loc = self._by_id.get(task_id)
+        return self.data[loc[0]][loc[1]] if loc else None
+
+    def add(self, date, task):
+        task = as_task(task)
+        task.id = task.id or new_task_id()
+        task.touch()
+        self._apply({"op": "add", "date": date, "task": task})
+        self._by_id[task.id] = (date, len(self.data[date]) - 1)
+        self._notify(date, None, task)
+        return task.id
+
+    def update(self, task_id, task):
+        date, idx = self._by_id[task_id]
+        task = as_task(task)
+        task.id = task_id
+        task.touch()
+        old = self.data[date][idx]
+        self._apply({"op": "set", "date": date, "idx": idx, "task": task})
+        self._notify(date, old, task)
+
+    def set_done(self, task_id, value):
+        date, idx = self._by_id[task_id]
+        old = self.data[date][idx].copy() if self._listeners else None
+        self._apply({"op": "done", "date": date, "idx": idx, "value": value, "at": utc_stamp()})
+        self._notify(date, old, self.data[date][idx])
+
+    def delete(self, task_id):
+        date, idx = self._by_id.pop(task_id)
+        old = self.data[date][idx]
+        self._apply({"op": "del", "date": date, "idx": idx})
+        self._reindex(date)
+        self._notify(date, old, None)
+
+    def replace_day(self, date, tasks):
+        tasks = [as_task(t) for t in tasks]
+        ensure_ids({date: tasks})
+        for t in tasks:
+            # task (vd trang Notion) đã đổi sang ngày này -> bỏ bản cũ ở ngày khác
+            loc = self._by_id.get(t.id)
+            if loc and loc[0] != date:
+                self.delete(t.id)
+        old = list(self.data.get(date, []))
+        for t in old:
+            self._by_id.pop(t.id, None)
+        self._apply({"op": "day", "date": date, "tasks": tasks})
+        self._reindex(date)
+        for t in old:
+            self._notify(date, t, None)
+        for t in tasks:
+            self._notify(date, None, t)
+
+    def drop_before(self, cutoff):
+        """Xóa các ngày < cutoff (và key không phải ngày), trả về số ngày đã xóa"""
+        new_data = {d: t for d, t in self.data.items() if _keep_date(d, cutoff)}
+        removed = len(self.data) - len(new_data)
+        if removed:
+            self.journal.check_writable()
+            old = self.data
+            self.data = new_data
+            self.revision += 1
+            self._by_id = {}
+            for date in self.data:
+                self._reindex(date)
+            self.journal.compact(self.data)
+            if self._listeners:
+                for date, tasks in old.items():
+                    if date not in new_data:
+                        for t in tasks:
+                            self._notify(date, t, None)
+        return removed
+
+    def close(self):
+        self.journal.writer.flush()
+
+
+# ============================================================
+# SQLite
+# ============================================================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT,
+    date TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    title TEXT,
+    time TEXT,
+    "to" TEXT,
+    description TEXT,
+    priority INTEGER,
+    done INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks(date, pos);
+CREATE INDEX IF NOT EXISTS idx_tasks_date_done ON tasks(date, done);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+"""
+
+_COLUMNS = 'id, title, time, "to", description, priority, done, extra'
+_INSERT = f"INSERT INTO tasks (date, pos, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _task_to_row(task):
+    return [
+        task.id, task.title,
+        format_hhmm(task.start) if task.start is not None else None,
+        format_hhmm(task.end) if task.end is not None else None,
+        task.description, task.priority,
+        int(task.done) if task.done is not None else None,
+        json.dumps(task.extra, ensure_ascii=False) if task.extra else None,
+    ]
+
+
+def _row_to_task(row):
+    d = {"id": row[0]}
+    for k, v in zip(("title", "time", "to", "description", "priority"), row[1:6]):
+        if v is not None:
+            d[k] = v
+    if row[6] is not None:
+        d["done"] = bool(row[6])
+    if row[7]:
+        d.update(json.loads(row[7]))
+    return Task.from_dict(d)
+
+
+class SqliteStore(_Listeners):
+    """
+    Task nằm trong SQLite, chỉ đọc những ngày được hỏi tới.
+    Thay đổi được thực hiện ngay trong transaction đang mở, còn COMMIT
+    (phần tốn fsync) do BackgroundWriter gộp lại và chạy ở luồng nền.
+    """
+
+    def __init__(self, path, writer=None, readonly=False):
+        import sqlite3
+        if readonly:
+            # mode=ro: không tạo file, không đổi schema/journal_mode, lệnh ghi nào cũng lỗi
+            uri = Path(path).resolve().as_uri() + "?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(str(path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            self._upgrade_ids()
+        self.writer = writer or default_writer
+        self.revision = 0
+        self._lock = threading.RLock()
+
+    def _upgrade_ids(self):
+        # file .db tạo trước khi có cột id: thêm cột, lấy id Notion trong extra nếu có, còn lại sinh mới
+        cols = [r[1] for r in self.conn.execute("PRAGMA table_info(tasks)")]
+        with self.conn:
+            if "id" not in cols:
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN id TEXT")
+            rows = self.conn.execute("SELECT rowid, extra FROM tasks WHERE id IS NULL").fetchall()
+            for rowid, extra in rows:
+                extra = json.loads(extra) if extra else {}
+                task_id = extra.pop("id", None) or new_task_id()
+                self.conn.execute("UPDATE tasks SET id = ?, extra = ? WHERE rowid = ?",
+                                  (task_id, json.dumps(extra, ensure_ascii=False) if extra else None, rowid))
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_id ON tasks(id)")
+
+    @contextmanager
+    def _tx(self):
+        with self._lock:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            self.conn.execute("SAVEPOINT op")
+            try:
+                yield
+            except Exception:
+                self.conn.execute("ROLLBACK TO op")
+                raise
+            finally:
+                self.conn.execute("RELEASE op")
+            self.revision += 1
+        metrics.count("persist.saves")
+        self.writer.submit(("sqlite", id(self)), self._commit)
+
+    def _commit(self):
+        with self._lock:
+            if self.conn is not None and self.conn.in_transaction:
+                with metrics.timer("persist.commit"):
+                    self.conn.commit()
+
+    def day(self, date):
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {_COLUMNS} FROM tasks WHERE date = ? ORDER BY pos", (date,)).fetchall()
+        return [_row_to_task(r) for r in rows]
+
+    def range(self, start, end):
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT date, {_COLUMNS} FROM tasks WHERE date >= ? AND date < ? ORDER BY date, pos",
+                (start, end)).fetchall()
+        out = {}
+        for r in rows:
+            out.setdefault(r[0], []).append(_row_to_task(r[1:]))
+        return out
+
+    def dates(self):
+        with self._lock:
+            return [r[0] for r in self.conn.execute("SELECT DISTINCT date FROM tasks ORDER BY date")]
+
+    def locate(self, task_id):
+        with self._lock:
+            row = self.conn.execute("SELECT date, pos FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return tuple(row) if row else None
+
+    def get(self, task_id):
+        with self._lock:
+            row = self.conn.execute(f"SELECT {_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _row_to_task(row) if row else None
+
+    def add(self, date, task):
+        task = as_task(task)
+        task.id = task.id or new_task_id()
+        task.touch()
+        with self._tx():
+            pos = self.conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE date = ?", (date,)).fetchone()[0]
+            self.conn.execute(_INSERT, [date, pos] + _task_to_row(task))
+        self._notify(date, None, task)
+        return task.id
+
+    def update(self, task_id, task):
+        task = as_task(task)
+        task.id = task_id
+        task.touch()
+        old = self.get(task_id) if self._listeners else None
+        with self._tx():
+            self.conn.execute(
+                'UPDATE tasks SET id = ?, title = ?, time = ?, "to" = ?, description = ?, priority = ?, '
+                'done = ?, extra = ? WHERE id = ?',
+                _task_to_row(task) + [task_id])
+        if old is not None:
+            self._notify(self.locate(task_id)[0], old, task)
+
+    def set_done(self, task_id, value):
+        old = self.get(task_id) if self._listeners else None
+        with self._tx():
+            self.conn.execute(
+                "UPDATE tasks SET done = ?, extra = json_set(COALESCE(extra, '{}'), '$.updated_at', ?) WHERE id = ?",
+                (int(bool(value)), utc_stamp(), task_id))
+        if old is not None:
+            self._notify(self.locate(task_id)[0], old, self.get(task_id))
+
+    def delete(self, task_id):
+        old = self.get(task_id) if self._listeners else None
+        with self._tx():
+            loc = self.locate(task_id)
+            if loc is None:
+                return
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self.conn.execute("UPDATE tasks SET pos = pos - 1 WHERE date = ? AND pos > ?", loc)
+        if old is not None:
+            self._notify(loc[0], old, None)
+
+    def replace_day(self, date, tasks):
+        tasks = [as_task(t) for t in tasks]
+        ensure_ids({date: tasks})
+        with self._tx():
+            for t in tasks:
+                loc = self.locate(t.id)
+                if loc and loc[0] != date:
+                    self.delete(t.id)
+            old = self.day(date) if self._listeners else []
+            self.conn.execute("DELETE FROM tasks WHERE date = ?", (date,))
+            self.conn.executemany(_INSERT, [[date, i] + _task_to_row(t) for i, t in enumerate(tasks)])
+        for t in old:
+            self._notify(date, t, None)
+        if self._listeners:
+            for t in tasks:
+                self._notify(date, None, t)
+
+    def drop_before(self, cutoff):
+        dates = [d for d in self.dates() if not _keep_date(d, cutoff)]
+        if dates:
+            old = {d: self.day(d) for d in dates} if self._listeners else {}
+            with self._tx():
+                self.conn.executemany("DELETE FROM tasks WHERE date = ?", [(d,) for d in dates])
+            for date, tasks in old.items():
+                for t in tasks:
+                    self._notify(date, t, None)
+        return len(dates)
+
+    def close(self):
+        self._commit()
+        with self._lock:
+            self.conn.close()
+            self.conn = None
+
+
+def migrate_json_to_sqlite(json_path, db_path):
+    """Chuyển data.json / tasks.json (kể cả journal chưa gộp) sang SQLite, trả về số task"""
+    data = TaskJournal(json_path).load(make=Task.from_dict)
+    ensure_ids(data)
+    store = SqliteStore(db_path)
+    count = 0
+    try:
+        with store.conn:
+            for date, tasks in data.items():
+                store.conn.executemany(_INSERT, [[date, i] + _task_to_row(t) for i, t in enumerate(tasks)])
+                count += len(tasks)
+    finally:
+        store.close()
+    return count
+
+
+if __name__ == "__main__":
+    # python -m calendar_core.storage Calendar_Todo/data.json [Calendar_Todo/data.db]
+    if len(sys.argv) < 2:
+        print("Cách dùng: python -m calendar_core.storage <data.json> [<data.db>]")
+        sys.exit(1)
+    src = Path(sys.argv[1])
+    dst = Path(sys.argv[2]) if len(sys.argv) > 2 else src.with_suffix(".db")
+    if dst.exists():
+        print(f"{dst} đã tồn tại, bỏ qua")
+        sys.exit(1)
+    n = migrate_json_to_sqlite(src, dst)
+    print(f"✅ Đã chuyển {n} task sang {dst.name}")
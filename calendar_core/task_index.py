@@ -0,0 +1,51 @@
+from bisect import bisect_right
+
+from calendar_core.task_model import MINUTES_PER_DAY
+
+
+class DayIndex:
+    """
+    Chỉ mục khoảng thời gian của một ngày, dựng một lần mỗi khi dữ liệu đổi.
+    Task của hôm trước kéo qua nửa đêm (truyền qua prev_tasks) được dời về đầu ngày.
+    Truy vấn task đang chạy / mốc kế tiếp chỉ là bisect trên list số nguyên.
+    """
+    __slots__ = ("starts", "ends", "tasks", "best", "boundaries")
+
+    def __init__(self, tasks, prev_tasks=()):
+        spans = []
+        for t in tasks:
+            span = t.span()
+            if span:
+                spans.append((span[0], span[1], t))
+        for t in prev_tasks:
+            span = t.span()
+            if span and span[1] > MINUTES_PER_DAY:
+                spans.append((span[0] - MINUTES_PER_DAY, span[1] - MINUTES_PER_DAY, t))
+        spans.sort(key=lambda s: s[0])
+
+        self.starts = [s[0] for s in spans]
+        self.ends = [s[1] for s in spans]
+        self.tasks = [s[2] for s in spans]
+
+        # best[i]: trong các task 0..i (đã sort theo start), task có end lớn nhất
+        self.best = []
+        j = -1
+        for i, end in enumerate(self.ends):
+            if j < 0 or end > self.ends[j]:
+                j = i
+            self.best.append(j)
+
+        self.boundaries = sorted(set(self.starts) | set(self.ends))
+
+    def active_index(self, minute):
+        """Vị trí task đang chạy tại phút minute (trong self.tasks), -1 nếu không có"""
+        i = bisect_right(self.starts, minute) - 1
+        if i < 0:
+            return -1
+        j = self.best[i]
+        return j if self.ends[j] > minute else -1
+
+    def next_boundary(self, minute):
+        """Phút gần nhất sau minute mà có task bắt đầu hoặc kết thúc, None nếu hết"""
+        i = bisect_right(self.boundaries, minute)
+        return self.boundaries[i] if i < len(self.boundaries) else None
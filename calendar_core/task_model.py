@@ -0,0 +1,148 @@
+from datetime import datetime, timezone
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_hhmm(value):
+    """"HH:mm" -> số phút trong ngày, None nếu không hợp lệ"""
+    if not value:
+        return None
+    try:
+        h, m = value.split(":")
+        h, m = int(h), int(m)
+    except (ValueError, AttributeError):
+        return None
+    if not (0 <= h < 24 and 0 <= m < 60):
+        return None
+    return h * 60 + m
+
+
+def format_hhmm(minutes):
+    if minutes is None:
+        return ""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def utc_stamp():
+    """Thời điểm hiện tại theo UTC, cùng định dạng last_edited_time của Notion (so sánh chuỗi được)"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+class Task:
+    """
+    Một task trong bộ nhớ: giờ bắt đầu/kết thúc là số phút trong ngày (đã parse sẵn),
+    priority là int, done là bool. None nghĩa là key đó không có trong JSON gốc,
+    còn các key lạ (hoặc giá trị không parse được) nằm nguyên trong extra,
+    nên from_dict(d).to_dict() == d.
+    """
+    __slots__ = ("id", "title", "start", "end", "description", "priority", "done", "extra")
+
+    def __init__(self, title=None, start=None, end=None, description=None, priority=None,
+                 done=None, id=None, extra=None):
+        self.id = id
+        self.title = title
+        self.start = start
+        self.end = end
+        self.description = description
+        self.priority = priority
+        self.done = done
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, d):
+        extra = None
+        t = cls(title=d.get("title"), description=d.get("description"), id=d.get("id"))
+        for key, attr in (("time", "start"), ("to", "end")):
+            if key in d:
+                minutes = parse_hhmm(d[key])
+                if minutes is None:
+                    extra = extra or {}
+                    extra[key] = d[key]
+                else:
+                    setattr(t, attr, minutes)
+        p = d.get("priority")
+        if isinstance(p, int) and not isinstance(p, bool):
+            t.priority = p
+        elif "priority" in d:
+            extra = extra or {}
+            extra["priority"] = p
+        done = d.get("done")
+        if isinstance(done, bool):
+            t.done = done
+        elif "done" in d:
+            extra = extra or {}
+            extra["done"] = done
+        for k, v in d.items():
+            if k not in _KNOWN:
+                extra = extra or {}
+                extra[k] = v
+        t.extra = extra
+        return t
+
+    def to_dict(self):
+        d = {}
+        if self.title is not None:
+            d["title"] = self.title
+        if self.start is not None:
+            d["time"] = format_hhmm(self.start)
+        if self.end is not None:
+            d["to"] = format_hhmm(self.end)
+        if self.description is not None:
+            d["description"] = self.description
+        if self.priority is not None:
+            d["priority"] = self.priority
+        if self.done is not None:
+            d["done"] = self.done
+        if self.id is not None:
+            d["id"] = self.id
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def copy(self):
+        return Task(self.title, self.start, self.end, self.description, self.priority,
+                    self.done, self.id, dict(self.extra) if self.extra else None)
+
+    @property
+    def time(self):
+        return format_hhmm(self.start)
+
+    @property
+    def to(self):
+        return format_hhmm(self.end)
+
+    @property
+    def updated_at(self):
+        """Lần sửa gần nhất ở local (utc_stamp), lưu trong extra["updated_at"]"""
+        return self.extra.get("updated_at") if self.extra else None
+
+    def touch(self, stamp=None):
+        self.extra = dict(self.extra or {})
+        self.extra["updated_at"] = stamp or utc_stamp()
+
+    def span(self):
+        """(start, end) theo phút từ 0h của ngày chứa task; end <= start nghĩa là kéo sang hôm sau"""
+        if self.start is None or self.end is None:
+            return None
+        end = self.end
+        if end <= self.start:
+            end += MINUTES_PER_DAY
+        return self.start, end
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+
+_KNOWN = {"id", "title", "time", "to", "description", "priority", "done"}
+
+
+def as_task(value):
+    """Nhận Task hoặc dict theo schema JSON cũ, trả về Task"""
+    return value if isinstance(value, Task) else Task.from_dict(value)
+
+
+def task_to_json(obj):
+    """Dùng làm default= cho json.dumps khi dữ liệu chứa Task"""
+    if isinstance(obj, Task):
+        return obj.to_dict()
+    raise TypeError(f"Không serialize được {type(obj).__name__}")
@@ -0,0 +1,387 @@
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from calendar_core.notion_sync import (
+    DATE_PROPERTY, DONE_PROPERTY, TITLE_PROPERTY, fetch_changes, page_to_task, slim_page
+)
+from calendar_core.task_model import Task, parse_hhmm, utc_stamp
+from calendar_core.writer import atomic_write_bytes
+
+
+# Các field được đồng bộ hai chiều; date/time/to cùng nằm trong property Date của Notion
+SYNC_FIELDS = ("title", "date", "time", "to", "done")
+DATE_FIELDS = {"date", "time", "to"}
+# database query không trả về trang đã xoá: định kỳ tải toàn bộ để biết trang nào đã mất
+FULL_SYNC_EVERY = timedelta(days=1)
+
+
+def task_fields(date, task):
+    return {"title": task.title or "", "date": date, "time": task.time, "to": task.to,
+            "done": bool(task.done)}
+
+
+def page_fields(page):
+    """
+    Các field đồng bộ của một trang Notion, None nếu trang đã xoá hoặc không có ngày.
+    done là None khi database không có checkbox Done.
+    """
+    item = page_to_task(page)
+    if item is None:
+        return None
+    date, d = item
+    return {"title": d["title"], "date": date, "time": d["time"], "to": d["to"],
+            "done": d.get("done")}
+
+
+def _same(fields, base):
+    # field Notion không có (None) thì coi như chưa đổi
+    return all(fields[f] is None or fields[f] == base.get(f) for f in SYNC_FIELDS)
+
+
+def _local_iso(date, hhmm):
+    # giờ local kèm offset, Notion tự quy đổi
+    return datetime.strptime(f"{date} {hhmm}", "%Y-%m-%d %H:%M").astimezone().isoformat(timespec="seconds")
+
+
+def page_properties(fields, changed):
+    """Chỉ dựng các property Notion ứng với các field trong changed"""
+    props = {}
+    if "title" in changed:
+        props[TITLE_PROPERTY] = {"title": [{"text": {"content": fields["title"]}}]}
+    if changed & DATE_FIELDS:
+        end_date = fields["date"]
+        if parse_hhmm(fields["to"]) <= parse_hhmm(fields["time"]):
+            end_date = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        props[DATE_PROPERTY] = {"date": {"start": _local_iso(fields["date"], fields["time"]),
+                                         "end": _local_iso(end_date, fields["to"])}}
+    if "done" in changed:
+        props[DONE_PROPERTY] = {"checkbox": fields["done"]}
+    return props
+
+
+def merge_fields(base, local, remote, local_stamp, remote_stamp):
+    """
+    Gộp ba chiều từng field: chỉ một bên đổi thì lấy bên đó,
+    cả hai cùng đổi khác nhau thì bên có stamp mới hơn thắng (bằng nhau thì Notion thắng).
+    Trả về (merged, field cần đẩy lên, field cần kéo về).
+    """
+    remote = remote or base
+    local_wins = bool(local_stamp) and (not remote_stamp or local_stamp > remote_stamp)
+    merged, push, pull = {}, set(), set()
+    for f in SYNC_FIELDS:
+        b, l, r = base.get(f), local[f], remote[f]
+        if r is None:
+            r = b
+        if l == r or r == b:
+            merged[f] = l
+        elif l == b or not local_wins:
+            merged[f] = r
+        else:
+            merged[f] = l
+        if merged[f] != r:
+            push.add(f)
+        if merged[f] != l:
+            pull.add(f)
+    return merged, push, pull
+
+
+class LinkState:
+    """
+    Trạng thái đồng bộ hai chiều, lưu cạnh data.json (data.notion.json):
+    - links: {id task local: {"page": id trang Notion, "base": field lúc đồng bộ gần nhất}}
+    - remote_cursor: last_edited_time lớn nhất đã kéo về
+    - local_cursor: stamp lúc quét local gần nhất, task sửa sau đó mới phải so với base
+    - last_full: stamp của lượt tải toàn bộ (full) gần nhất đã xong
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = {}
+        try:
+            meta = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+        self.links = meta.get("links", {})
+        self.remote_cursor = meta.get("remote_cursor")
+        self.local_cursor = meta.get("local_cursor")
+        self.last_full = meta.get("last_full")
+
+    @classmethod
+    def beside(cls, data_file):
+        data_file = Path(data_file)
+        return cls(data_file.with_name(data_file.stem + ".notion.json"))
+
+    def needs_full(self, now=None):
+        """True nếu đã quá FULL_SYNC_EVERY kể từ lượt full gần nhất (hoặc chưa có lượt nào)"""
+        if not self.last_full:
+            return True
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        return now - datetime.strptime(self.last_full[:19], "%Y-%m-%dT%H:%M:%S") >= FULL_SYNC_EVERY
+
+    def save(self):
+        meta = {"remote_cursor": self.remote_cursor, "local_cursor": self.local_cursor,
+                "last_full": self.last_full, "links": self.links}
+        atomic_write_bytes(self.path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+class LocalChange:
+    __slots__ = ("id", "fields", "stamp")
+
+    def __init__(self, task_id, fields, stamp):
+        self.id = task_id
+        self.fields = fields      # None nghĩa là task đã bị xoá ở local
+        self.stamp = stamp
+
+
+class SyncPlan:
+    """Ảnh chụp những gì cần gửi đi, dựng trên thread giao diện rồi đưa sang thread mạng"""
+
+    def __init__(self, changes, links, remote_cursor, stamp, full=False, forget=()):
+        self.changes = changes
+        self.forget = list(forget)      # id local bị dọn ở local, chỉ bỏ liên kết
+        self.links = links
+        self.remote_cursor = remote_cursor
+        self.stamp = stamp
+        self.full = full
+
+
+class SyncResult:
+    def __init__(self):
+        self.pulls = []         # (id local, fields) cần ghi vào kho
+        self.deletes = []       # id local cần xoá khỏi kho
+        self.links = {}         # id local -> link mới
+        self.unlinks = []
+        self.pushed = 0
+        self.remote_cursor = None
+        self.stamp = None
+        self.scanned = {}       # id local -> field local lúc dựng plan (task có thay đổi)
+        self.full = False
+        self.complete = True    # False: exchange lỗi giữa chừng, chỉ có phần đã làm được
+
+
+class PartialSync(Exception):
+    """
+    exchange lỗi giữa chừng. result giữ phần đã làm xong (nhất là link của trang vừa tạo),
+    phải apply_result nó để lần sau không tạo lại trang đã có trên Notion; error là lỗi gốc.
+    """
+
+    def __init__(self, result, error):
+        super().__init__(str(error))
+        self.result = result
+        self.error = error
+
+
+def plan_sync(store, state, full=False, local_cutoff=None):
+    """
+    Tìm các thay đổi local cần đẩy lên. Chỉ task có updated_at mới hơn local_cursor
+    (hoặc chưa liên kết) mới được so với base, nên số field gửi đi tỉ lệ với số thay đổi.
+    Task đã liên kết mà biến mất ở local thì được xoá (archive) trên Notion, trừ khi
+    ngày của nó trước local_cutoff (đã chuyển vào archive): khi đó chỉ bỏ liên kết.
+    """
+    stamp = utc_stamp()
+    cursor = state.local_cursor
+    changes = []
+    for date in store.dates():
+        for t in store.day(date):
+            link = state.links.get(t.id)
+            if link is not None and not full and cursor and (t.updated_at or "") <= cursor:
+                continue
+            if t.start is None or t.end is None:
+                continue
+            fields = task_fields(date, t)
+            if link is None or fields != link["base"]:
+                changes.append(LocalChange(t.id, fields, t.updated_at))
+    forget = []
+    for task_id, link in state.links.items():
+        if store.locate(task_id) is None:
+            if local_cutoff and link["base"]["date"] < local_cutoff:
+                forget.append(task_id)
+            else:
+                changes.append(LocalChange(task_id, None, stamp))
+    links = {k: dict(v) for k, v in state.links.items()}
+    return SyncPlan(changes, links, None if full else state.remote_cursor, stamp, full, forget)
+
+
+def exchange(client, database_id, plan):
+    """
+    Phần gọi mạng (chạy được ở thread khác, không đụng tới kho):
+    kéo delta từ Notion, gộp với thay đổi local, PATCH đúng các property đã đổi.
+    Lỗi giữa chừng được ném ra dưới dạng PartialSync kèm kết quả dở dang.
+    """
+    result = SyncResult()
+    result.stamp = plan.stamp
+    result.full = plan.full
+    try:
+        _exchange(client, database_id, plan, result)
+    except Exception as e:
+        result.complete = False
+        raise PartialSync(result, e) from e
+    return result
+
+
+def _exchange(client, database_id, plan, result):
+    result.scanned = {ch.id: ch.fields for ch in plan.changes if ch.fields is not None}
+    result.unlinks.extend(plan.forget)
+    schema = {}
+
+    def pushable(fields):
+        # chỉ hỏi schema database khi thật sự cần đẩy done lên
+        if "done" in fields and "done" not in schema:
+            props = client.request("GET", f"databases/{database_id}").get("properties", {})
+            schema["done"] = props.get(DONE_PROPERTY, {}).get("type") == "checkbox"
+        return fields if schema.get("done", True) else fields - {"done"}
+
+    pages = fetch_changes(lambda body: client.query_database_stream(database_id, body, slim_page),
+                          plan.remote_cursor)
+    remote = {p["id"]: p for p in pages}
+    result.remote_cursor = max((p.get("last_edited_time") or "" for p in pages), default="") or plan.remote_cursor
+    page_to_local = {link["page"]: local_id for local_id, link in plan.links.items()
+                     if local_id not in plan.forget}
+
+    for ch in plan.changes:
+        link = plan.links.get(ch.id)
+        if ch.fields is None:
+            if link:
+                remote.pop(link["page"], None)
+                _archive(client, link["page"])
+                result.pushed += 1
+            result.unlinks.append(ch.id)
+            continue
+        if link is None:
+            page = client.create_page(database_id, page_properties(ch.fields, pushable(set(SYNC_FIELDS))))
+            # ghi link ngay: từ đây trang đã tồn tại, lỗi ở bước sau cũng không được làm mất nó
+            result.pushed += 1
+            result.links[ch.id] = {"page": page["id"], "base": ch.fields}
+            continue
+        page = remote.pop(link["page"], None)
+        rfields = page_fields(page) if page else None
+        if page is not None and rfields is None:
+            # trang đã bị xoá/bỏ ngày trên Notion: bên xoá thắng
+            result.deletes.append(ch.id)
+            result.unlinks.append(ch.id)
+            continue
+        merged, push, pull = merge_fields(link["base"], ch.fields, rfields, ch.stamp,
+                                          page.get("last_edited_time") if page else None)
+        push = pushable(push)
+        if push:
+            try:
+                client.update_page(link["page"], page_properties(merged, push))
+            except Exception as e:
+                if getattr(getattr(e, "response", None), "status_code", None) != 404:
+                    raise
+                result.deletes.append(ch.id)
+                result.unlinks.append(ch.id)
+                continue
+            result.pushed += 1
+        if pull:
+            result.pulls.append((ch.id, merged))
+        result.links[ch.id] = {"page": link["page"], "base": merged}
+
+    for page_id, page in remote.items():
+        local_id = page_to_local.get(page_id)
+        fields = page_fields(page)
+        if local_id is None:
+            if fields:
+                fields["done"] = bool(fields["done"])
+                result.pulls.append((page_id, fields))
+                result.links[page_id] = {"page": page_id, "base": fields}
+        elif fields is None:
+            result.deletes.append(local_id)
+            result.unlinks.append(local_id)
+        elif not _same(fields, plan.links[local_id]["base"]):
+            base = plan.links[local_id]["base"]
+            fields = {f: base.get(f) if fields[f] is None else fields[f] for f in SYNC_FIELDS}
+            result.pulls.append((local_id, fields))
+            result.links[local_id] = {"page": page_id, "base": fields}
+
+    if plan.full:
+        # database query không trả về trang đã xoá, chỉ lần tải toàn bộ mới biết
+        seen = {p["id"] for p in pages}
+        handled = set(result.links) | set(result.unlinks)
+        for local_id, link in plan.links.items():
+            if local_id not in handled and link["page"] not in seen:
+                result.deletes.append(local_id)
+                result.unlinks.append(local_id)
+
+
+def _archive(client, page_id):
+    try:
+        client.update_page(page_id, archived=True)
+    except Exception as e:
+        if getattr(getattr(e, "response", None), "status_code", None) != 404:
+            raise
+
+
+def _edited_since(store, task_id, stamp):
+    task = store.get(task_id)
+    return task is not None and (task.updated_at or "") > stamp
+
+
+def apply_result(store, state, result):
+    """
+    Ghi các field kéo về vào kho, cập nhật link/cursor; trả về số task local đã đổi.
+    exchange chạy ở thread khác nên trong lúc đó người dùng vẫn sửa kho được:
+    task sửa sau result.stamp thì các field vừa sửa được giữ lại (lần sau mới đẩy lên),
+    task vừa bị xoá ở local không được kéo về lại, task vừa sửa không bị xoá theo Notion.
+    Kết quả dở dang (PartialSync.result) cũng phải được apply: link và thay đổi đã làm được
+    vẫn được ghi, chỉ cursor là giữ nguyên để lần sau xét lại phần còn thiếu.
+    """
+    changed = 0
+    for task_id, fields in result.pulls:
+        loc = store.locate(task_id)
+        old = state.links.get(task_id)
+        if loc is None and old is not None:
+            # đã liên kết mà giờ không còn: bị xoá ở local trong lúc exchange chạy,
+            # link được giữ lại nên lần sau trang sẽ bị xoá trên Notion
+            continue
+        if loc and old is not None and _edited_since(store, task_id, result.stamp):
+            # field nào local đổi so với lúc dựng plan thì local giữ, còn lại lấy bản đã gộp
+            before = result.scanned.get(task_id) or old["base"]
+            now = task_fields(loc[0], store.get(task_id))
+            fields = {f: now[f] if now[f] != before.get(f) else fields[f] for f in SYNC_FIELDS}
+            if fields == now:
+                continue
+        task = store.get(task_id).copy() if loc else Task(id=task_id)
+        task.title = fields["title"]
+        task.start = parse_hhmm(fields["time"])
+        task.end = parse_hhmm(fields["to"])
+        task.done = fields["done"]
+        if loc and loc[0] == fields["date"]:
+            store.update(task_id, task)
+        else:
+            if loc:
+                store.delete(task_id)
+            store.add(fields["date"], task)
+        changed += 1
+    for task_id in result.deletes:
+        if _edited_since(store, task_id, result.stamp):
+            # sửa ở local sau khi trang bị xoá trên Notion: giữ task, bỏ liên kết -> lần sau tạo trang mới
+            continue
+        if store.locate(task_id):
+            store.delete(task_id)
+            changed += 1
+    for task_id in result.unlinks:
+        state.links.pop(task_id, None)
+    state.links.update(result.links)
+    if result.complete:
+        state.remote_cursor = result.remote_cursor
+        state.local_cursor = result.stamp
+        if result.full:
+            state.last_full = result.stamp
+    state.save()
+    return changed
+
+
+def sync_two_way(store, state, client, database_id, full=False, local_cutoff=None):
+    """
+    Chạy trọn một lượt đồng bộ hai chiều (đồng bộ, dùng cho script); trả về (đẩy lên, kéo về).
+    Tới hạn (state.needs_full()) thì tự chạy full như TwoWaySyncer.
+    """
+    full = full or state.needs_full()
+    try:
+        result = exchange(client, database_id, plan_sync(store, state, full, local_cutoff))
+    except PartialSync as e:
+        apply_result(store, state, e.result)
+        raise e.error
+    return result.pushed, apply_result(store, state, result)
@@ -0,0 +1,146 @@
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+
+from calendar_core.metrics import metrics
+
+# Gộp các lần ghi liên tiếp: chờ DEBOUNCE_SECONDS kể từ thay đổi cuối,
+# nhưng không để dữ liệu nằm trong RAM quá MAX_DELAY_SECONDS
+DEBOUNCE_SECONDS = 0.3
+MAX_DELAY_SECONDS = 2.0
+# Job ghi lỗi (đầy đĩa, file bị khoá...) được chạy lại sau các khoảng chờ này, flush() cũng đợi
+RETRY_DELAYS = (0.1, 0.5, 1.0, 2.0)
+
+
+def atomic_write_bytes(path, data):
+    """Ghi ra file tạm, fsync rồi rename đè lên file thật (không bao giờ để file bị cắt dở)"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    metrics.count("persist.writes")
+    metrics.count("persist.bytes", len(data))
+    with metrics.timer("persist.write"), open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class BackgroundWriter:
+    """
+    Luồng nền thực hiện các job ghi file. Mỗi job có một key, job mới cùng key
+    thay thế job cũ chưa chạy, nên một loạt thay đổi dồn dập chỉ thành một lần ghi.
+    Job ném lỗi được xếp lại (nếu chưa có job mới cùng key) và chạy lại sau retry_delays,
+    hết lượt thử thì bỏ; job phải tự giữ lại phần chưa ghi được (xem TaskJournal._restore).
+    """
+
+    def __init__(self, delay=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS, retry_delays=RETRY_DELAYS):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.retry_delays = retry_delays
+        self.flushes = 0
+        self.failures = 0
+        self._jobs = {}
+        self._attempts = {}     # key -> số lần đã lỗi liên tiếp
+        self._retry_at = 0.0
+        self._first = None
+        self._last = None
+        self._busy = False
+        self._flush_now = False
+        self._closed = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def submit(self, key, fn):
+        with self._cond:
+            self._jobs[key] = fn
+            now = time.monotonic()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="calendar-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self):
+        """Ghi ngay mọi job đang chờ và đợi ghi xong (gọi khi thoát app)"""
+        with self._cond:
+            if not self._jobs and not self._busy:
+                return
+            self._flush_now = True
+            self._cond.notify_all()
+            while self._jobs or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                while True:
+                    now = time.monotonic()
+                    due = now if self._flush_now else min(self._last + self.delay, self._first + self.max_delay)
+                    # đang chờ thử lại thì flush cũng phải đợi hết khoảng backoff
+                    remaining = max(due, self._retry_at) - now
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                jobs = list(self._jobs.items())
+                self._jobs.clear()
+                self._first = self._last = None
+                self._retry_at = 0.0
+                self._flush_now = False
+                self._busy = True
+            failed = []
+            for key, fn in jobs:
+                try:
+                    fn()
+                except Exception as e:
+                    failed.append((key, fn, e))
+                else:
+                    self._attempts.pop(key, None)
+            with self._cond:
+                for key, fn, e in failed:
+                    self.failures += 1
+                    attempt = self._attempts.get(key, 0)
+                    if attempt >= len(self.retry_delays):
+                        self._attempts.pop(key, None)
+                        print(f"Lỗi khi ghi dữ liệu (bỏ sau {attempt + 1} lần thử):", e)
+                        continue
+                    print("Lỗi khi ghi dữ liệu, sẽ thử lại:", e)
+                    self._attempts[key] = attempt + 1
+                    self._jobs.setdefault(key, fn)
+                    now = time.monotonic()
+                    self._first = self._first or now
+                    self._last = self._last or now
+                    self._retry_at = max(self._retry_at, now + self.retry_delays[attempt])
+                self._busy = False
+                self.flushes += 1
+                self._cond.notify_all()
+
+
+# writer dùng chung cho cả app, tự flush khi thoát tiến trình
+writer = BackgroundWriter()
+atexit.register(writer.flush)
+
+
+def flush_writes():
+    writer.flush()
@@ -0,0 +1,44 @@
+"""
+Kiểm tra trùng giờ: lô task nhập vào (không có id) và khoảng giờ nhập ngược.
+
+    python -m pytest -q tests
+"""
+from calendar_core.conflicts import ConflictIndex, absolute_span, bulk_conflicts
+from calendar_core.task_model import Task
+
+DAY = "2026-10-18"
+NEXT = "2026-10-19"
+
+
+def task(title, start, end, task_id=None):
+    return Task(title, start, end, "", 0, False, id=task_id)
+
+
+def names(hits):
+    return sorted((new.title, other.title) for _, new, _, other in hits)
+
+
+def test_bulk_new_tasks_without_id_do_not_conflict_with_themselves():
+    existing = [(DAY, task("old", 9 * 60, 10 * 60, "t1"))]
+    batch = [(DAY, task("a", 12 * 60, 13 * 60)), (DAY, task("b", 14 * 60, 15 * 60))]
+    assert bulk_conflicts(existing, batch) == []
+
+
+def test_bulk_reports_existing_and_in_batch_overlaps_once():
+    existing = [(DAY, task("old", 9 * 60, 10 * 60, "t1"))]
+    batch = [(DAY, task("a", 9 * 60 + 30, 11 * 60)), (DAY, task("b", 10 * 60 + 30, 12 * 60)),
+             (DAY, task("c", 23 * 60, 60)), (NEXT, task("d", 0, 30))]
+    assert names(bulk_conflicts(existing, batch)) == [("a", "old"), ("b", "a"), ("d", "c")]
+
+
+def test_reversed_span_is_cut_at_midnight():
+    reversed_ = task("typo", 17 * 60 + 30, 10 * 60, "t1")
+    base = absolute_span(DAY, task("x", 0, 0))[0]
+    assert absolute_span(DAY, reversed_) == (base + 17 * 60 + 30, base + 24 * 60)
+    # qua nửa đêm thật (23:00 → 01:00) vẫn giữ nguyên
+    assert absolute_span(DAY, task("late", 23 * 60, 60)) == (base + 23 * 60, base + 25 * 60)
+
+    index = ConflictIndex.from_days({DAY: [reversed_]})
+    assert index.max_len == 6 * 60 + 30
+    # trước đây 17:30 → 10:00 chiếm cả buổi sáng hôm sau
+    assert index.conflicts(NEXT, task("new", 9 * 60 + 30, 10 * 60)) == []
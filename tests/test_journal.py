@@ -0,0 +1,79 @@
+"""
+Journal + BackgroundWriter khi ghi đĩa lỗi: thay đổi phải được giữ lại và ghi xong sau flush().
+
+    python -m pytest -q tests
+"""
+import json
+
+import calendar_core.journal as journal_mod
+from calendar_core.journal import TaskJournal, apply_record
+from calendar_core.writer import BackgroundWriter
+
+
+def make_journal(tmp_path, retry_delays=(0.01, 0.02, 0.05)):
+    writer = BackgroundWriter(delay=0.01, max_delay=0.05, retry_delays=retry_delays)
+    j = TaskJournal(tmp_path / "data.json", writer=writer)
+    return j, j.load(), writer
+
+
+def add(j, data, date, title):
+    rec = {"op": "add", "date": date, "task": {"title": title}}
+    apply_record(data, rec)
+    j.append(rec, data)
+
+
+def reload(tmp_path):
+    return TaskJournal(tmp_path / "data.json", readonly=True).load()
+
+
+def failing(fn, times):
+    calls = {"n": 0}
+
+    def wrapper(*args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] <= times:
+            raise OSError("disk full")
+        return fn(*args, **kwargs)
+    return wrapper, calls
+
+
+def test_append_failure_is_retried_before_flush_returns(tmp_path, monkeypatch):
+    j, data, writer = make_journal(tmp_path)
+    wrapper, calls = failing(TaskJournal._append, 2)
+    monkeypatch.setattr(TaskJournal, "_append", lambda self, lines: wrapper(self, lines))
+    add(j, data, "2026-10-18", "a")
+    writer.flush()
+    assert calls["n"] == 3
+    assert reload(tmp_path) == {"2026-10-18": [{"title": "a"}]}
+
+
+def test_snapshot_failure_keeps_compacted_data(tmp_path, monkeypatch):
+    j, data, writer = make_journal(tmp_path)
+    add(j, data, "2026-10-18", "a")
+    writer.flush()
+    wrapper, calls = failing(journal_mod.atomic_write_bytes, 1)
+    monkeypatch.setattr(journal_mod, "atomic_write_bytes", wrapper)
+    add(j, data, "2026-10-18", "b")
+    j.compact(data)
+    add(j, data, "2026-10-19", "c")
+    writer.flush()
+    assert calls["n"] >= 2
+    expected = {"2026-10-18": [{"title": "a"}, {"title": "b"}], "2026-10-19": [{"title": "c"}]}
+    assert json.loads((tmp_path / "data.json").read_text(encoding="utf-8")) == \
+        {"2026-10-18": [{"title": "a"}, {"title": "b"}]}
+    assert reload(tmp_path) == expected
+
+
+def test_flush_gives_up_after_retries_and_next_write_catches_up(tmp_path, monkeypatch):
+    j, data, writer = make_journal(tmp_path, retry_delays=(0.01,))
+    original = TaskJournal._append
+    monkeypatch.setattr(TaskJournal, "_append", lambda self, lines: (_ for _ in ()).throw(OSError("disk full")))
+    add(j, data, "2026-10-18", "a")
+    writer.flush()
+    assert writer.failures == 2
+    assert reload(tmp_path) == {}
+    # đĩa hết lỗi: lần ghi kế tiếp ghi luôn phần còn đọng lại, đúng thứ tự
+    monkeypatch.setattr(TaskJournal, "_append", original)
+    add(j, data, "2026-10-18", "b")
+    writer.flush()
+    assert reload(tmp_path) == {"2026-10-18": [{"title": "a"}, {"title": "b"}]}
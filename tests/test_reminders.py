@@ -0,0 +1,52 @@
+"""
+Hàng đợi nhắc việc: dựng lại (dữ liệu đổi, sang ngày) không được làm mất sự kiện đã tới hạn mà chưa báo.
+
+    python -m pytest -q tests
+"""
+from datetime import datetime
+
+from calendar_core.reminders import CATCH_UP_MINUTES, ReminderQueue
+from calendar_core.task_model import Task
+
+DAY = "2026-10-18"
+BASE = datetime(2026, 10, 18).timestamp()
+
+
+def at(minute, second=0):
+    return BASE + minute * 60 + second
+
+
+def days(*tasks):
+    return {DAY: list(tasks)}
+
+
+def fired(events):
+    return [(ev.kind, ev.task.title) for ev in events]
+
+
+def test_first_build_skips_events_before_current_minute():
+    q = ReminderQueue()
+    q.rebuild(days(Task("past", 9 * 60, 9 * 60 + 30, id="a"), Task("now", 10 * 60, 11 * 60, id="b")), at(10 * 60, 20))
+    assert fired(q.pop_due(at(10 * 60, 30))) == [("start", "now")]
+
+
+def test_rebuild_keeps_due_events_not_yet_popped():
+    task = Task("a", 10 * 60, 11 * 60, id="a")
+    q = ReminderQueue()
+    q.rebuild(days(task), at(9 * 60 + 50))
+    assert q.pop_due(at(9 * 60 + 55)) == []
+    # timer của 10:00 nổ trễ (máy bận), dữ liệu đổi lúc 10:01:05 trước khi nó kịp chạy
+    q.rebuild(days(task, Task("b", 13 * 60, 14 * 60, id="b")), at(10 * 60 + 1, 5))
+    assert fired(q.pop_due(at(10 * 60 + 1, 6))) == [("start", "a")]
+    # đã báo thì dựng lại nữa cũng không báo lại
+    q.rebuild(days(task), at(10 * 60 + 1, 10))
+    assert q.pop_due(at(10 * 60 + 1, 11)) == []
+
+
+def test_rebuild_drops_events_older_than_catch_up():
+    task = Task("a", 10 * 60, 11 * 60, id="a")
+    q = ReminderQueue()
+    q.rebuild(days(task), at(9 * 60))
+    q.pop_due(at(9 * 60 + 1))
+    q.rebuild(days(task), at(10 * 60 + CATCH_UP_MINUTES + 1))
+    assert q.pop_due(at(10 * 60 + CATCH_UP_MINUTES + 1)) == []